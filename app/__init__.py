@@ -1,14 +1,33 @@
 from typing import Optional
+import os
+import socket
 from flask import Flask
 from flask_bootstrap import Bootstrap5  # 修改为正确的导入
 from .utils.error_handler import setup_error_handlers
+from .utils.rpc_counter import setup_rpc_counter
+from .utils.metrics import get_metrics, pool_collector, setup_metrics
 from .utils.logger import LogManager
 from .utils.backup import ConfigBackup
 from .utils.monitor import HostMonitor
 from .services.supervisor_service import SupervisorService
+from .services.connection_pool import get_connection_pool
+from .services.async_supervisor_service import AsyncSupervisorService
+from .services.log_stream import LogStreamHub
+from .services.process_events import ProcessStateFeed
+from .services.dashboard import DashboardAggregator
+from .services.process_index import ProcessIndex
+from .services.history import HistoryStore
+from .services.shared_state import SharedStateStore, WorkerCoordinator
+from .utils.config import load_app_config
 
-def create_app(config_name: Optional[str] = None) -> Flask:
-    """创建Flask应用实例"""
+def create_app(config_name: Optional[str] = None, worker_role: Optional[str] = None) -> Flask:
+    """创建Flask应用实例
+    
+    Args:
+        config_name: 配置名称
+        worker_role: 多 worker 部署中的角色（auto / reader），指定时总是使用共享模式，
+                     优先于 config/app.yaml 中的 workers 配置
+    """
     app = Flask(__name__)
     
     # 使用 Bootstrap5
@@ -32,13 +51,97 @@ def create_app(config_name: Optional[str] = None) -> Flask:
     # 初始化Supervisor服务
     supervisor_service = SupervisorService()
     
+    # 初始化异步Supervisor服务，供监控和批量操作使用
+    async_supervisor_service = AsyncSupervisorService(supervisor_service.config_manager)
+    
     # 初始化主机监控
-    host_monitor = HostMonitor(app, supervisor_service)
-    host_monitor.start_monitoring()
+    host_monitor = HostMonitor(app, supervisor_service, async_supervisor_service)
+    supervisor_service.host_monitor = host_monitor
+    
+    # 初始化仪表盘聚合，由监控的状态和进程快照增量更新
+    dashboard_options = load_app_config().get('dashboard') or {}
+    dashboard = DashboardAggregator(
+        supervisor_service.config_manager,
+        top_n=int(dashboard_options.get('top_n', 10))
+    )
+    host_monitor.add_status_listener(dashboard.on_host_status)
+    host_monitor.process_snapshots.add_listener(dashboard.on_processes)
+    host_monitor.add_sweep_listener(dashboard.refresh)
+    
+    # 初始化跨主机进程索引，由进程快照增量维护
+    process_index = ProcessIndex(supervisor_service.config_manager)
+    host_monitor.process_snapshots.add_listener(process_index.on_processes)
+    host_monitor.add_sweep_listener(process_index.refresh)
+    
+    # 初始化主机和进程状态历史
+    history_options = load_app_config().get('history') or {}
+    history = HistoryStore(
+        supervisor_service.config_manager,
+        host_capacity=int(history_options.get('host_capacity', 1024)),
+        process_capacity=int(history_options.get('process_capacity', 256))
+    )
+    host_monitor.add_status_listener(history.on_host_status)
+    host_monitor.process_snapshots.add_listener(history.on_processes)
+    host_monitor.add_sweep_listener(history.refresh)
+    
+    # 多 worker 部署：只有选举出的进程运行后台采集，其他进程读取它发布的共享状态；
+    # 分片模式下各节点的采集进程按一致性哈希分担主机
+    worker_options = load_app_config().get('workers') or {}
+    sharding_options = load_app_config().get('sharding') or {}
+    sharding = bool(sharding_options.get('enabled', False))
+    worker_coordinator = None
+    if worker_role is not None or sharding or worker_options.get('mode', 'standalone') == 'shared':
+        config_dir = supervisor_service.config_manager.config_dir
+        worker_coordinator = WorkerCoordinator(
+            host_monitor,
+            # 分片模式下的共享磁盘可能被多台机器访问，不能使用 WAL
+            SharedStateStore(os.path.join(config_dir, worker_options.get('state_path', 'state.db')),
+                             journal_mode='DELETE' if sharding else 'WAL'),
+            os.path.join(config_dir, worker_options.get('lock_path', 'collector.lock')),
+            role=worker_role or worker_options.get('role', 'auto'),
+            poll_interval=float(worker_options.get('poll_interval', 1)),
+            node_id=str(sharding_options.get('node_id') or socket.gethostname()),
+            sharding=sharding,
+            virtual_nodes=int(sharding_options.get('virtual_nodes', 64)),
+            node_timeout=float(sharding_options.get('node_timeout', 15))
+        )
+        worker_coordinator.start()
+    else:
+        host_monitor.start_monitoring()
+    
+    # 初始化日志实时推送
+    log_stream_options = load_app_config().get('log_stream') or {}
+    log_stream_hub = LogStreamHub(
+        supervisor_service,
+        poll_interval=float(log_stream_options.get('poll_interval', 1)),
+        max_buffer=int(log_stream_options.get('max_buffer', 256))
+    )
+    
+    # 初始化进程状态变化推送
+    process_event_options = load_app_config().get('process_events') or {}
+    process_state_feed = ProcessStateFeed(
+        supervisor_service,
+        poll_interval=float(process_event_options.get('poll_interval', 2)),
+        max_buffer=int(process_event_options.get('max_buffer', 256))
+    )
     
     # 设置错误处理
     setup_error_handlers(app)
     
+    # 统计每个请求的 RPC 调用次数
+    setup_rpc_counter(app)
+    
+    # 指标：API 请求耗时，以及连接池和后台采集的状态
+    setup_metrics(app)
+    metrics = get_metrics()
+    metrics.add_collector(pool_collector({
+        'sync': get_connection_pool().get_stats,
+        'async': async_supervisor_service.pool.get_stats
+    }))
+    metrics.add_collector(host_monitor.collect_metrics)
+    if worker_coordinator is not None:
+        metrics.add_collector(worker_coordinator.collect_metrics)
+    
     # 注册蓝图
     with app.app_context():
         from .routes import api, main
@@ -48,6 +151,13 @@ def create_app(config_name: Optional[str] = None) -> Flask:
     # 添加到应用上下文
     app.config_backup = config_backup
     app.host_monitor = host_monitor
+    app.worker_coordinator = worker_coordinator
+    app.dashboard = dashboard
+    app.process_index = process_index
+    app.history = history
     app.supervisor_service = supervisor_service
+    app.async_supervisor_service = async_supervisor_service
+    app.log_stream_hub = log_stream_hub
+    app.process_state_feed = process_state_feed
     
     return app
\ No newline at end of file
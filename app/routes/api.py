@@ -1,5 +1,11 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
 from http import HTTPStatus
+import xmlrpc.client
+from ..utils.sse import stream_events
+from ..utils.pagination import parse_limit, parse_list, project
+from ..services.supervisor_service import HOST_FIELDS, PROCESS_FIELDS
+from ..services.process_index import SEARCH_FIELDS
+from ..services.history import MAX_BUCKETS, MAX_WINDOW
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -20,6 +26,35 @@ def make_api_response(data=None, message=None, error=None, status_code=HTTPStatu
     }
     return jsonify(response), status_code
 
+def parse_fields(allowed: tuple) -> list:
+    """解析 fields 查询参数
+
+    Raises:
+        ValueError: 包含不支持的字段
+    """
+    fields = parse_list(request.args.get('fields'))
+    unknown = [field for field in fields or [] if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}; allowed: {', '.join(allowed)}")
+    return fields
+
+def parse_history_args() -> tuple:
+    """解析历史查询的 window 和 buckets 参数
+
+    Raises:
+        ValueError: 参数不是整数或超出范围
+    """
+    try:
+        window = int(request.args.get('window', 86400))
+        buckets = int(request.args.get('buckets', 0))
+    except ValueError:
+        raise ValueError("window and buckets must be integers")
+    if not 0 < window <= MAX_WINDOW:
+        raise ValueError(f"window must be between 1 and {MAX_WINDOW} seconds")
+    if not 0 <= buckets <= MAX_BUCKETS:
+        raise ValueError(f"buckets must be between 0 and {MAX_BUCKETS}")
+    return window, buckets
+
 def sanitize_host_info(host: dict) -> dict:
     """清理主机信息，移除敏感数据
     
@@ -46,13 +81,54 @@ def handle_api_error(error):
         status_code=HTTPStatus.INTERNAL_SERVER_ERROR
     )
 
+@bp.route('/dashboard', methods=['GET'])
+def get_dashboard():
+    """获取集群仪表盘数据
+
+    数据由后台监控增量维护并预先序列化，请求不会访问任何 supervisor。
+    """
+    return current_app.response_class(
+        current_app.dashboard.get_payload(),
+        mimetype='application/json'
+    )
+
 @bp.route('/hosts', methods=['GET'])
 def get_hosts():
-    """获取所有主机列表"""
+    """获取主机列表
+    
+    Query Args:
+        max_age: 可接受的状态缓存时间（秒），超过该时间的主机会被实时探测；默认使用后台采集的状态
+        status: 逗号分隔的状态 (connected/disconnected/unknown)，按缓存的状态过滤
+        tag: 标签
+        name: 主机名称或ID前缀
+        limit: 每页主机数，不传时返回全部
+        cursor: 上一页返回的 next_cursor
+        fields: 逗号分隔的返回字段
+    """
     try:
-        hosts = current_app.supervisor_service.get_hosts()
+        try:
+            max_age = request.args.get('max_age', type=float)
+            limit = parse_limit(request.args.get('limit'))
+            fields = parse_fields(HOST_FIELDS)
+            result = current_app.supervisor_service.query_hosts(
+                max_age=max_age,
+                status=parse_list(request.args.get('status')),
+                tag=request.args.get('tag') or None,
+                name=request.args.get('name') or None,
+                limit=limit,
+                cursor=request.args.get('cursor') or None
+            )
+        except ValueError as e:
+            return make_api_response(
+                error=str(e),
+                status_code=HTTPStatus.BAD_REQUEST
+            )
         return make_api_response(
-            data={'hosts': hosts},
+            data={
+                'hosts': project(result['hosts'], fields),
+                'next_cursor': result['next_cursor'],
+                'total': result['total']
+            },
             message='Successfully retrieved hosts'
         )
     except Exception as e:
@@ -157,7 +233,18 @@ def get_host(host_id):
 
 @bp.route('/processes', methods=['GET'])
 def get_processes():
-    """获取指定主机的进程列表"""
+    """获取指定主机的进程列表
+    
+    Query Args:
+        host_id: 主机ID
+        statename: 逗号分隔的进程状态，例如 RUNNING,FATAL
+        name: 进程名前缀
+        limit: 每页进程数，不传时返回全部
+        cursor: 上一页返回的 next_cursor
+        fields: 逗号分隔的返回字段
+        max_age: 可接受的进程快照时间（秒），超过后实时获取；默认使用后台采集的快照
+        fresh: 为 1 时忽略快照，实时获取
+    """
     host_id = request.args.get('host_id')
     current_app.logger.debug(f"Received request for processes with host_id: {host_id}")
     
@@ -169,7 +256,7 @@ def get_processes():
 
     try:
         supervisor_service = current_app.supervisor_service
-        host = supervisor_service.get_host(host_id)
+        host = supervisor_service.get_host(host_id, check_status=False)
         
         if not host:
             current_app.logger.error(f"Host not found: {host_id}")
@@ -178,16 +265,37 @@ def get_processes():
                 status_code=HTTPStatus.NOT_FOUND
             )
 
-        processes = supervisor_service.get_processes(host_id)
-        current_app.logger.debug(f"Retrieved processes for host {host_id}: {processes}")
-        
-        # 确保返回的是列表
-        if not isinstance(processes, list):
-            current_app.logger.error(f"Invalid processes data type: {type(processes)}")
-            processes = list(processes) if processes else []
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            fields = parse_fields(PROCESS_FIELDS)
+            result = supervisor_service.query_processes(
+                host_id,
+                statenames=parse_list(request.args.get('statename')),
+                name=request.args.get('name') or None,
+                limit=limit,
+                cursor=request.args.get('cursor') or None,
+                max_age=0 if request.args.get('fresh') in ('1', 'true') else request.args.get('max_age', type=float)
+            )
+        except ValueError as e:
+            return make_api_response(
+                error=str(e),
+                status_code=HTTPStatus.BAD_REQUEST
+            )
+        except (ConnectionError, OSError, xmlrpc.client.Error) as e:
+            error_msg = f"Failed to get processes from host {host_id}: {str(e)}"
+            current_app.logger.error(error_msg)
+            return make_api_response(
+                error=error_msg,
+                status_code=HTTPStatus.BAD_GATEWAY
+            )
         
         return make_api_response(
-            data={'processes': processes},
+            data={
+                'processes': project(result['processes'], fields),
+                'next_cursor': result['next_cursor'],
+                'total': result['total'],
+                'updated_at': result['updated_at']
+            },
             message='Successfully retrieved processes'
         )
         
@@ -199,6 +307,195 @@ def get_processes():
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR
         )
 
+@bp.route('/search/processes', methods=['GET'])
+def search_processes():
+    """跨主机搜索进程
+
+    结果来自后台进程快照维护的索引，请求不会访问任何 supervisor。
+
+    Query Args:
+        q: 进程名前缀，包含 * ? [ 时按 glob 匹配，大小写不敏感
+        statename: 逗号分隔的进程状态，例如 FATAL,BACKOFF
+        limit: 每页条目数，默认 200
+        cursor: 上一页返回的 next_cursor
+        fields: 逗号分隔的返回字段
+    """
+    try:
+        limit = parse_limit(request.args.get('limit', '200'))
+        fields = parse_fields(SEARCH_FIELDS)
+        result = current_app.process_index.search(
+            request.args.get('q', '').strip() or None,
+            statenames=parse_list(request.args.get('statename')),
+            limit=limit,
+            cursor=request.args.get('cursor') or None
+        )
+    except ValueError as e:
+        return make_api_response(
+            error=str(e),
+            status_code=HTTPStatus.BAD_REQUEST
+        )
+    return make_api_response(
+        data={
+            'processes': project(result['processes'], fields),
+            'next_cursor': result['next_cursor'],
+            'total': result['total'],
+            'hosts': result['hosts']
+        },
+        message='Successfully searched processes'
+    )
+
+@bp.route('/history/hosts/<host_id>', methods=['GET'])
+def get_host_history(host_id):
+    """获取主机的在线历史
+
+    Query Args:
+        window: 时间窗口（秒），默认 86400
+        buckets: 降采样的分桶数，默认 0（不返回 timeline）
+    """
+    try:
+        window, buckets = parse_history_args()
+    except ValueError as e:
+        return make_api_response(
+            error=str(e),
+            status_code=HTTPStatus.BAD_REQUEST
+        )
+    history = current_app.history.host_history(host_id, window, buckets)
+    if history is None:
+        return make_api_response(
+            error=f"No history for host {host_id}",
+            status_code=HTTPStatus.NOT_FOUND
+        )
+    return make_api_response(
+        data={'host_id': host_id, 'window': window, **history},
+        message='Successfully retrieved host history'
+    )
+
+@bp.route('/history/processes', methods=['GET'])
+def get_process_history():
+    """获取主机上进程的运行历史
+
+    Query Args:
+        host_id: 主机ID
+        name: 进程名，不传时返回该主机所有进程，按重启次数降序
+        window: 时间窗口（秒），默认 86400
+        buckets: 降采样的分桶数，默认 0（不返回 timeline）
+    """
+    host_id = request.args.get('host_id')
+    if not host_id:
+        return make_api_response(
+            error="Missing host_id parameter",
+            status_code=HTTPStatus.BAD_REQUEST
+        )
+    try:
+        window, buckets = parse_history_args()
+    except ValueError as e:
+        return make_api_response(
+            error=str(e),
+            status_code=HTTPStatus.BAD_REQUEST
+        )
+    processes = current_app.history.process_history(host_id, request.args.get('name') or None, window, buckets)
+    if processes is None:
+        return make_api_response(
+            error=f"No history for host {host_id}",
+            status_code=HTTPStatus.NOT_FOUND
+        )
+    return make_api_response(
+        data={'host_id': host_id, 'window': window, 'processes': processes},
+        message='Successfully retrieved process history'
+    )
+
+@bp.route('/processes/stream', methods=['GET'])
+def stream_processes():
+    """以 Server-Sent Events 推送主机的进程状态变化
+
+    事件类型：snapshot（完整进程列表）、changed（状态变化的进程及已消失的进程名）、
+    overflow（客户端消费过慢被丢弃的事件数）、error（上游获取失败）。
+
+    Query Args:
+        host_id: 主机ID
+    """
+    host_id = request.args.get('host_id')
+    if not host_id:
+        return make_api_response(
+            error="Missing host_id parameter",
+            status_code=HTTPStatus.BAD_REQUEST
+        )
+
+    if not current_app.supervisor_service.get_host(host_id, check_status=False):
+        return make_api_response(
+            error="Host not found",
+            status_code=HTTPStatus.NOT_FOUND
+        )
+
+    feed = current_app.process_state_feed
+    subscriber = feed.subscribe(host_id)
+    return Response(
+        stream_with_context(stream_events(subscriber, lambda: feed.unsubscribe(subscriber))),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/processes/bulk', methods=['POST'])
+def bulk_control_processes():
+    """批量控制进程
+
+    请求体:
+        items: 操作列表，每项为 {host_id, process | group, action}，
+               process 或 group 为 '*' 时作用于主机上的所有进程
+        parallelism: 可选，同时处理的主机数
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('items')
+        if not isinstance(items, list) or not items:
+            return make_api_response(
+                error='items must be a non-empty list',
+                status_code=HTTPStatus.BAD_REQUEST
+            )
+
+        for position, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get('host_id'):
+                return make_api_response(
+                    error=f'Item {position}: host_id is required',
+                    status_code=HTTPStatus.BAD_REQUEST
+                )
+            if bool(item.get('process')) == bool(item.get('group')):
+                return make_api_response(
+                    error=f'Item {position}: exactly one of process or group is required',
+                    status_code=HTTPStatus.BAD_REQUEST
+                )
+            if item.get('action') not in ['start', 'stop', 'restart']:
+                return make_api_response(
+                    error=f'Item {position}: invalid action: {item.get("action")}',
+                    status_code=HTTPStatus.BAD_REQUEST
+                )
+
+        parallelism = data.get('parallelism')
+        if parallelism is not None and (not isinstance(parallelism, int) or parallelism < 1):
+            return make_api_response(
+                error='parallelism must be a positive integer',
+                status_code=HTTPStatus.BAD_REQUEST
+            )
+
+        async_service = current_app.async_supervisor_service
+        results = async_service.run(async_service.bulk_control_processes(items, parallelism))
+        failed = sum(1 for result in results if not result['success'])
+        return make_api_response(
+            data={
+                'results': results,
+                'succeeded': len(results) - failed,
+                'failed': failed
+            },
+            message=f'Completed {len(results)} operations, {failed} failed'
+        )
+    except Exception as e:
+        error_msg = f"Failed to run bulk operation: {str(e)}"
+        current_app.logger.error(error_msg)
+        return make_api_response(
+            error=error_msg,
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR
+        )
+
 @bp.route('/processes/<process_name>/<action>', methods=['POST'])
 def control_process(process_name, action):
     """控制进程状态"""
@@ -279,7 +576,7 @@ def get_logs(process_name):
         
     try:
         supervisor_service = current_app.supervisor_service
-        host = supervisor_service.get_host(host_id)
+        host = supervisor_service.get_host(host_id, check_status=False)
         
         if not host:
             return make_api_response(
@@ -307,6 +604,100 @@ def get_logs(process_name):
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR
         )
 
+@bp.route('/logs/<process_name>/tail', methods=['GET'])
+def tail_logs(process_name):
+    """增量获取进程日志
+
+    Query Args:
+        host_id: 主机ID
+        type: 日志类型 (stdout/stderr)
+        offset: 上次返回的偏移量，首次请求为 0（返回日志末尾）
+        length: 最多读取的字节数
+    """
+    host_id = request.args.get('host_id')
+    log_type = request.args.get('type', 'stdout')
+    offset = request.args.get('offset', 0, type=int)
+    length = request.args.get('length', 16384, type=int)
+
+    if not host_id:
+        return make_api_response(
+            error="Missing host_id parameter",
+            status_code=HTTPStatus.BAD_REQUEST
+        )
+
+    if log_type not in ['stdout', 'stderr']:
+        return make_api_response(
+            error=f'Invalid log type: {log_type}',
+            status_code=HTTPStatus.BAD_REQUEST
+        )
+
+    try:
+        supervisor_service = current_app.supervisor_service
+        if not supervisor_service.get_host(host_id, check_status=False):
+            return make_api_response(
+                error="Host not found",
+                status_code=HTTPStatus.NOT_FOUND
+            )
+
+        tail = supervisor_service.tail_process_log(host_id, process_name, log_type, offset, length)
+        return make_api_response(
+            data={
+                **tail,
+                'process': process_name,
+                'type': log_type
+            },
+            message='Successfully retrieved logs'
+        )
+
+    except Exception as e:
+        error_msg = f"Failed to tail logs: {str(e)}"
+        current_app.logger.error(error_msg)
+        return make_api_response(
+            error=error_msg,
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR
+        )
+
+@bp.route('/logs/<process_name>/stream', methods=['GET'])
+def stream_logs(process_name):
+    """以 Server-Sent Events 实时推送进程日志
+
+    同一进程日志的所有订阅者共享一路上游轮询。事件类型：
+    snapshot（日志末尾内容，替换显示）、log（新增内容）、
+    overflow（客户端消费过慢被丢弃的事件数）、error（上游读取失败）。
+
+    Query Args:
+        host_id: 主机ID
+        type: 日志类型 (stdout/stderr)
+    """
+    host_id = request.args.get('host_id')
+    log_type = request.args.get('type', 'stdout')
+
+    if not host_id:
+        return make_api_response(
+            error="Missing host_id parameter",
+            status_code=HTTPStatus.BAD_REQUEST
+        )
+
+    if log_type not in ['stdout', 'stderr']:
+        return make_api_response(
+            error=f'Invalid log type: {log_type}',
+            status_code=HTTPStatus.BAD_REQUEST
+        )
+
+    if not current_app.supervisor_service.get_host(host_id, check_status=False):
+        return make_api_response(
+            error="Host not found",
+            status_code=HTTPStatus.NOT_FOUND
+        )
+
+    hub = current_app.log_stream_hub
+    subscriber = hub.subscribe(host_id, process_name, log_type)
+    return Response(
+        stream_with_context(stream_events(subscriber, lambda: hub.unsubscribe(subscriber))),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @bp.route('/hosts/<host_id>', methods=['GET', 'PUT', 'DELETE'])
 def manage_host(host_id):
     """管理主机（获取、更新、删除）"""
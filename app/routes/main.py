@@ -1,4 +1,5 @@
 from flask import Blueprint, render_template, current_app, flash, redirect, url_for, request
+from ..utils.metrics import get_metrics
 
 bp = Blueprint('main', __name__)
 
@@ -40,4 +41,12 @@ def logs():
     except Exception as e:
         current_app.logger.error(f"Error loading logs page: {str(e)}")
         flash('Error loading logs page', 'error')
-        return redirect(url_for('main.index'))
\ No newline at end of file
+        return redirect(url_for('main.index'))
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus 格式的指标"""
+    return current_app.response_class(
+        get_metrics().render(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -24,7 +24,7 @@ def services():
         return redirect(url_for('views.index'))
         
     try:
-        host = current_app.supervisor_service.get_host(host_id)
+        host = current_app.supervisor_service.get_host(host_id, check_status=False)
         if not host:
             return redirect(url_for('views.index'))
             
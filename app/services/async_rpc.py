@@ -0,0 +1,248 @@
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+from collections import deque
+import asyncio
+import base64
+import logging
+import time
+import xmlrpc.client
+
+from ..utils.metrics import RPC_CALLS, RPC_DURATION, RPC_ERRORS
+from ..utils.rpc_counter import record_rpc
+from ..utils.xmlrpc_codec import loads_response
+from .circuit_breaker import CircuitBreakerRegistry, get_circuit_breakers
+
+# 复用的 keep-alive 连接在发送阶段被对端关闭时，换新连接重试一次
+_RETRYABLE_ERRORS = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError, asyncio.IncompleteReadError)
+
+class _AsyncConnection:
+    """一条到 supervisor 的 asyncio TCP 连接"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+        self.reused = False
+
+    def is_usable(self) -> bool:
+        """连接未关闭且对端没有发送 EOF"""
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        self.writer.close()
+
+class AsyncConnectionPool:
+    """按 ip:port 维护的 asyncio keep-alive 连接池
+
+    与 ConnectionPool 相同的借出/归还模型，但只能在创建它的事件循环中使用，因此不需要加锁。
+    get_stats 可以在其他线程中调用：它只读取事件循环维护的计数，不遍历空闲连接表。
+    """
+
+    def __init__(self, max_size: int = 4, idle_timeout: float = 60.0) -> None:
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[str, Deque[_AsyncConnection]] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'discards': 0}
+        self._idle_count = 0
+
+    async def acquire(self, host_key: str, timeout: float) -> _AsyncConnection:
+        """借出一个到指定主机的连接，没有可用的空闲连接时新建
+
+        Args:
+            host_key: 主机标识 (ip:port)
+            timeout: 建立连接的超时时间（秒）
+
+        Returns:
+            _AsyncConnection: 可用的连接
+        """
+        idle = self._idle.get(host_key)
+        now = time.monotonic()
+        while idle:
+            conn = idle.pop()
+            self._idle_count -= 1
+            if conn.is_usable() and now - conn.last_used <= self.idle_timeout:
+                self._stats['hits'] += 1
+                conn.reused = True
+                return conn
+            self._stats['evictions'] += 1
+            conn.close()
+
+        self._stats['misses'] += 1
+        host, _, port = host_key.rpartition(':')
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout)
+        return _AsyncConnection(reader, writer)
+
+    def release(self, host_key: str, conn: _AsyncConnection) -> None:
+        """归还连接；连接已失效或空闲队列已满时直接关闭"""
+        idle = self._idle.setdefault(host_key, deque())
+        if conn.is_usable() and len(idle) < self.max_size:
+            conn.last_used = time.monotonic()
+            idle.append(conn)
+            self._idle_count += 1
+        else:
+            conn.close()
+
+    def discard(self, host_key: str, conn: _AsyncConnection) -> None:
+        """丢弃出错的连接"""
+        self._stats['discards'] += 1
+        conn.close()
+
+    def close_host(self, host_key: str) -> None:
+        """关闭指定主机的所有空闲连接"""
+        for conn in self._idle.pop(host_key, None) or ():
+            self._idle_count -= 1
+            conn.close()
+
+    def close_all(self) -> None:
+        """关闭池中所有空闲连接"""
+        for host_key in list(self._idle):
+            self.close_host(host_key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息"""
+        # 键集合固定的 dict 复制和 len 在 GIL 下是原子的，不会与事件循环的修改冲突
+        stats = dict(self._stats)
+        stats['idle'] = self._idle_count
+        stats['hosts'] = len(self._idle)
+        return stats
+
+class AsyncXmlRpcClient:
+    """基于 asyncio 的 supervisor XML-RPC 客户端
+
+    请求使用 xmlrpc.client 编码，响应由 loads_response 解析，HTTP/1.1 收发在本地实现，
+    连接从 AsyncConnectionPool 借用；与 AuthTransport 一样接入 RPC 计数和主机熔断。
+    """
+
+    def __init__(self, pool: AsyncConnectionPool, timeout: float = 10.0,
+                 breakers: Optional[CircuitBreakerRegistry] = None) -> None:
+        self.pool = pool
+        self.timeout = timeout
+        self.breakers = breakers or get_circuit_breakers()
+
+    async def call(self, host: Dict[str, Any], method: str, *params: Any,
+                   fields: Optional[Sequence[str]] = None) -> Any:
+        """调用 supervisor XML-RPC 方法
+
+        Args:
+            host: 主机配置信息，包含 ip、port、username、password
+            method: 方法名，例如 'supervisor.getState'
+            *params: 方法参数
+            fields: 返回值中的 struct 只解码这些成员，为 None 时解码全部
+
+        Returns:
+            Any: 方法返回值
+
+        Raises:
+            xmlrpc.client.Fault: supervisor 返回错误
+            xmlrpc.client.ProtocolError: HTTP 状态码不是 200
+            CircuitOpenError: 主机熔断中
+            ConnectionError: 无法连接到主机
+        """
+        host_key = f"{host['ip']}:{int(host['port'])}"
+        breaker = self.breakers.get(host_key)
+        breaker.before_call()
+        record_rpc(method)
+        RPC_CALLS.inc(method, host_key)
+        start = time.perf_counter()
+
+        auth = base64.b64encode(f"{host.get('username', '')}:{host.get('password', '')}".encode()).decode()
+        body = xmlrpc.client.dumps(params, method, encoding='utf-8', allow_none=True).encode('utf-8', 'xmlcharrefreplace')
+        try:
+            response = await asyncio.wait_for(self._request(host_key, auth, body), self.timeout)
+            result = loads_response(response, fields)
+        except (xmlrpc.client.Fault, xmlrpc.client.ProtocolError):
+            # 服务端有响应，主机本身可达
+            RPC_ERRORS.inc(method, host_key)
+            breaker.record_success()
+            raise
+        except Exception as e:
+            RPC_ERRORS.inc(method, host_key)
+            self.pool.close_host(host_key)
+            error = str(e) or type(e).__name__
+            breaker.record_failure(error)
+            raise ConnectionError(error) from e
+        finally:
+            RPC_DURATION.observe(time.perf_counter() - start, method)
+        breaker.record_success()
+        return result
+
+    async def _request(self, host_key: str, auth: str, body: bytes) -> bytes:
+        """发送一次 POST /RPC2 并返回响应体"""
+        request = (
+            f"POST /RPC2 HTTP/1.1\r\n"
+            f"Host: {host_key}\r\n"
+            f"Authorization: Basic {auth}\r\n"
+            f"Content-Type: text/xml\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"\r\n"
+        ).encode('latin-1') + body
+
+        for attempt in range(2):
+            conn = await self.pool.acquire(host_key, self.timeout)
+            try:
+                conn.writer.write(request)
+                await conn.writer.drain()
+                status, reason, headers, will_close = await self._read_head(conn.reader)
+            except _RETRYABLE_ERRORS:
+                self.pool.discard(host_key, conn)
+                if conn.reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                self.pool.discard(host_key, conn)
+                raise
+            break
+
+        try:
+            payload = await self._read_body(conn.reader, headers)
+        except BaseException:
+            self.pool.discard(host_key, conn)
+            raise
+        if will_close or 'content-length' not in headers and 'chunked' not in headers.get('transfer-encoding', ''):
+            self.pool.discard(host_key, conn)
+        else:
+            self.pool.release(host_key, conn)
+
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(host_key + '/RPC2', status, reason, headers)
+        return payload
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, str, Dict[str, str], bool]:
+        """读取状态行和响应头"""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Server closed the connection')
+        version, _, rest = status_line.decode('latin-1').strip().partition(' ')
+        code, _, reason = rest.partition(' ')
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n'):
+                break
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        will_close = connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive')
+        return int(code), reason, headers, will_close
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        """按 Content-Length 或 chunked 编码读取响应体，都没有时读到连接关闭"""
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';', 1)[0].strip(), 16)
+                if size == 0:
+                    # 跳过 trailer
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(chunks)
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+        if 'content-length' in headers:
+            return await reader.readexactly(int(headers['content-length']))
+        return await reader.read()
@@ -0,0 +1,252 @@
+from typing import Any, Coroutine, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import concurrent.futures
+import logging
+import xmlrpc.client
+
+from ..utils.async_runner import AsyncLoopRunner, get_async_runner
+from ..utils.config import ConfigManager, create_config_manager, load_app_config
+from .async_rpc import AsyncConnectionPool, AsyncXmlRpcClient
+from .supervisor_service import (
+    DEFAULT_TAIL_LENGTH, MAX_TAIL_LENGTH, PROCESS_FIELDS, collect_bulk_results,
+    format_multicall_results, format_processes, make_bulk_result, plan_bulk_calls
+)
+
+class AsyncSupervisorService:
+    """SupervisorService 的 asyncio 版本
+
+    覆盖状态检查、进程列表、进程控制、批量控制和日志增量读取；
+    所有主机共用一个事件循环和 keep-alive 连接池，并发数由 max_concurrency 限制，
+    不再需要每个主机占用一个线程。同步代码通过 run 调用。
+    """
+
+    def __init__(self, config_manager: Optional[ConfigManager] = None,
+                 runner: Optional[AsyncLoopRunner] = None) -> None:
+        options = load_app_config().get('async_client') or {}
+        self.config_manager = config_manager or create_config_manager()
+        self.runner = runner or get_async_runner()
+        self.logger = logging.getLogger(__name__)
+        self.pool = AsyncConnectionPool(
+            max_size=int(options.get('max_size', 4)),
+            idle_timeout=float(options.get('idle_timeout', 60))
+        )
+        self.client = AsyncXmlRpcClient(self.pool, timeout=float(options.get('timeout', 10)))
+        self.max_concurrency = int(options.get('max_concurrency', 512))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        bulk_options = load_app_config().get('bulk_control') or {}
+        self.bulk_parallelism = int(bulk_options.get('parallelism', 8))
+        self.bulk_max_parallelism = int(bulk_options.get('max_parallelism', 32))
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """在共享事件循环中执行协程并等待结果，供同步代码调用
+
+        Args:
+            coro: 本服务的协程，例如 service.bulk_control_processes(items)
+            timeout: 等待超时时间（秒）
+
+        Returns:
+            Any: 协程的返回值
+        """
+        return self.runner.run(coro, timeout)
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+        """把协程提交到共享事件循环但不等待，供后台任务使用
+
+        Args:
+            coro: 本服务的协程
+
+        Returns:
+            concurrent.futures.Future: 协程结果
+        """
+        return self.runner.submit(coro)
+
+    async def call(self, host: Dict[str, Any], method: str, *params: Any,
+                   fields: Optional[Sequence[str]] = None) -> Any:
+        """在并发上限内调用 supervisor XML-RPC 方法
+
+        Args:
+            host: 主机配置信息
+            method: 方法名
+            *params: 方法参数
+            fields: 返回值中的 struct 只解码这些成员
+
+        Returns:
+            Any: 方法返回值
+        """
+        async with self._semaphore:
+            return await self.client.call(host, method, *params, fields=fields)
+
+    def _get_host(self, host_id: str) -> Dict[str, Any]:
+        host = self.config_manager.get_host(host_id)
+        if not host:
+            raise ValueError(f"Host {host_id} not found")
+        return host
+
+    async def check_connection(self, host: Dict[str, Any]) -> bool:
+        """检查与主机的连接状态
+
+        Args:
+            host: 主机配置信息
+
+        Returns:
+            bool: 连接是否成功
+        """
+        try:
+            await self.call(host, 'supervisor.getState')
+            return True
+        except Exception as e:
+            self.logger.debug(f"Connection test failed for {host.get('ip')}:{host.get('port')}: {str(e)}")
+            return False
+
+    async def fetch_processes(self, host_id: str) -> List[Dict[str, Any]]:
+        """获取指定主机的进程列表，失败时抛出异常
+
+        Args:
+            host_id: 主机ID
+
+        Returns:
+            List[Dict[str, Any]]: 格式化后的进程列表
+
+        Raises:
+            ValueError: 主机不存在
+            ConnectionError: 无法连接到主机
+        """
+        processes = await self.call(self._get_host(host_id), 'supervisor.getAllProcessInfo',
+                                    fields=PROCESS_FIELDS)
+        return format_processes(processes)
+
+    async def multicall(self, host_id: str, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """在指定主机上批量执行调用，所有调用只占用一次 HTTP 往返
+
+        Args:
+            host_id: 主机ID
+            calls: (方法名, 参数列表) 的列表
+
+        Returns:
+            List[Any]: 与 calls 一一对应的结果，失败的调用以 xmlrpc.client.Fault 实例返回
+        """
+        return await self._multicall(self._get_host(host_id), calls)
+
+    async def _multicall(self, host: Dict[str, Any], calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        if not calls:
+            return []
+        if len(calls) == 1:
+            method, params = calls[0]
+            try:
+                return [await self.call(host, method, *params)]
+            except xmlrpc.client.Fault as e:
+                return [e]
+        results = await self.call(host, 'system.multicall', [
+            {'methodName': method, 'params': list(params)}
+            for method, params in calls
+        ])
+        return format_multicall_results(results)
+
+    async def control_process(self, host_id: str, process_name: str, action: str) -> bool:
+        """控制进程
+
+        Args:
+            host_id: 主机ID
+            process_name: 进程名称
+            action: 操作类型 (start/stop/restart)
+
+        Returns:
+            bool: 操作是否成功
+
+        Raises:
+            Exception: 操作失败时抛出
+        """
+        try:
+            host = self._get_host(host_id)
+            if action == 'start':
+                await self.call(host, 'supervisor.startProcess', process_name)
+            elif action == 'stop':
+                await self.call(host, 'supervisor.stopProcess', process_name)
+            elif action == 'restart':
+                # 停止和启动合并为一次 multicall，停止失败（如进程未运行）忽略
+                _, started = await self._multicall(host, [
+                    ('supervisor.stopProcess', [process_name]),
+                    ('supervisor.startProcess', [process_name])
+                ])
+                if isinstance(started, xmlrpc.client.Fault):
+                    raise started
+            else:
+                raise ValueError(f"Invalid action: {action}")
+            return True
+        except Exception as e:
+            error_msg = f"Failed to {action} process {process_name}: {str(e)}"
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+    async def bulk_control_processes(self, items: List[Dict[str, Any]],
+                                     parallelism: Optional[int] = None) -> List[Dict[str, Any]]:
+        """批量控制进程
+
+        按主机分组，同一主机上的操作合并为一次 system.multicall，不同主机之间并发执行。
+
+        Args:
+            items: 操作列表，每项包含 host_id、action 以及 process 或 group 之一
+            parallelism: 同时处理的主机数，为 None 时使用配置值
+
+        Returns:
+            List[Dict[str, Any]]: 与 items 一一对应的执行结果
+        """
+        by_host: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        for index, item in enumerate(items):
+            by_host.setdefault(item['host_id'], []).append((index, item))
+
+        parallelism = parallelism or self.bulk_parallelism
+        limit = asyncio.Semaphore(max(1, min(parallelism, self.bulk_max_parallelism)))
+
+        async def control_host(host_id: str, host_items: List[Tuple[int, Dict[str, Any]]]):
+            async with limit:
+                return await self._bulk_control_host(host_id, host_items)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        host_results = await asyncio.gather(*[
+            control_host(host_id, host_items)
+            for host_id, host_items in by_host.items()
+        ])
+        for host_result in host_results:
+            for index, result in host_result:
+                results[index] = result
+        return results
+
+    async def _bulk_control_host(self, host_id: str,
+                                 host_items: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """在单个主机上执行一组控制操作，只占用一次 HTTP 往返"""
+        host = self.config_manager.get_host(host_id)
+        if not host:
+            return [(index, make_bulk_result(item, False, f"Host {host_id} not found"))
+                    for index, item in host_items]
+
+        calls, plans = plan_bulk_calls(host_items)
+        try:
+            responses = await self._multicall(host, calls)
+        except Exception as e:
+            self.logger.error(f"Bulk control failed on host {host_id}: {str(e)}")
+            return [(index, make_bulk_result(item, False, str(e))) for index, item in host_items]
+
+        return collect_bulk_results(plans, responses)
+
+    async def tail_process_log(self, host_id: str, process_name: str, log_type: str = 'stdout',
+                               offset: int = 0, length: int = DEFAULT_TAIL_LENGTH) -> Dict[str, Any]:
+        """增量读取进程日志，参数和返回值与 SupervisorService.tail_process_log 相同
+
+        Raises:
+            Exception: 获取日志失败时抛出
+        """
+        try:
+            host = self._get_host(host_id)
+            offset = max(0, int(offset))
+            length = max(0, min(int(length), MAX_TAIL_LENGTH))
+            method = 'supervisor.tailProcessStdoutLog' if log_type == 'stdout' else 'supervisor.tailProcessStderrLog'
+            log_data, new_offset, overflow = await self.call(host, method, process_name, offset, length)
+            return {
+                'content': log_data if isinstance(log_data, str) else log_data.decode('utf-8', 'replace'),
+                'offset': new_offset,
+                'overflow': bool(overflow)
+            }
+        except Exception as e:
+            self.logger.error(f"Failed to get {log_type} log for process {process_name}: {str(e)}")
+            raise Exception(f"Failed to get process log: {str(e)}")
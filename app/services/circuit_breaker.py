@@ -0,0 +1,170 @@
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+
+from ..utils.config import load_app_config
+
+class CircuitOpenError(ConnectionError):
+    """主机熔断中，请求被直接拒绝"""
+
+    def __init__(self, host_key: str, last_error: Optional[str], retry_after: float) -> None:
+        self.host_key = host_key
+        self.last_error = last_error
+        self.retry_after = retry_after
+        super().__init__(
+            f"Circuit open for {host_key} (retry in {retry_after:.0f}s), last error: {last_error}"
+        )
+
+class CircuitBreaker:
+    """单个主机的熔断器
+
+    closed: 正常放行；连续失败达到阈值后进入 open。
+    open: 直接拒绝并返回缓存的错误，退避时间到期后进入 half_open。
+    half_open: 只放行一个试探请求，成功则恢复 closed，失败则退避时间翻倍后重新 open。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, host_key: str, failure_threshold: int = 2,
+                 base_backoff: float = 5.0, max_backoff: float = 300.0) -> None:
+        self.host_key = host_key
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = self.CLOSED
+        self.failures = 0
+        self.backoff = base_backoff
+        self.open_until = 0.0
+        self.last_error: Optional[str] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """调用前检查，熔断中时抛出 CircuitOpenError
+
+        Raises:
+            CircuitOpenError: 主机处于 open 状态，或 half_open 状态下已有试探请求
+        """
+        if self.state == self.CLOSED:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now >= self.open_until:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            if self.state == self.CLOSED:
+                return
+            raise CircuitOpenError(self.host_key, self.last_error, max(0.0, self.open_until - now))
+
+    def record_success(self) -> None:
+        """调用成功（主机可达），恢复 closed"""
+        if self.state == self.CLOSED and not self.failures:
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                logging.getLogger(__name__).info(f"Circuit closed for {self.host_key}")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.backoff = self.base_backoff
+            self._trial_in_flight = False
+
+    def record_failure(self, error: str) -> None:
+        """调用失败（主机不可达），累计失败次数并在需要时熔断
+
+        Args:
+            error: 错误信息，熔断期间作为缓存错误返回
+        """
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if self.state == self.HALF_OPEN:
+                # 试探失败，退避时间翻倍
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+                self._open()
+            elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def get_state(self) -> Dict[str, Any]:
+        """获取熔断器状态"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'retry_after': max(0.0, self.open_until - time.monotonic()) if self.state == self.OPEN else 0.0,
+                'last_error': self.last_error
+            }
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.open_until = time.monotonic() + self.backoff
+        self._trial_in_flight = False
+        logging.getLogger(__name__).warning(
+            f"Circuit opened for {self.host_key} for {self.backoff:.0f}s: {self.last_error}"
+        )
+
+class CircuitBreakerRegistry:
+    """按 ip:port 管理所有主机的熔断器"""
+
+    def __init__(self, failure_threshold: int = 2, base_backoff: float = 5.0,
+                 max_backoff: float = 300.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host_key: str) -> CircuitBreaker:
+        """获取主机的熔断器，不存在时创建
+
+        Args:
+            host_key: 主机标识 (ip:port)
+
+        Returns:
+            CircuitBreaker: 熔断器
+        """
+        breaker = self._breakers.get(host_key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(host_key)
+                if breaker is None:
+                    breaker = CircuitBreaker(
+                        host_key,
+                        failure_threshold=self.failure_threshold,
+                        base_backoff=self.base_backoff,
+                        max_backoff=self.max_backoff
+                    )
+                    self._breakers[host_key] = breaker
+        return breaker
+
+    def get_states(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有熔断器状态"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.host_key: breaker.get_state() for breaker in breakers}
+
+_registry: Optional[CircuitBreakerRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """获取进程级共享熔断器注册表，首次调用时按 config/app.yaml 创建
+
+    Returns:
+        CircuitBreakerRegistry: 共享熔断器注册表
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                options = load_app_config().get('circuit_breaker') or {}
+                _registry = CircuitBreakerRegistry(
+                    failure_threshold=int(options.get('failure_threshold', 2)),
+                    base_backoff=float(options.get('base_backoff', 5)),
+                    max_backoff=float(options.get('max_backoff', 300))
+                )
+    return _registry
@@ -0,0 +1,225 @@
+from typing import Dict, Deque, Tuple, Any, Optional
+from collections import deque
+import http.client
+import logging
+import selectors
+import threading
+import time
+
+from ..utils.config import load_app_config
+
+
+class ConnectionPool:
+    """按 ip:port 维护的进程级 HTTP keep-alive 连接池
+
+    连接在请求期间被借出，请求完成后归还；空闲连接超过 idle_timeout
+    或者被对端关闭时会被淘汰。所有操作都是线程安全的。
+    """
+
+    def __init__(self, max_size: int = 4, idle_timeout: float = 60.0) -> None:
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.logger = logging.getLogger(__name__)
+        self._idle: Dict[str, Deque[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+        self._bad_hosts = set()
+        self._last_sweep = time.monotonic()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'discards': 0}
+
+    def acquire(self, host_key: str, timeout: float) -> http.client.HTTPConnection:
+        """借出一个到指定主机的连接，没有可用的空闲连接时新建
+
+        Args:
+            host_key: 主机标识 (ip:port)
+            timeout: socket 超时时间（秒）
+
+        Returns:
+            http.client.HTTPConnection: 可用的连接
+        """
+        stale = []
+        conn = None
+        with self._lock:
+            idle = self._idle.get(host_key)
+            while idle:
+                candidate, last_used = idle.pop()
+                if self._is_healthy(candidate, last_used):
+                    conn = candidate
+                    self._stats['hits'] += 1
+                    break
+                stale.append(candidate)
+                self._stats['evictions'] += 1
+            if conn is None:
+                self._stats['misses'] += 1
+
+        for candidate in stale:
+            candidate.close()
+
+        if conn is None:
+            conn = http.client.HTTPConnection(host_key, timeout=timeout)
+        else:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+        return conn
+
+    def release(self, host_key: str, conn: http.client.HTTPConnection) -> None:
+        """归还连接；连接已关闭或空闲队列已满时直接关闭
+
+        Args:
+            host_key: 主机标识 (ip:port)
+            conn: 要归还的连接
+        """
+        if conn.sock is None:
+            return
+
+        now = time.monotonic()
+        overflow = None
+        with self._lock:
+            idle = self._idle.setdefault(host_key, deque())
+            if len(idle) < self.max_size:
+                idle.append((conn, now))
+            else:
+                overflow = conn
+        if overflow is not None:
+            overflow.close()
+
+        if now - self._last_sweep > self.idle_timeout:
+            self.evict_idle()
+
+    def discard(self, host_key: str, conn: http.client.HTTPConnection) -> None:
+        """丢弃出错的连接
+
+        Args:
+            host_key: 主机标识 (ip:port)
+            conn: 出错的连接
+        """
+        with self._lock:
+            self._stats['discards'] += 1
+        conn.close()
+
+    def mark_bad(self, host_key: str) -> None:
+        """将主机标记为可疑，同时关闭它的空闲连接
+
+        Args:
+            host_key: 主机标识 (ip:port)
+        """
+        with self._lock:
+            self._bad_hosts.add(host_key)
+        self.close_host(host_key)
+
+    def mark_good(self, host_key: str) -> None:
+        """清除主机的可疑标记
+
+        Args:
+            host_key: 主机标识 (ip:port)
+        """
+        if host_key in self._bad_hosts:
+            with self._lock:
+                self._bad_hosts.discard(host_key)
+
+    def is_bad(self, host_key: str) -> bool:
+        """主机最近一次调用是否失败
+
+        Args:
+            host_key: 主机标识 (ip:port)
+
+        Returns:
+            bool: 是否被标记为可疑
+        """
+        return host_key in self._bad_hosts
+
+    def close_host(self, host_key: str) -> None:
+        """关闭指定主机的所有空闲连接
+
+        Args:
+            host_key: 主机标识 (ip:port)
+        """
+        with self._lock:
+            idle = self._idle.pop(host_key, None)
+        for conn, _ in idle or ():
+            conn.close()
+
+    def evict_idle(self) -> int:
+        """淘汰所有超时或已失效的空闲连接
+
+        Returns:
+            int: 被淘汰的连接数
+        """
+        stale = []
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            for host_key in list(self._idle):
+                healthy = deque()
+                for conn, last_used in self._idle[host_key]:
+                    if self._is_healthy(conn, last_used):
+                        healthy.append((conn, last_used))
+                    else:
+                        stale.append(conn)
+                if healthy:
+                    self._idle[host_key] = healthy
+                else:
+                    del self._idle[host_key]
+            self._stats['evictions'] += len(stale)
+
+        for conn in stale:
+            conn.close()
+        return len(stale)
+
+    def close_all(self) -> None:
+        """关闭池中所有空闲连接"""
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for conn, _ in idle:
+                conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息
+
+        Returns:
+            Dict[str, Any]: 命中/未命中/淘汰计数以及当前空闲连接数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = sum(len(idle) for idle in self._idle.values())
+            stats['hosts'] = len(self._idle)
+            stats['bad_hosts'] = len(self._bad_hosts)
+        return stats
+
+    def _is_healthy(self, conn: http.client.HTTPConnection, last_used: float) -> bool:
+        """健康检查：未超时且对端没有关闭连接"""
+        if conn.sock is None:
+            return False
+        if time.monotonic() - last_used > self.idle_timeout:
+            return False
+        try:
+            # 空闲的 keep-alive 连接上出现可读数据意味着对端已关闭或连接状态异常；
+            # select.select 不支持 >= 1024 的文件描述符，主机较多时大部分连接都会超过
+            with selectors.DefaultSelector() as selector:
+                selector.register(conn.sock, selectors.EVENT_READ)
+                return not selector.select(0)
+        except (OSError, ValueError):
+            return False
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPool:
+    """获取进程级共享连接池，首次调用时按 config/app.yaml 创建
+
+    Returns:
+        ConnectionPool: 共享连接池
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                options = load_app_config().get('connection_pool') or {}
+                _pool = ConnectionPool(
+                    max_size=int(options.get('max_size', 4)),
+                    idle_timeout=float(options.get('idle_timeout', 60))
+                )
+    return _pool
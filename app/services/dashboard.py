@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Optional
+from collections import Counter
+from datetime import datetime
+import json
+import logging
+import threading
+
+from ..utils.config import ConfigManager
+
+# 计入异常服务的进程状态
+FAILING_STATES = ('FATAL', 'BACKOFF', 'UNKNOWN')
+
+class DashboardAggregator:
+    """集群仪表盘聚合
+
+    由主机状态和进程快照的变化增量维护各主机的贡献与全局计数，
+    并在后台预先生成序列化好的响应体；请求只读取缓存，不会访问任何 supervisor。
+    """
+
+    def __init__(self, config_manager: ConfigManager, top_n: int = 10) -> None:
+        self.config_manager = config_manager
+        self.top_n = top_n
+        self.logger = logging.getLogger(__name__)
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._state_counts: Counter = Counter()
+        self._failing_programs: Dict[str, set] = {}
+        self._online_hosts = 0
+        self._payload: Optional[bytes] = None
+        self._dirty = True
+        self._lock = threading.Lock()
+
+    def on_host_status(self, host_id: str, status: bool) -> None:
+        """主机在线状态变化"""
+        with self._lock:
+            entry = self._get_entry(host_id)
+            if entry['status'] != status:
+                self._online_hosts += (1 if status else 0) - (1 if entry['status'] else 0)
+                entry['status'] = status
+                self._dirty = True
+
+    def on_processes(self, host_id: str, processes: Optional[List[Dict[str, Any]]]) -> None:
+        """主机进程快照更新；processes 为 None 表示主机不可用，其进程不再计入"""
+        counts = Counter(process.get('statename', 'UNKNOWN') for process in processes or [])
+        failing = {process['name'] for process in processes or []
+                   if process.get('statename') in FAILING_STATES}
+        with self._lock:
+            entry = self._get_entry(host_id)
+            if entry['counts'] == counts and entry['failing'] == failing:
+                return
+            self._apply(host_id, entry, -1)
+            entry['counts'] = counts
+            entry['failing'] = failing
+            self._apply(host_id, entry, 1)
+            self._dirty = True
+
+    def refresh(self) -> None:
+        """如有变化则重新生成响应体；由后台监控在每轮检查后调用"""
+        with self._lock:
+            if not self._dirty and self._payload is not None:
+                return
+        self._rebuild()
+
+    def get_payload(self) -> bytes:
+        """获取序列化好的仪表盘响应体
+
+        Returns:
+            bytes: JSON 响应体
+        """
+        payload = self._payload
+        if payload is None:
+            self._rebuild()
+            payload = self._payload
+        return payload
+
+    def _get_entry(self, host_id: str) -> Dict[str, Any]:
+        entry = self._hosts.get(host_id)
+        if entry is None:
+            entry = {'status': False, 'counts': Counter(), 'failing': set()}
+            self._hosts[host_id] = entry
+        return entry
+
+    def _apply(self, host_id: str, entry: Dict[str, Any], sign: int) -> None:
+        """将主机的贡献加入（sign=1）或移出（sign=-1）全局计数"""
+        for statename, count in entry['counts'].items():
+            self._state_counts[statename] += sign * count
+            if self._state_counts[statename] <= 0:
+                del self._state_counts[statename]
+        for name in entry['failing']:
+            hosts = self._failing_programs.setdefault(name, set())
+            if sign > 0:
+                hosts.add(host_id)
+            else:
+                hosts.discard(host_id)
+                if not hosts:
+                    del self._failing_programs[name]
+
+    def _rebuild(self) -> None:
+        hosts_config = self.config_manager.get_all_hosts()
+        with self._lock:
+            # 移除已从配置中删除的主机的贡献
+            for host_id in [host_id for host_id in self._hosts if host_id not in hosts_config]:
+                entry = self._hosts.pop(host_id)
+                self._apply(host_id, entry, -1)
+                if entry['status']:
+                    self._online_hosts -= 1
+
+            hosts = []
+            for host_id, host in hosts_config.items():
+                entry = self._hosts.get(host_id) or {'status': False, 'counts': Counter(), 'failing': set()}
+                hosts.append({
+                    'id': host_id,
+                    'name': host.get('name', ''),
+                    'ip': host.get('ip', ''),
+                    'port': host.get('port', ''),
+                    'status': entry['status'],
+                    'running_services': entry['counts'].get('RUNNING', 0),
+                    'error_services': len(entry['failing'])
+                })
+
+            top_failing = sorted(
+                self._failing_programs.items(),
+                key=lambda item: (-len(item[1]), item[0])
+            )[:self.top_n]
+
+            data = {
+                'statistics': {
+                    'total_hosts': len(hosts_config),
+                    'online_hosts': self._online_hosts,
+                    'running_services': self._state_counts.get('RUNNING', 0),
+                    'error_services': sum(self._state_counts.get(state, 0) for state in FAILING_STATES)
+                },
+                'process_counts': dict(self._state_counts),
+                'top_failing': [
+                    {'name': name, 'host_count': len(host_ids), 'hosts': sorted(host_ids)}
+                    for name, host_ids in top_failing
+                ],
+                'hosts': hosts,
+                'generated_at': datetime.now().isoformat()
+            }
+            self._payload = json.dumps({
+                'success': True,
+                'data': data,
+                'message': 'Successfully retrieved dashboard',
+                'error': None
+            }, ensure_ascii=False).encode('utf-8')
+            self._dirty = False
@@ -0,0 +1,280 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from array import array
+import logging
+import threading
+import time
+
+from ..utils.config import ConfigManager
+
+# 进程状态编码，数组中只保存下标
+PROCESS_STATES = ('STOPPED', 'STARTING', 'RUNNING', 'BACKOFF', 'STOPPING', 'EXITED', 'FATAL', 'UNKNOWN')
+_PROCESS_CODES = {statename: code for code, statename in enumerate(PROCESS_STATES)}
+RUNNING = _PROCESS_CODES['RUNNING']
+UNKNOWN = _PROCESS_CODES['UNKNOWN']
+
+# 主机状态编码
+HOST_STATES = ('OFFLINE', 'ONLINE')
+ONLINE = 1
+
+# 状态码的最高位标记一次重启（进入 RUNNING 且 pid 与上次运行时不同）
+_RESTART_FLAG = 0x80
+_CODE_MASK = 0x7F
+
+# 单次查询允许的时间窗口和分桶数上限
+MAX_WINDOW = 30 * 86400
+MAX_BUCKETS = 1440
+
+class StateRing:
+    """定长的状态变化环形缓冲区
+
+    只在状态变化时追加一条记录：时间戳（秒，uint32）和状态码（uint8）分别存放在预分配的
+    array 中，每条记录 5 字节，容量写满后覆盖最旧的记录，内存占用在创建时就已确定。
+    """
+
+    __slots__ = ('times', 'codes', 'capacity', 'start', 'size', 'wrapped', 'last_pid')
+
+    def __init__(self, capacity: int) -> None:
+        self.times = array('I', bytes(4 * capacity))
+        self.codes = array('B', bytes(capacity))
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+        # 是否覆盖过旧记录；未覆盖时第一条记录是首次观测到的状态，不是状态变化
+        self.wrapped = False
+        # 最近一次 RUNNING 时的 pid
+        self.last_pid = 0
+
+    def last_code(self) -> Optional[int]:
+        """最近一条记录的状态码（不含重启标记），没有记录时返回 None"""
+        if not self.size:
+            return None
+        return self.codes[(self.start + self.size - 1) % self.capacity] & _CODE_MASK
+
+    def append(self, timestamp: int, code: int) -> None:
+        """追加一条记录，缓冲区已满时覆盖最旧的记录"""
+        if self.size < self.capacity:
+            position = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            position = self.start
+            self.start = (self.start + 1) % self.capacity
+            self.wrapped = True
+        self.times[position] = timestamp
+        self.codes[position] = code
+
+    def entries(self) -> Iterator[Tuple[int, int]]:
+        """按时间顺序返回 (时间戳, 状态码) 记录"""
+        for offset in range(self.size):
+            position = (self.start + offset) % self.capacity
+            yield self.times[position], self.codes[position]
+
+    def nbytes(self) -> int:
+        return self.times.itemsize * self.capacity + self.codes.itemsize * self.capacity
+
+def summarize(ring: StateRing, states: Tuple[str, ...], up_code: int, since: int, until: int,
+              buckets: int = 0) -> Dict[str, Any]:
+    """统计时间窗口内的状态分布
+
+    记录之间的状态视为保持不变；窗口开始前最后一条记录的状态延续到窗口内。
+    缓冲区中最早的记录晚于窗口开始时间时，只统计有记录覆盖的部分（covered_since）。
+
+    Args:
+        ring: 状态变化记录
+        states: 状态码对应的状态名
+        up_code: 计入可用时间的状态码
+        since: 窗口开始时间（Unix 时间戳）
+        until: 窗口结束时间（Unix 时间戳）
+        buckets: 降采样的分桶数，为 0 时不返回 timeline
+
+    Returns:
+        Dict[str, Any]: uptime（可用时间占比，没有覆盖时为 None）、restarts、changes、
+            durations（各状态的秒数）、covered_since、current；buckets 大于 0 时另有 timeline，
+            每个桶包含 start 和 uptime
+    """
+    # 把记录转换为 [start, end) 状态区间，裁剪到窗口内
+    segments: List[Tuple[int, int, int]] = []
+    restarts = changes = 0
+    previous: Optional[Tuple[int, int]] = None
+    for index, (timestamp, raw) in enumerate(ring.entries()):
+        code = raw & _CODE_MASK
+        if timestamp > since and (index or ring.wrapped):
+            changes += 1
+            if raw & _RESTART_FLAG:
+                restarts += 1
+        if previous is not None:
+            begin, end = max(previous[0], since), min(timestamp, until)
+            if begin < end:
+                segments.append((begin, end, previous[1]))
+        previous = (timestamp, code)
+    if previous is not None:
+        begin = max(previous[0], since)
+        if begin < until:
+            segments.append((begin, until, previous[1]))
+
+    durations: Dict[str, int] = {}
+    for begin, end, code in segments:
+        durations[states[code]] = durations.get(states[code], 0) + end - begin
+    covered = sum(durations.values())
+    result: Dict[str, Any] = {
+        'uptime': round(durations.get(states[up_code], 0) / covered, 4) if covered else None,
+        'restarts': restarts,
+        'changes': changes,
+        'durations': durations,
+        'covered_since': segments[0][0] if segments else None,
+        'current': states[previous[1]] if previous is not None else None
+    }
+
+    if buckets:
+        width = (until - since) / buckets
+        up = [0.0] * buckets
+        total = [0.0] * buckets
+        for begin, end, code in segments:
+            index = min(int((begin - since) / width), buckets - 1)
+            while begin < end:
+                bucket_end = min(since + (index + 1) * width, end)
+                total[index] += bucket_end - begin
+                if code == up_code:
+                    up[index] += bucket_end - begin
+                begin = bucket_end
+                index += 1
+        result['timeline'] = [
+            {
+                'start': int(since + index * width),
+                'uptime': round(up[index] / total[index], 4) if total[index] else None
+            }
+            for index in range(buckets)
+        ]
+    return result
+
+class HistoryStore:
+    """主机和进程状态的历史记录
+
+    由后台监控的主机状态和进程快照回调维护，每台主机和每个进程一个 StateRing；
+    查询时按时间窗口统计可用率、重启次数，并可降采样为固定数量的时间桶。
+    """
+
+    def __init__(self, config_manager: ConfigManager, host_capacity: int = 1024,
+                 process_capacity: int = 256) -> None:
+        self.config_manager = config_manager
+        self.host_capacity = host_capacity
+        self.process_capacity = process_capacity
+        self.logger = logging.getLogger(__name__)
+        self._hosts: Dict[str, StateRing] = {}
+        # host_id -> {进程名: StateRing}
+        self._processes: Dict[str, Dict[str, StateRing]] = {}
+        self._lock = threading.Lock()
+
+    def on_host_status(self, host_id: str, status: bool) -> None:
+        """记录主机在线状态"""
+        code = ONLINE if status else 0
+        with self._lock:
+            ring = self._hosts.get(host_id)
+            if ring is None:
+                ring = self._hosts[host_id] = StateRing(self.host_capacity)
+            if ring.last_code() != code:
+                ring.append(int(time.time()), code)
+
+    def on_processes(self, host_id: str, processes: Optional[List[Dict[str, Any]]]) -> None:
+        """记录主机的进程状态；processes 为 None 表示主机不可用，其进程记为 UNKNOWN"""
+        now = int(time.time())
+        with self._lock:
+            rings = self._processes.setdefault(host_id, {})
+            if processes is None:
+                for ring in rings.values():
+                    if ring.last_code() != UNKNOWN:
+                        ring.append(now, UNKNOWN)
+                return
+
+            seen = set()
+            for process in processes:
+                name = process.get('name')
+                if not name:
+                    continue
+                seen.add(name)
+                code = _PROCESS_CODES.get(process.get('statename'), UNKNOWN)
+                pid = process.get('pid') or 0
+                ring = rings.get(name)
+                if ring is None:
+                    ring = rings[name] = StateRing(self.process_capacity)
+                    if code == RUNNING:
+                        ring.last_pid = pid
+                    ring.append(now, code)
+                    continue
+
+                # 只比较 RUNNING 时的 pid：STARTING 阶段已经有新 pid，提前记录会漏掉这次重启
+                restarted = code == RUNNING and pid and ring.last_pid and pid != ring.last_pid
+                if restarted:
+                    ring.append(now, code | _RESTART_FLAG)
+                elif ring.last_code() != code:
+                    ring.append(now, code)
+                if code == RUNNING and pid:
+                    ring.last_pid = pid
+
+            # 已从主机上删除的进程不再保留历史
+            for name in [name for name in rings if name not in seen]:
+                del rings[name]
+
+    def refresh(self) -> None:
+        """移除已从配置中删除的主机；由后台监控在每轮检查后调用"""
+        hosts_config = self.config_manager.get_all_hosts()
+        with self._lock:
+            for host_id in [host_id for host_id in self._hosts if host_id not in hosts_config]:
+                del self._hosts[host_id]
+            for host_id in [host_id for host_id in self._processes if host_id not in hosts_config]:
+                del self._processes[host_id]
+
+    def host_history(self, host_id: str, window: int, buckets: int = 0) -> Optional[Dict[str, Any]]:
+        """查询主机在时间窗口内的在线率
+
+        Args:
+            host_id: 主机ID
+            window: 时间窗口（秒），到当前时间为止
+            buckets: 降采样的分桶数
+
+        Returns:
+            Optional[Dict[str, Any]]: 统计结果，见 summarize；没有记录时返回 None
+        """
+        until = int(time.time())
+        with self._lock:
+            ring = self._hosts.get(host_id)
+            if ring is None:
+                return None
+            return summarize(ring, HOST_STATES, ONLINE, until - window, until, buckets)
+
+    def process_history(self, host_id: str, name: Optional[str], window: int,
+                        buckets: int = 0) -> Optional[List[Dict[str, Any]]]:
+        """查询主机上进程在时间窗口内的运行率和重启次数
+
+        Args:
+            host_id: 主机ID
+            name: 进程名，为 None 时返回该主机所有进程（按重启次数降序）
+            window: 时间窗口（秒），到当前时间为止
+            buckets: 降采样的分桶数
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 每个进程的统计结果（见 summarize）并带 name；
+                主机或指定的进程没有记录时返回 None
+        """
+        until = int(time.time())
+        with self._lock:
+            rings = self._processes.get(host_id)
+            if rings is None or (name is not None and name not in rings):
+                return None
+            selected = {name: rings[name]} if name is not None else rings
+            results = [
+                {'name': process_name, **summarize(ring, PROCESS_STATES, RUNNING, until - window, until, buckets)}
+                for process_name, ring in selected.items()
+            ]
+        results.sort(key=lambda result: (-result['restarts'], result['name']))
+        return results
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取历史记录的规模和预分配的内存字节数"""
+        with self._lock:
+            process_rings = [ring for rings in self._processes.values() for ring in rings.values()]
+            return {
+                'hosts': len(self._hosts),
+                'processes': len(process_rings),
+                'bytes': sum(ring.nbytes() for ring in self._hosts.values())
+                         + sum(ring.nbytes() for ring in process_rings)
+            }
@@ -0,0 +1,146 @@
+from typing import Dict, Set, Tuple, TYPE_CHECKING
+import logging
+import threading
+
+from ..utils.sse import Subscriber
+from .supervisor_service import DEFAULT_TAIL_LENGTH
+
+if TYPE_CHECKING:
+    from .supervisor_service import SupervisorService
+
+StreamKey = Tuple[str, str, str]
+
+class _LogTailer(threading.Thread):
+    """单个 (主机, 进程, 日志类型) 的上游增量读取循环
+
+    无论有多少订阅者，每个 key 只有一个 tailer 轮询 supervisor，
+    新内容广播给所有订阅者；没有订阅者时线程退出。
+    """
+
+    def __init__(self, hub: 'LogStreamHub', key: StreamKey) -> None:
+        super().__init__(name=f"log-tail-{key[0]}-{key[1]}", daemon=True)
+        self.hub = hub
+        self.key = key
+        self.subscribers: Set[Subscriber] = set()
+        self.offset = 0
+        self.recent = ''
+        self.primed = False
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        host_id, process_name, log_type = self.key
+        interval = self.hub.poll_interval
+        while not self._stop_event.is_set():
+            try:
+                tail = self.hub.supervisor_service.tail_process_log(
+                    host_id, process_name, log_type, self.offset, DEFAULT_TAIL_LENGTH
+                )
+                interval = self.hub.poll_interval
+            except Exception as e:
+                self.hub.broadcast(self, 'error', {'error': str(e)})
+                # 出错时退避，避免对故障主机高频重试
+                interval = min(interval * 2, self.hub.max_backoff)
+                self._stop_event.wait(interval)
+                continue
+
+            rotated = tail['offset'] < self.offset
+            self.offset = tail['offset']
+            if not self.primed:
+                self.hub.prime(self, tail['content'])
+            elif tail['overflow'] or rotated:
+                self.hub.publish(self, 'snapshot', tail['content'], replace=True)
+            elif tail['content']:
+                self.hub.publish(self, 'log', tail['content'])
+
+            self._stop_event.wait(interval)
+
+class LogStreamHub:
+    """日志实时推送中心
+
+    管理所有订阅者和上游 tailer；多个浏览器关注同一进程日志时只产生一路上游轮询。
+    """
+
+    def __init__(self, supervisor_service: 'SupervisorService', poll_interval: float = 1.0,
+                 max_buffer: int = 256, max_backoff: float = 30.0,
+                 max_recent: int = DEFAULT_TAIL_LENGTH) -> None:
+        self.supervisor_service = supervisor_service
+        self.poll_interval = poll_interval
+        self.max_buffer = max_buffer
+        self.max_backoff = max_backoff
+        self.max_recent = max_recent
+        self.logger = logging.getLogger(__name__)
+        self._tailers: Dict[StreamKey, _LogTailer] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, host_id: str, process_name: str, log_type: str = 'stdout') -> Subscriber:
+        """订阅进程日志
+
+        订阅者收到的第一个事件是 snapshot（日志末尾内容），之后是增量 log 事件。
+
+        Args:
+            host_id: 主机ID
+            process_name: 进程名称
+            log_type: 日志类型 (stdout/stderr)
+
+        Returns:
+            Subscriber: 订阅者，使用完后需调用 unsubscribe
+        """
+        key = (host_id, process_name, log_type)
+        subscriber = Subscriber(self.max_buffer, key=key)
+        with self._lock:
+            tailer = self._tailers.get(key)
+            if tailer is None:
+                tailer = _LogTailer(self, key)
+                self._tailers[key] = tailer
+                tailer.start()
+                self.logger.info(f"Started log tailer for {key}")
+            elif tailer.primed:
+                subscriber.put('snapshot', {'content': tailer.recent})
+            tailer.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """取消订阅；最后一个订阅者离开时停止上游 tailer"""
+        subscriber.close()
+        with self._lock:
+            tailer = self._tailers.get(subscriber.key)
+            if tailer is None:
+                return
+            tailer.subscribers.discard(subscriber)
+            if not tailer.subscribers:
+                tailer.stop()
+                del self._tailers[subscriber.key]
+                self.logger.info(f"Stopped log tailer for {subscriber.key}")
+
+    def prime(self, tailer: _LogTailer, content: str) -> None:
+        """tailer 首次读取完成，向所有订阅者发送初始快照"""
+        with self._lock:
+            tailer.primed = True
+            tailer.recent = content[-self.max_recent:]
+            for subscriber in tailer.subscribers:
+                subscriber.put('snapshot', {'content': tailer.recent})
+
+    def publish(self, tailer: _LogTailer, event: str, content: str, replace: bool = False) -> None:
+        """广播日志内容并维护用于新订阅者的最近内容"""
+        with self._lock:
+            tailer.recent = content if replace else tailer.recent + content
+            tailer.recent = tailer.recent[-self.max_recent:]
+            for subscriber in tailer.subscribers:
+                subscriber.put(event, {'content': content})
+
+    def broadcast(self, tailer: _LogTailer, event: str, data: Dict) -> None:
+        """向 tailer 的所有订阅者广播事件"""
+        with self._lock:
+            for subscriber in tailer.subscribers:
+                subscriber.put(event, data)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取当前的上游 tailer 数和订阅者数"""
+        with self._lock:
+            return {
+                'tailers': len(self._tailers),
+                'subscribers': sum(len(t.subscribers) for t in self._tailers.values())
+            }
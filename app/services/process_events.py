@@ -0,0 +1,157 @@
+from typing import Any, Dict, List, Set, Tuple, Optional, TYPE_CHECKING
+import logging
+import threading
+
+from ..utils.sse import Subscriber
+
+if TYPE_CHECKING:
+    from .supervisor_service import SupervisorService
+
+# 判断进程是否发生变化时比较的字段；description 包含运行时长，每次都会变化，不参与比较
+STATE_FIELDS = ('statename', 'state', 'pid')
+
+def diff_processes(previous: Dict[str, Dict[str, Any]],
+                   current: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """比较两次进程快照
+
+    Args:
+        previous: 上一次快照，进程名到进程信息的映射
+        current: 本次获取的进程列表
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[str]]: (新增或状态变化的进程, 已消失的进程名)
+    """
+    changed = []
+    seen = set()
+    for process in current:
+        name = process['name']
+        seen.add(name)
+        old = previous.get(name)
+        if old is None or any(old.get(field) != process.get(field) for field in STATE_FIELDS):
+            changed.append(process)
+    removed = [name for name in previous if name not in seen]
+    return changed, removed
+
+class _HostWatcher(threading.Thread):
+    """单个主机的进程状态监视循环，只把变化的进程推送给订阅者"""
+
+    def __init__(self, feed: 'ProcessStateFeed', host_id: str) -> None:
+        super().__init__(name=f"process-watch-{host_id}", daemon=True)
+        self.feed = feed
+        self.host_id = host_id
+        self.subscribers: Set[Subscriber] = set()
+        self.snapshot: Optional[Dict[str, Dict[str, Any]]] = None
+        self.version = 0
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        interval = self.feed.poll_interval
+        while not self._stop_event.is_set():
+            try:
+                processes = self.feed.supervisor_service.fetch_processes(self.host_id)
+                interval = self.feed.poll_interval
+            except Exception as e:
+                self.feed.broadcast(self, 'error', {'error': str(e)})
+                # 出错时退避，避免对故障主机高频重试
+                interval = min(interval * 2, self.feed.max_backoff)
+                self._stop_event.wait(interval)
+                continue
+
+            self.feed.apply_snapshot(self, processes)
+            self._stop_event.wait(interval)
+
+class ProcessStateFeed:
+    """进程状态变化推送
+
+    每个被关注的主机只有一个监视循环，定期获取 getAllProcessInfo 并与上一次快照比较，
+    只把状态变化的进程推送给订阅者；没有订阅者时监视循环退出。
+    """
+
+    def __init__(self, supervisor_service: 'SupervisorService', poll_interval: float = 2.0,
+                 max_buffer: int = 256, max_backoff: float = 30.0) -> None:
+        self.supervisor_service = supervisor_service
+        self.poll_interval = poll_interval
+        self.max_buffer = max_buffer
+        self.max_backoff = max_backoff
+        self.logger = logging.getLogger(__name__)
+        self._watchers: Dict[str, _HostWatcher] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, host_id: str) -> Subscriber:
+        """订阅主机的进程状态变化
+
+        订阅者收到的第一个事件是 snapshot（完整进程列表），之后是 changed 事件，
+        其中 processes 为状态变化的进程，removed 为已消失的进程名。
+
+        Args:
+            host_id: 主机ID
+
+        Returns:
+            Subscriber: 订阅者，使用完后需调用 unsubscribe
+        """
+        subscriber = Subscriber(self.max_buffer, key=host_id)
+        with self._lock:
+            watcher = self._watchers.get(host_id)
+            if watcher is None:
+                watcher = _HostWatcher(self, host_id)
+                self._watchers[host_id] = watcher
+                watcher.start()
+                self.logger.info(f"Started process watcher for host {host_id}")
+            elif watcher.snapshot is not None:
+                subscriber.put('snapshot', {
+                    'version': watcher.version,
+                    'processes': list(watcher.snapshot.values())
+                })
+            watcher.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """取消订阅；最后一个订阅者离开时停止监视循环"""
+        subscriber.close()
+        with self._lock:
+            watcher = self._watchers.get(subscriber.key)
+            if watcher is None:
+                return
+            watcher.subscribers.discard(subscriber)
+            if not watcher.subscribers:
+                watcher.stop()
+                del self._watchers[subscriber.key]
+                self.logger.info(f"Stopped process watcher for host {subscriber.key}")
+
+    def apply_snapshot(self, watcher: _HostWatcher, processes: List[Dict[str, Any]]) -> None:
+        """与上一次快照比较并推送变化"""
+        with self._lock:
+            first = watcher.snapshot is None
+            changed, removed = diff_processes(watcher.snapshot or {}, processes)
+            watcher.snapshot = {process['name']: process for process in processes}
+            if not first and not changed and not removed:
+                return
+
+            watcher.version += 1
+            if first:
+                event, data = 'snapshot', {'version': watcher.version, 'processes': processes}
+            else:
+                event, data = 'changed', {
+                    'version': watcher.version,
+                    'processes': changed,
+                    'removed': removed
+                }
+            for subscriber in watcher.subscribers:
+                subscriber.put(event, data)
+
+    def broadcast(self, watcher: _HostWatcher, event: str, data: Dict[str, Any]) -> None:
+        """向监视循环的所有订阅者广播事件"""
+        with self._lock:
+            for subscriber in watcher.subscribers:
+                subscriber.put(event, data)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取当前的监视主机数和订阅者数"""
+        with self._lock:
+            return {
+                'watchers': len(self._watchers),
+                'subscribers': sum(len(w.subscribers) for w in self._watchers.values())
+            }
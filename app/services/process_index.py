@@ -0,0 +1,196 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from bisect import bisect_left, bisect_right, insort
+from fnmatch import translate
+import logging
+import re
+import threading
+
+from ..utils.config import ConfigManager
+
+# 查询中出现这些字符时按 glob 匹配，否则按前缀匹配
+GLOB_CHARS = '*?['
+
+# 搜索结果支持的字段
+SEARCH_FIELDS = ('name', 'statename', 'pid', 'description', 'host_id', 'host_name', 'host_available')
+
+class ProcessIndex:
+    """跨主机的进程倒排索引
+
+    由后台进程快照增量维护：进程名（小写）→ 运行它的主机，进程状态 → (进程名, 主机)。
+    进程名另外保存一份有序列表，前缀和 glob 查询先用二分查找缩小到字面前缀的范围，
+    查询只读内存，不会访问任何 supervisor。
+    """
+
+    def __init__(self, config_manager: ConfigManager) -> None:
+        self.config_manager = config_manager
+        self.logger = logging.getLogger(__name__)
+        # host_id -> {小写进程名: 进程信息}
+        self._hosts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # 小写进程名 -> {host_id: 进程信息}
+        self._by_name: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # 进程状态 -> {(小写进程名, host_id)}
+        self._by_state: Dict[str, Set[Tuple[str, str]]] = {}
+        self._names: List[str] = []
+        self._unavailable: Set[str] = set()
+        self._host_names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def on_processes(self, host_id: str, processes: Optional[List[Dict[str, Any]]]) -> None:
+        """主机进程快照更新；processes 为 None 表示主机不可用，保留其最后一次的进程并标记不可用"""
+        with self._lock:
+            if processes is None:
+                self._unavailable.add(host_id)
+                return
+            self._unavailable.discard(host_id)
+
+            entries = {}
+            for process in processes:
+                name = process.get('name')
+                if not name:
+                    continue
+                entries[name.lower()] = {
+                    'name': name,
+                    'statename': process.get('statename', 'UNKNOWN'),
+                    'pid': process.get('pid', 0),
+                    'description': process.get('description', '')
+                }
+
+            # description 包含运行时长，每次快照都会变化；只有进程增减和状态变化需要修改索引，
+            # 其余字段原地更新（_by_name 与 _hosts 引用同一个条目）
+            current = self._hosts.setdefault(host_id, {})
+            for key in [key for key in current if key not in entries]:
+                self._remove_entry(host_id, key, current.pop(key))
+            for key, process in entries.items():
+                entry = current.get(key)
+                if entry is None:
+                    current[key] = process
+                    self._add_entry(host_id, key, process)
+                    continue
+                if entry['statename'] != process['statename']:
+                    self._discard_state(host_id, key, entry['statename'])
+                    self._by_state.setdefault(process['statename'], set()).add((key, host_id))
+                entry.update(process)
+
+    def refresh(self) -> None:
+        """同步主机名并移除已从配置中删除的主机；由后台监控在每轮检查后调用"""
+        hosts_config = self.config_manager.get_all_hosts()
+        with self._lock:
+            for host_id in [host_id for host_id in self._hosts if host_id not in hosts_config]:
+                for key, entry in self._hosts.pop(host_id).items():
+                    self._remove_entry(host_id, key, entry)
+                self._unavailable.discard(host_id)
+            self._host_names = {host_id: host.get('name', '') for host_id, host in hosts_config.items()}
+
+    def search(self, query: Optional[str] = None, statenames: Optional[Iterable[str]] = None,
+               limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """搜索进程
+
+        结果按 (小写进程名, 主机ID) 排序并按键集分页，只为本页的条目生成返回值。
+
+        Args:
+            query: 进程名前缀；包含 * ? [ 时按 glob 匹配整个进程名，大小写不敏感
+            statenames: 只返回这些状态的进程
+            limit: 每页条目数，为 None 时返回全部
+            cursor: 上一页返回的 next_cursor
+
+        Returns:
+            Dict[str, Any]: processes 为本页进程，每项包含 name、statename、pid、description、
+                host_id、host_name、host_available；next_cursor 为下一页游标，没有下一页时为 None；
+                total 和 hosts 为匹配的进程数和主机数
+
+        Raises:
+            ValueError: query 和 statenames 都为空，或游标格式错误
+        """
+        if not query and not statenames:
+            raise ValueError("Either q or statename is required")
+        states = {state.upper() for state in statenames} if statenames else None
+        after = None
+        if cursor is not None:
+            key, separator, host_id = cursor.rpartition('@')
+            if not separator:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            after = (key, host_id)
+
+        with self._lock:
+            if query:
+                matches = [
+                    (key, host_id)
+                    for key in self._match_names(query.lower())
+                    for host_id, entry in self._by_name[key].items()
+                    if states is None or entry['statename'] in states
+                ]
+            else:
+                matches = [match for state in states for match in self._by_state.get(state, ())]
+            matches.sort()
+
+            start = bisect_right(matches, after) if after is not None else 0
+            end = len(matches) if limit is None else start + limit
+            processes = [
+                {
+                    **self._by_name[key][host_id],
+                    'host_id': host_id,
+                    'host_name': self._host_names.get(host_id, ''),
+                    'host_available': host_id not in self._unavailable
+                }
+                for key, host_id in matches[start:end]
+            ]
+            next_cursor = None
+            if end < len(matches) and processes:
+                key, host_id = matches[end - 1]
+                next_cursor = f"{key}@{host_id}"
+            return {
+                'processes': processes,
+                'next_cursor': next_cursor,
+                'total': len(matches),
+                'hosts': len({host_id for _, host_id in matches})
+            }
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取索引规模"""
+        with self._lock:
+            return {
+                'hosts': len(self._hosts),
+                'names': len(self._names),
+                'processes': sum(len(entries) for entries in self._hosts.values())
+            }
+
+    def _match_names(self, query: str) -> List[str]:
+        """返回匹配查询的小写进程名，调用方需持有锁"""
+        glob_at = min((query.find(char) for char in GLOB_CHARS if char in query), default=-1)
+        prefix = query if glob_at < 0 else query[:glob_at]
+
+        names = self._names
+        position = bisect_left(names, prefix)
+        candidates = []
+        while position < len(names) and names[position].startswith(prefix):
+            candidates.append(names[position])
+            position += 1
+        if glob_at < 0:
+            return candidates
+
+        pattern = re.compile(translate(query))
+        return [key for key in candidates if pattern.match(key)]
+
+    def _add_entry(self, host_id: str, key: str, entry: Dict[str, Any]) -> None:
+        hosts = self._by_name.get(key)
+        if hosts is None:
+            hosts = self._by_name[key] = {}
+            insort(self._names, key)
+        hosts[host_id] = entry
+        self._by_state.setdefault(entry['statename'], set()).add((key, host_id))
+
+    def _remove_entry(self, host_id: str, key: str, entry: Dict[str, Any]) -> None:
+        hosts = self._by_name.get(key)
+        if hosts is not None and hosts.pop(host_id, None) is not None and not hosts:
+            del self._by_name[key]
+            position = bisect_left(self._names, key)
+            if position < len(self._names) and self._names[position] == key:
+                del self._names[position]
+        self._discard_state(host_id, key, entry['statename'])
+
+    def _discard_state(self, host_id: str, key: str, statename: str) -> None:
+        members = self._by_state.get(statename)
+        if members is not None:
+            members.discard((key, host_id))
+            if not members:
+                del self._by_state[statename]
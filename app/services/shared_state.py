@@ -0,0 +1,488 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，无法使用共享模式
+    fcntl = None
+
+from ..utils.hash_ring import HashRing
+from ..utils.monitor import HostMonitor
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS host_status (
+    host_id TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    last_check REAL NOT NULL,
+    last_change REAL NOT NULL,
+    seq INTEGER NOT NULL,
+    node_id TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_host_status_seq ON host_status (seq);
+CREATE TABLE IF NOT EXISTS snapshots (
+    host_id TEXT PRIMARY KEY,
+    processes TEXT NOT NULL,
+    updated_at REAL,
+    error TEXT,
+    seq INTEGER NOT NULL,
+    node_id TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_seq ON snapshots (seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    node_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    heartbeat REAL NOT NULL,
+    term INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('seq', 0);
+'''
+
+# (host_id, status, last_check, last_change)
+StatusRow = Tuple[str, int, float, float]
+# (host_id, 进程列表 JSON，主机不可用时为 None 表示保留上一份, updated_at, error)
+SnapshotRow = Tuple[str, Optional[str], Optional[float], Optional[str]]
+
+ROLES = ('auto', 'reader')
+
+class SharedStateStore:
+    """采集结果的共享存储（SQLite）
+
+    采集进程把主机状态和进程快照写入，其他 worker 进程按 seq 增量读取：每个写事务递增
+    meta.seq 并记在变化的行上。nodes 表按节点保存采集进程的 pid、心跳和 term，节点内新的采集进程
+    接管时递增该节点的 term，同一节点的读取方发现 term 变化后全量重新加载。
+    分片模式下多个节点写入同一个文件，每行记录写入的节点。
+    WAL 的索引在共享内存中，只适用于同一台机器上的进程；多台机器通过共享磁盘访问时使用回滚日志（DELETE）。
+    连接在第一次使用的线程中创建，只能在该线程中使用。
+    """
+
+    def __init__(self, path: str, journal_mode: str = 'WAL') -> None:
+        self.path = path
+        self.journal_mode = journal_mode.upper()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # 自动提交模式，写事务显式 BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute(f'PRAGMA journal_mode={self.journal_mode}')
+            # 回滚日志模式下 NORMAL 不能保证掉电后数据库完整
+            conn.execute(f"PRAGMA synchronous={'NORMAL' if self.journal_mode == 'WAL' else 'FULL'}")
+            conn.executescript(_SCHEMA)
+            for table, column, definition in (('host_status', 'node_id', "TEXT NOT NULL DEFAULT ''"),
+                                              ('snapshots', 'node_id', "TEXT NOT NULL DEFAULT ''"),
+                                              ('nodes', 'term', 'INTEGER NOT NULL DEFAULT 0')):
+                columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def read_state(self, node_id: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """读取当前 seq 和节点的采集进程信息
+
+        Returns:
+            Tuple: (seq, 节点信息)；节点信息包含 pid、heartbeat（最近一次写入的 Unix 时间）和 term，
+                   节点没有采集进程时为 None
+        """
+        conn = self._connect()
+        seq = conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        row = conn.execute('SELECT pid, heartbeat, term FROM nodes WHERE node_id = ?', (node_id,)).fetchone()
+        node = {'pid': row[0], 'heartbeat': row[1], 'term': row[2]} if row else None
+        return int(seq[0]) if seq else 0, node
+
+    def begin_term(self, node_id: str, pid: int) -> int:
+        """开始节点新的采集任期
+
+        Args:
+            node_id: 节点标识
+            pid: 采集进程的 pid
+
+        Returns:
+            int: 该节点新的 term
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT INTO nodes (node_id, pid, heartbeat, term) VALUES (?, ?, ?, 1) '
+                'ON CONFLICT (node_id) DO UPDATE SET pid = excluded.pid, heartbeat = excluded.heartbeat, '
+                'term = term + 1',
+                (node_id, pid, time.time())
+            )
+            term = conn.execute('SELECT term FROM nodes WHERE node_id = ?', (node_id,)).fetchone()[0]
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return int(term)
+
+    def publish(self, statuses: Iterable[StatusRow], snapshots: Iterable[SnapshotRow],
+                removed: Iterable[str] = (), node_id: str = '') -> int:
+        """在一个事务中写入变化的主机状态和快照，并更新节点的心跳
+
+        Args:
+            statuses: 变化的主机状态
+            snapshots: 变化的进程快照
+            removed: 已从配置中删除的主机
+            node_id: 写入的节点
+
+        Returns:
+            int: 本次写入的 seq
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            seq = int(conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()[0]) + 1
+            conn.executemany(
+                'INSERT INTO host_status (host_id, status, last_check, last_change, seq, node_id) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (host_id) DO UPDATE SET status = excluded.status, last_check = excluded.last_check, '
+                'last_change = excluded.last_change, seq = excluded.seq, node_id = excluded.node_id',
+                [row + (seq, node_id) for row in statuses]
+            )
+            for host_id, processes, updated_at, error in snapshots:
+                if processes is None:
+                    # 主机不可用：保留上一份进程列表，只更新错误信息
+                    conn.execute(
+                        'INSERT INTO snapshots (host_id, processes, updated_at, error, seq, node_id) '
+                        "VALUES (?, '[]', NULL, ?, ?, ?) "
+                        'ON CONFLICT (host_id) DO UPDATE SET error = excluded.error, seq = excluded.seq, '
+                        'node_id = excluded.node_id',
+                        (host_id, error, seq, node_id)
+                    )
+                else:
+                    conn.execute(
+                        'INSERT INTO snapshots (host_id, processes, updated_at, error, seq, node_id) '
+                        'VALUES (?, ?, ?, ?, ?, ?) '
+                        'ON CONFLICT (host_id) DO UPDATE SET processes = excluded.processes, '
+                        'updated_at = excluded.updated_at, error = excluded.error, seq = excluded.seq, '
+                        'node_id = excluded.node_id',
+                        (host_id, processes, updated_at, error, seq, node_id)
+                    )
+            for host_id in removed:
+                conn.execute('DELETE FROM host_status WHERE host_id = ?', (host_id,))
+                conn.execute('DELETE FROM snapshots WHERE host_id = ?', (host_id,))
+            now = time.time()
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'seq'", (seq,))
+            conn.execute(
+                'INSERT INTO nodes (node_id, pid, heartbeat) VALUES (?, ?, ?) '
+                'ON CONFLICT (node_id) DO UPDATE SET pid = excluded.pid, heartbeat = excluded.heartbeat',
+                (node_id, os.getpid(), now)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return seq
+
+    def live_nodes(self, timeout: float) -> List[str]:
+        """获取 timeout 秒内有心跳的节点"""
+        rows = self._connect().execute(
+            'SELECT node_id FROM nodes WHERE heartbeat >= ? ORDER BY node_id', (time.time() - timeout,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def leave(self, node_id: str) -> None:
+        """清除节点的心跳，其他节点在下一次检查时重新分配它的主机；保留 term，下一任采集进程在其上递增"""
+        self._connect().execute('UPDATE nodes SET heartbeat = 0 WHERE node_id = ?', (node_id,))
+
+    def read_changes(self, since: int, exclude_node: Optional[str] = None) -> Tuple[
+            int, List[StatusRow], List[Tuple[str, str, Optional[float], Optional[str]]]]:
+        """读取 seq 大于 since 的主机状态和快照
+
+        Args:
+            since: 上次读取到的 seq
+            exclude_node: 不读取该节点写入的行
+
+        Returns:
+            Tuple: (当前 seq, [(host_id, status, last_check, last_change)],
+                    [(host_id, 进程列表 JSON, updated_at, error)])
+        """
+        conn = self._connect()
+        # 同一个读事务内读取 seq 和两张表，得到一致的视图
+        conn.execute('BEGIN')
+        try:
+            seq = int(conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()[0])
+            # node_id 不可能为 NULL，exclude_node 为 None 时不排除任何行
+            statuses = conn.execute(
+                'SELECT host_id, status, last_check, last_change FROM host_status '
+                'WHERE seq > ? AND node_id IS NOT ?', (since, exclude_node)
+            ).fetchall()
+            snapshots = conn.execute(
+                'SELECT host_id, processes, updated_at, error FROM snapshots '
+                'WHERE seq > ? AND node_id IS NOT ?', (since, exclude_node)
+            ).fetchall()
+        finally:
+            conn.execute('COMMIT')
+        return seq, statuses, snapshots
+
+class WorkerCoordinator:
+    """多 worker 部署下的后台采集协调
+
+    所有 worker 竞争同一个文件锁（fcntl.flock），持有锁的进程运行 HostMonitor，并每隔
+    poll_interval 把变化的主机状态和进程快照发布到 SharedStateStore；其他进程不访问 supervisor，
+    只把共享状态回放到本地的 HostMonitor，仪表盘、索引和历史记录照常由监控回调维护。
+    持锁进程退出后锁由操作系统释放，下一个尝试加锁的进程接管采集，因此探测负载与 worker 数量无关。
+
+    分片模式下多个节点（各自的采集进程）共用一个放在共享磁盘上的 SharedStateStore：采集进程
+    在 nodes 表中维持心跳，按存活节点构建一致性哈希环，只采集归属本节点的主机，同时回放其他节点
+    写入的行，因此每个节点都能用合并后的完整视图回答查询。节点离开或心跳超时后，
+    其他节点在下一次检查时重建哈希环并接管它的主机。
+    """
+
+    def __init__(self, monitor: HostMonitor, store: SharedStateStore, lock_path: str,
+                 role: str = 'auto', poll_interval: float = 1.0, node_id: str = '',
+                 sharding: bool = False, virtual_nodes: int = 64, node_timeout: float = 15.0) -> None:
+        if fcntl is None:
+            raise RuntimeError('Shared worker mode requires fcntl (POSIX)')
+        if role not in ROLES:
+            raise ValueError(f"Invalid worker role: {role}, expected one of {', '.join(ROLES)}")
+        self.monitor = monitor
+        self.store = store
+        self.lock_path = lock_path
+        self.role = role
+        self.poll_interval = poll_interval
+        self.node_id = node_id
+        self.sharding = sharding
+        self.virtual_nodes = virtual_nodes
+        self.node_timeout = max(node_timeout, poll_interval * 3)
+        self.ring = HashRing([node_id], virtual_nodes)
+        # 心跳超过这个时间没有更新时，认为共享状态已停止更新
+        self.stale_after = max(poll_interval * 5, 10.0)
+        self.logger = logging.getLogger(__name__)
+
+        self.leader = False
+        self.term = 0
+        # 回放共享状态的读取位置，与本进程发布的 seq 分开记录
+        self.read_seq = 0
+        self.published_seq = 0
+        self.heartbeat: Optional[float] = None
+        self._pending_status: Set[str] = set()
+        self._pending_snapshots: Set[str] = set()
+        self._published: Set[str] = set()
+        self._pending_lock = threading.Lock()
+        self._lock_file = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        monitor.add_status_listener(self._on_status)
+        monitor.process_snapshots.add_listener(self._on_processes)
+
+    def start(self) -> None:
+        """启动协调线程"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='worker-coordinator', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止协调线程；持有锁时停止采集并释放锁"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.leader:
+            self.monitor.stop_monitoring()
+            self.leader = False
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取本进程的角色和共享状态的同步进度"""
+        return {
+            'role': self.role,
+            'leader': self.leader,
+            'pid': os.getpid(),
+            'node_id': self.node_id,
+            'nodes': list(self.ring.nodes) if self.sharding else None,
+            'term': self.term,
+            'read_seq': self.read_seq,
+            'published_seq': self.published_seq,
+            'heartbeat_age': round(time.time() - self.heartbeat, 3) if self.heartbeat else None
+        }
+
+    def collect_metrics(self):
+        """导出本进程是否负责采集以及共享状态的延迟，作为 MetricsRegistry 的采集回调"""
+        heartbeat = self.heartbeat
+        yield 'supernova_worker_leader', 'gauge', 'Whether this worker owns background collection', [
+            ({}, 1 if self.leader else 0)
+        ]
+        if heartbeat:
+            yield 'supernova_shared_state_age_seconds', 'gauge', 'Seconds since the collector last published', [
+                ({}, round(time.time() - heartbeat, 3))
+            ]
+
+    def owns(self, host_id: str) -> bool:
+        """主机是否归属本节点；未启用分片时总是 True"""
+        return not self.sharding or self.ring.owner(host_id) == self.node_id
+
+    def _on_status(self, host_id: str, status: bool) -> None:
+        # 只发布本节点负责的主机，从其他节点回放的变化不再写回
+        if self.leader and self.owns(host_id):
+            with self._pending_lock:
+                self._pending_status.add(host_id)
+
+    def _on_processes(self, host_id: str, processes: Optional[List[Dict[str, Any]]]) -> None:
+        if self.leader and self.owns(host_id):
+            with self._pending_lock:
+                self._pending_snapshots.add(host_id)
+
+    def _try_lock(self) -> bool:
+        """尝试以非阻塞方式获取采集锁"""
+        if self.role != 'auto':
+            return False
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        # 写入 pid 便于排查当前由哪个进程采集
+        self._lock_file.seek(0)
+        self._lock_file.truncate()
+        self._lock_file.write(f"{os.getpid()}\n")
+        self._lock_file.flush()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                if not self.leader and self._try_lock():
+                    self._become_leader()
+                if self.leader:
+                    if self.sharding:
+                        self._update_ring()
+                    self._publish()
+                    if self.sharding:
+                        self._replicate(exclude_node=self.node_id)
+                else:
+                    self._replicate()
+            except Exception as e:
+                self.logger.error(f"Shared state sync failed: {str(e)}")
+            self._stop_event.wait(self.poll_interval)
+
+        # 数据库连接属于本线程，在这里退出分片并关闭
+        try:
+            if self.leader and self.sharding:
+                self.store.leave(self.node_id)
+        except Exception as e:
+            self.logger.error(f"Failed to leave shard membership: {str(e)}")
+        self.store.close()
+
+    def _update_ring(self) -> None:
+        """按存活节点重建哈希环；成员变化后监控的调度表自动移除不再归属本节点的主机"""
+        nodes = set(self.store.live_nodes(self.node_timeout))
+        nodes.add(self.node_id)
+        if tuple(sorted(nodes)) == self.ring.nodes:
+            return
+        self.ring = HashRing(nodes, self.virtual_nodes)
+        hosts = self.monitor.supervisor_service.config_manager.get_all_hosts()
+        owned = sum(1 for host_id in hosts if self.owns(host_id))
+        self.logger.info(
+            f"Shard membership changed: {', '.join(self.ring.nodes)}; "
+            f"node {self.node_id} now owns {owned} of {len(hosts)} hosts"
+        )
+
+    def _become_leader(self) -> None:
+        """接管采集：先同步上一任采集进程发布的状态，再开始新任期并启动监控"""
+        self._replicate()
+        self.term = self.store.begin_term(self.node_id, os.getpid())
+        # 同步后本地状态包含共享状态中的所有主机，用于发现已从配置中删除的主机
+        self._published = set(self.monitor.get_all_status()) | set(self.monitor.process_snapshots.get_all())
+        self.leader = True
+        self.monitor.replicating = False
+        if self.sharding:
+            self._update_ring()
+            self.monitor.host_filter = self.owns
+        self.monitor.start_monitoring()
+        self.logger.info(f"Worker {os.getpid()} took over background collection (term {self.term})")
+
+    def _publish(self) -> None:
+        """发布上次发布以来变化的主机状态和快照，没有变化时只更新心跳"""
+        with self._pending_lock:
+            status_ids, snapshot_ids = self._pending_status, self._pending_snapshots
+            self._pending_status, self._pending_snapshots = set(), set()
+
+        statuses: List[StatusRow] = []
+        for host_id in status_ids:
+            entry = self.monitor.get_cached_status(host_id)
+            if entry is not None and entry.get('last_check') is not None:
+                statuses.append((host_id, int(bool(entry['status'])),
+                                 entry['last_check'].timestamp(), entry['last_change'].timestamp()))
+
+        snapshots: List[SnapshotRow] = []
+        for host_id in snapshot_ids:
+            snapshot = self.monitor.process_snapshots.get(host_id)
+            if snapshot is None:
+                continue
+            if snapshot.get('error'):
+                snapshots.append((host_id, None, None, snapshot['error']))
+            else:
+                updated_at = snapshot.get('updated_at')
+                snapshots.append((host_id, json.dumps(snapshot['processes'], ensure_ascii=False),
+                                  updated_at.timestamp() if updated_at else None, None))
+        self._published.update(host_id for host_id, *_ in snapshots)
+        self._published.update(host_id for host_id, *_ in statuses)
+
+        hosts = self.monitor.supervisor_service.config_manager.get_all_hosts()
+        removed = [host_id for host_id in self._published if host_id not in hosts]
+        self._published.difference_update(removed)
+
+        self.published_seq = self.store.publish(statuses, snapshots, removed, self.node_id)
+        self.heartbeat = time.time()
+
+    def _replicate(self, exclude_node: Optional[str] = None) -> None:
+        """把共享状态中 seq 大于上次读取位置的变化回放到本地监控
+
+        本节点的采集进程换了一任（term 变化）或共享状态文件被重建（seq 变小）时全量重新加载；
+        其他节点的任期变化不影响本节点。
+
+        Args:
+            exclude_node: 不回放该节点写入的行（分片模式下采集进程自己发布的行）
+        """
+        current, node = self.store.read_state(self.node_id)
+        if not self.leader:
+            self.heartbeat = node['heartbeat'] if node else None
+            self.monitor.replicating = bool(self.heartbeat) and time.time() - self.heartbeat < self.stale_after
+            if node is not None and node['term'] != self.term:
+                self.term, self.read_seq = node['term'], 0
+        if current < self.read_seq:
+            self.read_seq = 0
+        if current <= self.read_seq:
+            return
+
+        seq, statuses, snapshots = self.store.read_changes(self.read_seq, exclude_node)
+        for host_id, status, last_check, last_change in statuses:
+            self.monitor.update_host_status(
+                host_id, bool(status),
+                checked_at=datetime.fromtimestamp(last_check),
+                changed_at=datetime.fromtimestamp(last_change)
+            )
+        store = self.monitor.process_snapshots
+        for host_id, processes, updated_at, error in snapshots:
+            updated_at = datetime.fromtimestamp(updated_at) if updated_at else None
+            local = store.get(host_id)
+            # 进程列表没有变化时（如主机持续不可用）不重新解析
+            if updated_at is not None and (local is None or local.get('updated_at') != updated_at):
+                store.update(host_id, json.loads(processes), updated_at=updated_at)
+            if error:
+                store.mark_unavailable(host_id, error)
+        self.read_seq = seq
+        self.monitor.notify_sweep()
@@ -0,0 +1,92 @@
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime
+import logging
+import threading
+
+SnapshotListener = Callable[[str, Optional[List[Dict[str, Any]]]], None]
+
+class ProcessSnapshotStore:
+    """各主机进程列表的内存快照
+
+    由后台监控写入，API 和聚合视图从这里读取而不是实时访问 supervisor。
+    每次写入都会递增版本号并通知监听者；processes 为 None 表示该主机当前不可用。
+    """
+
+    def __init__(self) -> None:
+        self.logger = logging.getLogger(__name__)
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._listeners: List[SnapshotListener] = []
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: SnapshotListener) -> None:
+        """注册快照更新回调 listener(host_id, processes)"""
+        self._listeners.append(listener)
+
+    def update(self, host_id: str, processes: List[Dict[str, Any]],
+               updated_at: Optional[datetime] = None) -> int:
+        """写入主机的最新进程列表
+
+        Args:
+            host_id: 主机ID
+            processes: 格式化后的进程列表
+            updated_at: 获取时间，默认为当前时间
+
+        Returns:
+            int: 快照版本号
+        """
+        with self._lock:
+            self._version += 1
+            self._snapshots[host_id] = {
+                'processes': processes,
+                'version': self._version,
+                'updated_at': updated_at or datetime.now(),
+                'error': None
+            }
+            version = self._version
+        self._notify(host_id, processes)
+        return version
+
+    def mark_unavailable(self, host_id: str, error: str) -> None:
+        """主机不可用时保留上一份进程列表，同时记录错误并通知监听者
+
+        Args:
+            host_id: 主机ID
+            error: 错误信息
+        """
+        with self._lock:
+            snapshot = self._snapshots.setdefault(host_id, {
+                'processes': [],
+                'version': 0,
+                'updated_at': None
+            })
+            snapshot['error'] = error
+        self._notify(host_id, None)
+
+    def remove(self, host_id: str) -> None:
+        """删除主机的快照"""
+        with self._lock:
+            self._snapshots.pop(host_id, None)
+        self._notify(host_id, None)
+
+    def get(self, host_id: str) -> Optional[Dict[str, Any]]:
+        """获取主机快照
+
+        Returns:
+            Optional[Dict[str, Any]]: 包含 processes、version、updated_at、error；没有快照时返回 None
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(host_id)
+            return dict(snapshot) if snapshot else None
+
+    def get_all(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有主机快照的浅拷贝"""
+        with self._lock:
+            return {host_id: dict(snapshot) for host_id, snapshot in self._snapshots.items()}
+
+    def _notify(self, host_id: str, processes: Optional[List[Dict[str, Any]]]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(host_id, processes)
+            except Exception as e:
+                self.logger.error(f"Snapshot listener failed for host {host_id}: {str(e)}")
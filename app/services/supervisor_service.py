@@ -1,22 +1,160 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Tuple, TYPE_CHECKING
 import logging
 import os
 import urllib.parse
 import xmlrpc.client
 import time
 import base64
-from ..utils.config import ConfigManager
+import http.client
+from datetime import datetime
+from ..utils.config import ConfigManager, create_config_manager, load_app_config
+from ..utils.fanout import get_fanout_executor
+from ..utils.metrics import CONNECT_RETRIES, RPC_CALLS, RPC_DURATION, RPC_ERRORS
+from ..utils.pagination import paginate
+from ..utils.rpc_counter import record_rpc
+from ..utils.xmlrpc_codec import loads_response
+from .connection_pool import ConnectionPool, get_connection_pool
+from .circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, get_circuit_breakers
+
+if TYPE_CHECKING:
+    from ..utils.monitor import HostMonitor
+
+# supervisor 分组操作结果中表示成功的状态码 (supervisor.xmlrpc.Faults.SUCCESS)
+SUPERVISOR_SUCCESS = 80
+
+# 日志增量读取的默认/最大长度（字节）
+DEFAULT_TAIL_LENGTH = 16384
+MAX_TAIL_LENGTH = 1024 * 1024
+
+# 进程列表页面使用的字段；获取进程列表时只解码这些字段
+PROCESS_FIELDS = ('name', 'statename', 'state', 'pid', 'description')
+
+# 主机列表返回的字段
+HOST_FIELDS = ('id', 'name', 'ip', 'port', 'username', 'status', 'description', 'tags',
+               'last_check', 'last_change')
+
+def format_processes(processes: Any) -> List[Dict[str, Any]]:
+    """将 getAllProcessInfo 的返回值转换为 API 使用的进程列表
+    
+    Args:
+        processes: supervisor 返回的进程信息
+        
+    Returns:
+        List[Dict[str, Any]]: 格式化后的进程列表
+    """
+    logger = logging.getLogger(__name__)
+    
+    # 确保返回的是列表类型
+    if not isinstance(processes, list):
+        logger.error(f"Unexpected process info type: {type(processes)}")
+        processes = list(processes) if processes else []
+    
+    # 处理进程信息
+    formatted_processes = []
+    for proc in processes:
+        if not isinstance(proc, dict):
+            logger.warning(f"Skipping invalid process data: {proc}")
+            continue
+            
+        formatted_processes.append({
+            'name': proc.get('name', 'Unknown'),
+            'statename': proc.get('statename', 'Unknown'),
+            'state': proc.get('state', 0),
+            'pid': proc.get('pid', 0),
+            'description': proc.get('description', '')
+        })
+    
+    return formatted_processes
+
+def format_multicall_results(results: List[Any]) -> List[Any]:
+    """将 system.multicall 的返回值展开，失败的调用转换为 xmlrpc.client.Fault 实例"""
+    formatted = []
+    for item in results:
+        if isinstance(item, dict) and 'faultCode' in item:
+            formatted.append(xmlrpc.client.Fault(item['faultCode'], item.get('faultString', '')))
+        elif isinstance(item, list) and len(item) == 1:
+            formatted.append(item[0])
+        else:
+            formatted.append(item)
+    return formatted
+
+def make_bulk_result(item: Dict[str, Any], success: bool, error: Optional[str] = None,
+                     details: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """生成批量控制中单个操作的结果"""
+    result = {key: item[key] for key in ('host_id', 'process', 'group', 'action') if key in item}
+    result.update({'success': success, 'error': error})
+    if details is not None:
+        result['details'] = details
+    return result
+
+def plan_bulk_calls(host_items: List[Tuple[int, Dict[str, Any]]]
+                    ) -> Tuple[List[Tuple[str, List[Any]]], List[Tuple[int, Dict[str, Any], int, int]]]:
+    """为单个主机上的一组控制操作生成 multicall 调用
+    
+    重启拆分为停止 + 启动；'*' 使用 startAllProcesses/stopAllProcesses。
+    
+    Args:
+        host_items: (原始序号, 操作) 的列表
+        
+    Returns:
+        Tuple: (调用列表, 每个操作的 (序号, 操作, 调用起始位置, 调用个数))
+    """
+    calls: List[Tuple[str, List[Any]]] = []
+    plans = []
+    for index, item in host_items:
+        target = item.get('group') or item.get('process')
+        if target == '*':
+            start, stop, params = 'supervisor.startAllProcesses', 'supervisor.stopAllProcesses', []
+        elif item.get('group'):
+            start, stop, params = 'supervisor.startProcessGroup', 'supervisor.stopProcessGroup', [target]
+        else:
+            start, stop, params = 'supervisor.startProcess', 'supervisor.stopProcess', [target]
+        
+        methods = {'start': [start], 'stop': [stop], 'restart': [stop, start]}[item['action']]
+        plans.append((index, item, len(calls), len(methods)))
+        calls.extend((method, params) for method in methods)
+    return calls, plans
+
+def collect_bulk_results(plans: List[Tuple[int, Dict[str, Any], int, int]],
+                         responses: List[Any]) -> List[Tuple[int, Dict[str, Any]]]:
+    """将 multicall 的返回值映射回每个控制操作的结果"""
+    results = []
+    for index, item, offset, count in plans:
+        # 重启的结果以最后一步（启动）为准，停止失败（如进程未运行）忽略
+        response = responses[offset + count - 1]
+        if isinstance(response, xmlrpc.client.Fault):
+            results.append((index, make_bulk_result(item, False, response.faultString)))
+        elif isinstance(response, list):
+            # 分组操作返回每个进程的执行状态
+            failed = [detail for detail in response if detail.get('status') != SUPERVISOR_SUCCESS]
+            error = f"{len(failed)} of {len(response)} processes failed" if failed else None
+            results.append((index, make_bulk_result(item, not failed, error, response)))
+        else:
+            results.append((index, make_bulk_result(item, True)))
+    return results
+
+# 复用的 keep-alive 连接已被对端关闭时，换新连接重试一次
+_RETRYABLE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
 
 # 添加 AuthTransport 类定义
 class AuthTransport(xmlrpc.client.Transport):
-    """用于处理 XML-RPC 认证的传输类"""
-    def __init__(self, username: str, password: str, timeout: int = 10):
+    """用于处理 XML-RPC 认证的传输类，连接从进程级连接池中借用
+
+    响应由 loads_response 解析；projections 为方法名到字段列表的映射，
+    对应方法返回的 struct 只解码这些字段。
+    """
+    def __init__(self, username: str, password: str, timeout: int = 10,
+                 pool: Optional[ConnectionPool] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None,
+                 projections: Optional[Dict[str, Sequence[str]]] = None):
         super().__init__()
+        self.projections = projections or {}
         self.username = username
         self.password = password
         self.timeout = timeout
         self.auth = base64.b64encode(f"{username}:{password}".encode()).decode()
-        self._cached_connections = {}
+        self.pool = pool or get_connection_pool()
+        self.breakers = breakers or get_circuit_breakers()
 
     def _get_host_key(self, host) -> str:
         """获取主机的唯一标识符"""
@@ -27,17 +165,9 @@ class AuthTransport(xmlrpc.client.Transport):
         raise ValueError(f"Unsupported host format: {type(host)}")
 
     def make_connection(self, host):
-        """创建或获取缓存的HTTP连接"""
+        """从连接池借出HTTP连接"""
         try:
-            host_key = self._get_host_key(host)
-            
-            if host_key not in self._cached_connections:
-                conn = super().make_connection(host_key)
-                if hasattr(conn, 'timeout'):
-                    conn.timeout = self.timeout
-                self._cached_connections[host_key] = conn
-                
-            return self._cached_connections[host_key]
+            return self.pool.acquire(self._get_host_key(host), self.timeout)
         except Exception as e:
             raise ConnectionError(f"Failed to create connection: {str(e)}")
 
@@ -45,30 +175,154 @@ class AuthTransport(xmlrpc.client.Transport):
         """发送请求并添加认证头"""
         connection = self.make_connection(host)
         
+        try:
+            self._send(connection, handler, request_body)
+        except Exception:
+            self.pool.discard(self._get_host_key(host), connection)
+            raise
+        
+        return connection
+
+    def _send(self, connection, handler, request_body) -> None:
+        """在连接上写出请求行、认证头和请求体"""
         connection.putrequest("POST", handler)
         connection.putheader('Authorization', f'Basic {self.auth}')
         connection.putheader('Content-Type', 'text/xml')
         connection.putheader('Content-Length', str(len(request_body)))
         connection.endheaders(request_body)
+
+    def request(self, host, handler, request_body, verbose=False):
+        """发送请求
+
+        复用连接失效时的重试在 _single_request 中、熔断和计数之前完成；
+        不使用 Transport.request 的重试，否则一次调用会计数两次并记录一次熔断失败。
+        """
+        return self.single_request(host, handler, request_body, verbose)
+
+    def single_request(self, host, handler, request_body, verbose=False):
+        """发送单个请求，完成后将连接归还连接池"""
+        host_key = self._get_host_key(host)
+        # 熔断中的主机直接返回缓存的错误，不占用连接和 socket 超时
+        breaker = self.breakers.get(host_key)
+        breaker.before_call()
+        method = self._get_method_name(request_body)
+        record_rpc(method)
+        RPC_CALLS.inc(method, host_key)
+        start = time.perf_counter()
+        try:
+            result = self._single_request(host_key, host, handler, request_body, verbose,
+                                          self.projections.get(method))
+        except (xmlrpc.client.Fault, xmlrpc.client.ProtocolError):
+            # 服务端有响应，主机本身可达
+            RPC_ERRORS.inc(method, host_key)
+            self.pool.mark_good(host_key)
+            breaker.record_success()
+            raise
+        except Exception as e:
+            # 首次失败即标记主机，下次创建代理时会重新验证
+            RPC_ERRORS.inc(method, host_key)
+            self.pool.mark_bad(host_key)
+            breaker.record_failure(str(e))
+            raise
+        finally:
+            RPC_DURATION.observe(time.perf_counter() - start, method)
+        self.pool.mark_good(host_key)
+        breaker.record_success()
+        return result
+
+    def _single_request(self, host_key, host, handler, request_body, verbose=False, fields=None):
+        """发送请求并解析响应，完成后将连接归还连接池
         
-        return connection
+        从连接池借出的连接在发送或读取响应头时被对端关闭，换新连接重试一次。
+        """
+        for attempt in range(2):
+            connection = self.make_connection(host)
+            # 新建的连接在发送时才建立 socket
+            reused = connection.sock is not None
+            try:
+                self._send(connection, handler, request_body)
+                response = connection.getresponse()
+            except _RETRYABLE_ERRORS:
+                self.pool.discard(host_key, connection)
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                self.pool.discard(host_key, connection)
+                raise
+            break
+
+        try:
+            if response.status == 200:
+                self.verbose = verbose
+                try:
+                    result = self._parse_body(response, fields)
+                except xmlrpc.client.Fault:
+                    # Fault 说明响应已被完整读取，连接仍可复用
+                    self._release(host_key, connection, response)
+                    raise
+                self._release(host_key, connection, response)
+                return result
+        except xmlrpc.client.Fault:
+            raise
+        except Exception:
+            # 异常后连接状态未知，直接丢弃
+            self.pool.discard(host_key, connection)
+            raise
+
+        # 非 200 响应：读完响应体后归还连接并抛出协议错误
+        response.read()
+        self._release(host_key, connection, response)
+        raise xmlrpc.client.ProtocolError(
+            host_key + handler,
+            response.status, response.reason,
+            dict(response.getheaders())
+        )
+
+    @staticmethod
+    def _parse_body(response, fields: Optional[Sequence[str]] = None) -> Any:
+        """读取完整响应体并解析为返回值"""
+        body = response.read()
+        if response.getheader('content-encoding', '') == 'gzip':
+            body = xmlrpc.client.gzip_decode(body)
+        return loads_response(body, fields)
+
+    @staticmethod
+    def _get_method_name(request_body) -> str:
+        """从请求体中提取 XML-RPC 方法名"""
+        if isinstance(request_body, str):
+            request_body = request_body.encode()
+        start = request_body.find(b'<methodName>')
+        end = request_body.find(b'</methodName>', start)
+        if start < 0 or end < 0:
+            return 'unknown'
+        return request_body[start + len(b'<methodName>'):end].decode('utf-8', 'replace')
+
+    def _release(self, host_key: str, connection, response) -> None:
+        """根据响应的 keep-alive 状态归还或丢弃连接"""
+        if response.will_close:
+            self.pool.discard(host_key, connection)
+        else:
+            self.pool.release(host_key, connection)
 
     def close(self):
-        """关闭所有缓存的连接"""
-        for conn in self._cached_connections.values():
-            if hasattr(conn, 'close'):
-                conn.close()
-        self._cached_connections.clear()
+        """连接由连接池管理，这里不关闭共享连接"""
         super().close()
 
 class SupervisorService:
     def __init__(self):
-        self.config_manager = ConfigManager()
+        self.config_manager = create_config_manager()
         self.logger = logging.getLogger(__name__)
+        # 由 create_app 注入，用于从监控缓存读取主机状态
+        self.host_monitor: Optional['HostMonitor'] = None
+        self.status_max_age = float((load_app_config().get('status_check') or {}).get('max_age', 90))
 
-    def get_all_hosts(self) -> List[Dict[str, Any]]:
+    def get_all_hosts(self, deadline: Optional[float] = None) -> List[Dict[str, Any]]:
         """获取所有主机列表
         
+        Args:
+            deadline: 并发探测的截止时间（秒），超时的主机状态为 unknown
+            
         Returns:
             List[Dict[str, Any]]: 主机信息列表，每个主机包含完整的配置信息
         """
@@ -80,6 +334,7 @@ class SupervisorService:
                 
             self.logger.info(f"Found {len(hosts_config)} hosts in configuration")
             result = []
+            probes = {}
             
             for host_id, host in hosts_config.items():
                 try:
@@ -110,13 +365,18 @@ class SupervisorService:
                         'ip': host['ip'],
                         'port': port,
                         'username': host['username'],
-                        'status': 'connected' if self.check_connection(host) else 'disconnected'
+                        'status': 'unknown'
                     }
                     result.append(host_info)
+                    probes[host_id] = host
                 except Exception as e:
                     self.logger.error(f"Error processing host {host_id}: {str(e)}")
                     continue
                     
+            statuses = get_fanout_executor().map(self.check_connection, probes, deadline=deadline)
+            for host_info in result:
+                host_info['status'] = self._format_status(statuses.get(host_info['id']))
+                    
             self.logger.info(f"Successfully processed {len(result)} hosts")
             return result
             
@@ -124,11 +384,12 @@ class SupervisorService:
             self.logger.error(f"Failed to get hosts list: {str(e)}")
             return []
 
-    def get_host(self, host_id: str) -> Optional[Dict[str, Any]]:
+    def get_host(self, host_id: str, check_status: bool = True) -> Optional[Dict[str, Any]]:
         """获取指定主机信息
         
         Args:
             host_id: 主机ID
+            check_status: 是否探测主机连接状态；仅需确认主机存在时传 False 可省去一次 RPC
             
         Returns:
             Optional[Dict[str, Any]]: 主机信息，如果不存在则返回 None
@@ -145,21 +406,34 @@ class SupervisorService:
                 self.logger.error(f"Invalid port for host {host_id}: {host['port']}")
                 return None
 
-            return {
+            host_info = {
                 'id': host_id,  
                 'name': host.get('name', f"{host['ip']}:{port}"),
                 'ip': host['ip'],
                 'port': port,
                 'username': host['username'],
                 'password': host['password'],
-                'status': 'connected' if self.check_connection(host) else 'disconnected'
+                'status': 'unknown'
             }
+            if check_status:
+                host_info['status'] = 'connected' if self.check_connection(host) else 'disconnected'
+            return host_info
         except Exception as e:
             self.logger.error(f"Error processing host {host_id}: {str(e)}")
             return None
 
-    def _get_supervisor_proxy(self, host: Dict[str, Any]) -> xmlrpc.client.ServerProxy:
-        """创建到 Supervisor XML-RPC 服务器的代理连接"""
+    def _get_supervisor_proxy(self, host: Dict[str, Any], validate: bool = True,
+                              projections: Optional[Dict[str, Sequence[str]]] = None) -> xmlrpc.client.ServerProxy:
+        """创建到 Supervisor XML-RPC 服务器的代理连接
+
+        连接采用惰性验证：正常情况下直接信任连接，不额外发送 RPC；
+        只有当该主机最近一次调用失败（被连接池标记）时才用 getState 重新验证。
+
+        Args:
+            host: 主机配置信息
+            validate: 主机被标记为可疑时是否先验证连接；调用方本身就是探测时传 False
+            projections: 方法名到需要解码的字段列表的映射，见 AuthTransport
+        """
         try:
             # 提取并验证连接信息
             ip = str(host.get('ip', ''))
@@ -172,7 +446,7 @@ class SupervisorService:
 
             # 构建主机地址字符串
             host_addr = f"{ip}:{port}"
-            self.logger.info(f"Creating supervisor proxy for {host_addr}")
+            self.logger.debug(f"Creating supervisor proxy for {host_addr}")
             
             # 构建URL
             url = f"http://{host_addr}/RPC2"
@@ -181,7 +455,8 @@ class SupervisorService:
             transport = AuthTransport(
                 username=username,
                 password=password,
-                timeout=10
+                timeout=10,
+                projections=projections
             )
             
             # 创建代理
@@ -192,11 +467,16 @@ class SupervisorService:
                 verbose=False
             )
             
-            # 验证连接
+            if not validate or not transport.pool.is_bad(host_addr):
+                return proxy
+
+            # 该主机上次调用失败，重新验证连接
             try:
                 state = proxy.supervisor.getState()
-                self.logger.info(f"Successfully connected to supervisor at {host_addr}")
+                self.logger.info(f"Successfully reconnected to supervisor at {host_addr}")
                 return proxy
+            except CircuitOpenError:
+                raise
             except xmlrpc.client.ProtocolError as e:
                 if e.errcode == 401:
                     raise ConnectionError("Authentication failed - check username and password")
@@ -204,6 +484,8 @@ class SupervisorService:
             except Exception as e:
                 raise ConnectionError(f"Failed to verify connection: {str(e)}")
                 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to create supervisor proxy for {host.get('ip')}:{host.get('port')}: {str(e)}")
             raise ConnectionError(f"Failed to connect to supervisor: {str(e)}")
@@ -234,20 +516,29 @@ class SupervisorService:
                     if not proxy:
                         raise ConnectionError("Failed to create supervisor proxy")
                         
-                    # 验证连接
-                    proxy.supervisor.getState()
                     return proxy
                     
+                except CircuitOpenError as e:
+                    # 熔断中的主机不再重试，直接返回缓存的错误
+                    self.logger.warning(f"Skipping retries for {host_id}: {str(e)}")
+                    raise
                 except Exception as e:
                     last_error = str(e)
                     self.logger.warning(f"Connection attempt {attempt + 1}/{MAX_RETRIES} failed: {last_error}")
+                    breaker = get_circuit_breakers().get(f"{host.get('ip')}:{host.get('port')}")
+                    if breaker.state == CircuitBreaker.OPEN:
+                        # 本次失败已触发熔断，后续重试必然被拒绝，无需再等待
+                        break
                     if attempt < MAX_RETRIES - 1:
+                        CONNECT_RETRIES.inc(f"{host.get('ip')}:{host.get('port')}")
                         time.sleep(RETRY_DELAY)
                         
-            raise ConnectionError(f"Failed to connect after {MAX_RETRIES} attempts. Last error: {last_error}")
+            raise ConnectionError(f"Failed to connect after {attempt + 1} attempts. Last error: {last_error}")
             
         except ValueError as e:
             raise ValueError(str(e))
+        except CircuitOpenError:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to connect to supervisor at {host_id}: {str(e)}")
             raise ConnectionError(f"Failed to connect to supervisor: {str(e)}")
@@ -267,9 +558,9 @@ class SupervisorService:
                 self.logger.error("Invalid host configuration: not a dictionary")
                 return False
             
-            # 直接使用原始主机配置
+            # 直接使用原始主机配置，getState 本身就是探测，无需再验证代理
             try:
-                proxy = self._get_supervisor_proxy(host)
+                proxy = self._get_supervisor_proxy(host, validate=False)
                 state = proxy.supervisor.getState()
                 self.logger.debug(f"Successfully connected to {host.get('ip')}:{host.get('port')}")
                 return True
@@ -298,27 +589,63 @@ class SupervisorService:
             proxy = self._get_supervisor_proxy(host)
             processes = proxy.supervisor.getAllProcessInfo()
             
-            # 获取每个进程的日志文件路径
+            # getAllProcessInfo 已包含日志文件路径，无需逐个调用 getProcessInfo
             for process in processes:
-                try:
-                    # 获取进程配置
-                    process_config = proxy.supervisor.getProcessInfo(process['name'])
-                    stdout_logfile = process_config.get('stdout_logfile', '')
-                    stderr_logfile = process_config.get('stderr_logfile', '')
-                    
-                    # 添加日志文件路径到进程信息中
-                    process['stdout_logfile'] = stdout_logfile
-                    process['stderr_logfile'] = stderr_logfile
-                except Exception as e:
-                    self.logger.error(f"Failed to get log file info for process {process['name']}: {str(e)}")
-                    process['stdout_logfile'] = ''
-                    process['stderr_logfile'] = ''
+                process['stdout_logfile'] = process.get('stdout_logfile', process.get('logfile', ''))
+                process['stderr_logfile'] = process.get('stderr_logfile', '')
                     
             return processes
         except xmlrpc.client.Error as e:
             self.logger.error(f"Failed to get process info from {host['ip']}:{host['port']}: {str(e)}")
             return []
 
+    def _multicall(self, proxy: xmlrpc.client.ServerProxy,
+                   calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """通过 system.multicall 在一次 HTTP 往返中执行一组调用
+        
+        Args:
+            proxy: Supervisor 代理
+            calls: (方法名, 参数列表) 的列表，例如 ('supervisor.startProcess', ['web'])
+            
+        Returns:
+            List[Any]: 与 calls 一一对应的结果；失败的调用以 xmlrpc.client.Fault 实例返回，不会抛出
+        """
+        if not calls:
+            return []
+        
+        if len(calls) == 1:
+            method, params = calls[0]
+            try:
+                return [getattr(proxy, method)(*params)]
+            except xmlrpc.client.Fault as e:
+                return [e]
+        
+        results = proxy.system.multicall([
+            {'methodName': method, 'params': list(params)}
+            for method, params in calls
+        ])
+        return format_multicall_results(results)
+
+    def multicall(self, host_id: str, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """在指定主机上批量执行调用，所有调用只占用一次 HTTP 往返
+        
+        Args:
+            host_id: 主机ID
+            calls: (方法名, 参数列表) 的列表
+            
+        Returns:
+            List[Any]: 与 calls 一一对应的结果，失败的调用以 xmlrpc.client.Fault 实例返回
+            
+        Raises:
+            ValueError: 主机不存在
+            ConnectionError: 无法连接到主机
+        """
+        host = self.config_manager.get_host(host_id)
+        if not host:
+            raise ValueError(f"Host {host_id} not found")
+        
+        return self._multicall(self._get_supervisor_proxy(host), calls)
+
     def control_process(self, host_id: str, process_name: str, action: str) -> bool:
         """控制进程状态
         
@@ -363,25 +690,54 @@ class SupervisorService:
         Returns:
             str: 日志内容
             
+        Raises:
+            Exception: 获取日志失败时抛出
+        """
+        # 读取最后16KB的日志
+        return self.tail_process_log(host_id, process_name, log_type)['content']
+
+    def tail_process_log(self, host_id: str, process_name: str, log_type: str = 'stdout',
+                         offset: int = 0, length: int = DEFAULT_TAIL_LENGTH) -> Dict[str, Any]:
+        """增量读取进程日志
+        
+        基于 supervisor 的 tailProcessStdoutLog/tailProcessStderrLog：
+        传入上次返回的 offset 只会得到之后新写入的内容；offset 为 0 时返回日志末尾 length 字节。
+        
+        Args:
+            host_id: 主机ID
+            process_name: 进程名称
+            log_type: 日志类型 (stdout/stderr)
+            offset: 上次读取后返回的偏移量
+            length: 最多读取的字节数
+            
+        Returns:
+            Dict[str, Any]: content 为新增内容，offset 为下次读取的偏移量，
+                            overflow 表示新增内容超过 length、中间部分被跳过
+            
         Raises:
             Exception: 获取日志失败时抛出
         """
         try:
-            proxy = self._get_supervisor_proxy(self.get_host(host_id))
+            host = self.config_manager.get_host(host_id)
+            if not host:
+                raise ValueError(f"Host {host_id} not found")
+
+            proxy = self._get_supervisor_proxy(host)
             if not proxy:
                 raise Exception("Failed to connect to supervisor")
 
-            # 获取日志内容
+            offset = max(0, int(offset))
+            length = max(0, min(int(length), MAX_TAIL_LENGTH))
             if log_type == 'stdout':
-                offset = 0
-                length = 16384  # 读取最后16KB的日志
-                log_data = proxy.supervisor.readProcessStdoutLog(process_name, offset, length)
+                log_data, new_offset, overflow = proxy.supervisor.tailProcessStdoutLog(process_name, offset, length)
             else:
-                offset = 0
-                length = 16384
-                log_data = proxy.supervisor.readProcessStderrLog(process_name, offset, length)
+                log_data, new_offset, overflow = proxy.supervisor.tailProcessStderrLog(process_name, offset, length)
 
-            return log_data if isinstance(log_data, str) else log_data.decode('utf-8')
+            return {
+                'content': log_data if isinstance(log_data, str) else log_data.decode('utf-8', 'replace'),
+                'offset': new_offset,
+                'overflow': bool(overflow)
+            }
 
         except Exception as e:
             self.logger.error(f"Failed to get {log_type} log for process {process_name}: {str(e)}")
@@ -413,18 +769,12 @@ class SupervisorService:
             except (ValueError, TypeError):
                 raise ValueError(f"Invalid port value: {host_data['port']}")
                 
-            # 获取当前配置
-            hosts = self.config_manager.get_all_hosts()
-            
             # 检查是否已存在
-            if host_id in hosts:
+            if self.config_manager.get_host(host_id):
                 raise ValueError(f"Host {host_id} already exists")
                 
-            # 添加新主机
-            hosts[host_id] = host_data
-            
-            # 保存配置
-            if not self.config_manager.save_hosts(hosts):
+            # 添加新主机，只写入这一条变更
+            if not self.config_manager.add_host(host_id, host_data):
                 raise Exception("Failed to save configuration")
                 
             return True
@@ -443,18 +793,12 @@ class SupervisorService:
             bool: 是否删除成功
         """
         try:
-            # 获取当前配置
-            hosts = self.config_manager.get_all_hosts()
-            
             # 检查主机是否存在
-            if host_id not in hosts:
+            if not self.config_manager.get_host(host_id):
                 raise ValueError(f"Host {host_id} not found")
                 
             # 删除主机
-            del hosts[host_id]
-            
-            # 保存配置
-            if not self.config_manager.save_hosts(hosts):
+            if not self.config_manager.delete_host(host_id):
                 raise Exception("Failed to save configuration")
                 
             return True
@@ -480,7 +824,7 @@ class SupervisorService:
                 return False
 
             try:
-                proxy = self._get_supervisor_proxy(connection_info)
+                proxy = self._get_supervisor_proxy(connection_info, validate=False)
                 state = proxy.supervisor.getState()
                 self.logger.debug(f"Successfully connected to {connection_info['ip']}:{connection_info['port']}")
                 return True
@@ -492,85 +836,243 @@ class SupervisorService:
             self.logger.error(f"Failed to check host status: {str(e)}")
             return False
 
-    def get_hosts(self) -> List[Dict[str, Any]]:
-        """获取所有主机信息，包括状态"""
-        try:
-            hosts_config = self.config_manager.get_all_hosts()
-            if not hosts_config:
-                self.logger.warning("No hosts configured")
-                return []
-            
-            hosts = []
-            for host_id, host in hosts_config.items():
-                try:
-                    # 检查主机状态
-                    status = 'connected' if self.check_host_status(host) else 'disconnected'
-                    
-                    # 构建主机信息
-                    host_info = {
-                        'id': host_id,
-                        'name': host.get('name', ''),
-                        'ip': host.get('ip', ''),
-                        'port': host.get('port', ''),
-                        'username': host.get('username', ''),
-                        'status': status,
-                        'description': host.get('description', ''),
-                        'tags': host.get('tags', [])
-                    }
-                    hosts.append(host_info)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing host {host_id}: {str(e)}")
-                    continue
-            
-            return hosts
+    def get_hosts(self, deadline: Optional[float] = None,
+                  max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        """获取所有主机信息，包括状态
+        
+        Args:
+            deadline: 并发探测的截止时间（秒），为 None 时使用配置值
+            max_age: 可接受的缓存时间（秒），为 0 时总是实时探测；为 None 时后台采集在运行（或从采集进程同步）
+                     则直接使用缓存（由调度器按自适应间隔刷新），否则使用配置值
             
+        Returns:
+            List[Dict[str, Any]]: 主机信息列表，包含 last_check 和 last_change
+        """
+        try:
+            return self.query_hosts(deadline=deadline, max_age=max_age)['hosts']
         except Exception as e:
             self.logger.error(f"Failed to get hosts: {str(e)}")
             return []
 
+    def query_hosts(self, deadline: Optional[float] = None, max_age: Optional[float] = None,
+                    status: Optional[List[str]] = None, tag: Optional[str] = None,
+                    name: Optional[str] = None, limit: Optional[int] = None,
+                    cursor: Optional[str] = None) -> Dict[str, Any]:
+        """分页查询主机信息
+        
+        优先使用 HostMonitor 缓存的状态；只有本页中缓存缺失或早于 max_age 的主机才会实时探测，
+        后台采集在运行时默认只探测还没有缓存的主机。
+        实时探测在共享线程池中并发执行，整个请求受 deadline 约束，
+        未能在截止时间内返回的主机状态为 unknown。
+        按 status 过滤时只使用缓存的状态（没有缓存的主机为 unknown），不做任何探测。
+        
+        Args:
+            deadline: 并发探测的截止时间（秒），为 None 时使用配置值
+            max_age: 可接受的缓存时间（秒），为 0 时总是实时探测；为 None 时后台采集在运行（或从采集进程同步）
+                     则直接使用缓存（由调度器按自适应间隔刷新），否则使用配置值
+            status: 只返回这些状态 (connected/disconnected/unknown) 的主机
+            tag: 只返回带有该标签的主机
+            name: 主机名称或ID前缀（不区分大小写）
+            limit: 每页主机数，为 None 时返回全部
+            cursor: 上一页返回的 next_cursor
+            
+        Returns:
+            Dict[str, Any]: hosts 为本页主机，next_cursor 为下一页游标（没有下一页时为 None），
+                            total 为满足条件的主机总数
+            
+        Raises:
+            ValueError: 游标无效
+        """
+        if status is None and name is None:
+            # 只按标签分页时交给注册表，SQLite 后端直接走索引和 LIMIT
+            if cursor is not None and not self.config_manager.get_host(cursor):
+                raise ValueError(f"Invalid cursor: {cursor}")
+            page = self.config_manager.list_hosts(
+                limit=None if limit is None else limit + 1, after=cursor, tag=tag
+            )
+            next_cursor = None
+            if limit is not None and len(page) > limit:
+                page = page[:limit]
+                next_cursor = page[-1][0]
+            total = self.config_manager.count_hosts(tag)
+            cached = None
+        else:
+            candidates = list(self.config_manager.find_hosts(tag=tag).items())
+            if name is not None:
+                prefix = name.lower()
+                candidates = [
+                    (host_id, host) for host_id, host in candidates
+                    if str(host.get('name', '')).lower().startswith(prefix) or host_id.lower().startswith(prefix)
+                ]
+            cached = {}
+            if status is not None:
+                for host_id, _ in candidates:
+                    entry = self.host_monitor.get_cached_status(host_id) if self.host_monitor else None
+                    if entry is not None:
+                        cached[host_id] = entry
+                candidates = [
+                    (host_id, host) for host_id, host in candidates
+                    if self._format_status(cached[host_id]['status'] if host_id in cached else None) in status
+                ]
+            page, next_cursor = paginate(candidates, lambda item: item[0], limit, cursor)
+            total = len(candidates)
+        
+        return {
+            'hosts': self._build_host_infos(page, deadline, max_age, cached if status is not None else None),
+            'next_cursor': next_cursor,
+            'total': total
+        }
+
+    def _build_host_infos(self, page: List[Tuple[str, Dict[str, Any]]], deadline: Optional[float],
+                          max_age: Optional[float],
+                          cached: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """生成一页主机的信息；cached 不为 None 时直接使用这些缓存状态，不做探测"""
+        statuses: Dict[str, Optional[bool]] = {}
+        if cached is None:
+            # 后台采集调度的主机按自己的自适应间隔刷新，间隔上限可能超过 status_check.max_age，
+            # 此时按 max_age 判断过期会让每个请求都重新探测长期稳定的主机
+            if max_age is None and not (self.host_monitor is not None and self.host_monitor.has_live_snapshots()):
+                max_age = self.status_max_age
+            cached = {}
+            if self.host_monitor is not None:
+                for host_id, _ in page:
+                    entry = self.host_monitor.get_cached_status(host_id, max_age)
+                    if entry is not None:
+                        cached[host_id] = entry
+            
+            stale = {host_id: host for host_id, host in page if host_id not in cached}
+            statuses = get_fanout_executor().map(self.check_host_status, stale, deadline=deadline)
+            for host_id, connected in statuses.items():
+                if connected is not None and self.host_monitor is not None:
+                    self.host_monitor.update_host_status(host_id, connected)
+                    cached[host_id] = self.host_monitor.get_cached_status(host_id)
+        
+        hosts = []
+        for host_id, host in page:
+            try:
+                # 检查主机状态
+                entry = cached.get(host_id)
+                status = self._format_status(entry['status'] if entry else statuses.get(host_id))
+                
+                # 构建主机信息
+                host_info = {
+                    'id': host_id,
+                    'name': host.get('name', ''),
+                    'ip': host.get('ip', ''),
+                    'port': host.get('port', ''),
+                    'username': host.get('username', ''),
+                    'status': status,
+                    'description': host.get('description', ''),
+                    'tags': host.get('tags', []),
+                    'last_check': self._format_time(entry and entry.get('last_check')),
+                    'last_change': self._format_time(entry and entry.get('last_change'))
+                }
+                hosts.append(host_info)
+                
+            except Exception as e:
+                self.logger.error(f"Error processing host {host_id}: {str(e)}")
+                continue
+        
+        return hosts
+
+    @staticmethod
+    def _format_status(connected: Optional[bool]) -> str:
+        """将探测结果转换为状态字符串，None 表示未能在截止时间内完成"""
+        if connected is None:
+            return 'unknown'
+        return 'connected' if connected else 'disconnected'
+
+    @staticmethod
+    def _format_time(value: Optional[datetime]) -> Optional[str]:
+        """将时间转换为 ISO 格式字符串"""
+        return value.isoformat() if value else None
+
     def get_processes(self, host_id: str) -> List[Dict[str, Any]]:
         """获取指定主机的进程列表"""
         try:
-            self.logger.debug(f"Getting processes for host {host_id}")
-            host = self.get_host(host_id)
-            if not host:
-                self.logger.error(f"Host not found: {host_id}")
-                return []
+            return self.fetch_processes(host_id)
+        except Exception as e:
+            self.logger.error(f"Error getting processes for host {host_id}: {str(e)}")
+            return []
 
-            proxy = self._get_supervisor_proxy(host)
-            if not proxy:
-                self.logger.error(f"Failed to get supervisor proxy for host {host_id}")
-                return []
+    def query_processes(self, host_id: str, statenames: Optional[List[str]] = None,
+                        name: Optional[str] = None, limit: Optional[int] = None,
+                        cursor: Optional[str] = None, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """分页查询主机的进程列表
+        
+        默认直接在 HostMonitor 后台采集的进程快照上过滤，不访问 supervisor；
+        快照不存在、主机上次采集失败或快照早于 max_age 时实时获取一次并写回快照。
+        
+        Args:
+            host_id: 主机ID
+            statenames: 只返回这些状态（如 RUNNING、FATAL）的进程
+            name: 进程名前缀（不区分大小写）
+            limit: 每页进程数，为 None 时返回全部
+            cursor: 上一页返回的 next_cursor
+            max_age: 可接受的快照时间（秒），为 0 时总是实时获取；为 None 时后台采集在运行（或从采集进程同步）则不限制，
+                     否则使用配置值
+            
+        Returns:
+            Dict[str, Any]: processes 为本页进程，next_cursor 为下一页游标，total 为满足条件的进程总数，
+                            updated_at 为数据获取时间
+            
+        Raises:
+            ValueError: 主机不存在或游标无效
+            ConnectionError: 无法连接到主机
+        """
+        monitor = self.host_monitor
+        if max_age is None and not (monitor is not None and monitor.has_live_snapshots()):
+            max_age = self.status_max_age
+        snapshots = monitor.process_snapshots if monitor is not None else None
+        snapshot = snapshots.get(host_id) if snapshots is not None else None
+        if (snapshot and snapshot.get('updated_at') and not snapshot.get('error')
+                and (max_age is None or (datetime.now() - snapshot['updated_at']).total_seconds() <= max_age)):
+            processes, updated_at = snapshot['processes'], snapshot['updated_at']
+        else:
+            processes, updated_at = self.fetch_processes(host_id), datetime.now()
+            if snapshots is not None:
+                snapshots.update(host_id, processes)
+        
+        if statenames is not None:
+            wanted = {statename.upper() for statename in statenames}
+            processes = [process for process in processes if process.get('statename') in wanted]
+        if name is not None:
+            prefix = name.lower()
+            processes = [process for process in processes if process['name'].lower().startswith(prefix)]
+        
+        page, next_cursor = paginate(processes, lambda process: process['name'], limit, cursor)
+        return {
+            'processes': page,
+            'next_cursor': next_cursor,
+            'total': len(processes),
+            'updated_at': self._format_time(updated_at)
+        }
 
-            processes = proxy.supervisor.getAllProcessInfo()
-            self.logger.debug(f"Raw process info from supervisor: {processes}")
-            
-            # 确保返回的是列表类型
-            if not isinstance(processes, list):
-                self.logger.error(f"Unexpected process info type: {type(processes)}")
-                processes = list(processes) if processes else []
-            
-            # 处理进程信息
-            formatted_processes = []
-            for proc in processes:
-                if not isinstance(proc, dict):
-                    self.logger.warning(f"Skipping invalid process data: {proc}")
-                    continue
-                    
-                formatted_processes.append({
-                    'name': proc.get('name', 'Unknown'),
-                    'statename': proc.get('statename', 'Unknown'),
-                    'state': proc.get('state', 0),
-                    'pid': proc.get('pid', 0),
-                    'description': proc.get('description', '')
-                })
+    def fetch_processes(self, host_id: str) -> List[Dict[str, Any]]:
+        """获取指定主机的进程列表，失败时抛出异常
+        
+        与 get_processes 不同，调用方可以区分"没有进程"和"获取失败"。
+        
+        Args:
+            host_id: 主机ID
+            
+        Returns:
+            List[Dict[str, Any]]: 格式化后的进程列表
             
-            return formatted_processes
+        Raises:
+            ValueError: 主机不存在
+            ConnectionError: 无法连接到主机
+        """
+        self.logger.debug(f"Getting processes for host {host_id}")
+        host = self.config_manager.get_host(host_id)
+        if not host:
+            raise ValueError(f"Host {host_id} not found")
 
-        except Exception as e:
-            self.logger.error(f"Error getting processes for host {host_id}: {str(e)}")
-            return []
+        # 只解码页面使用的字段，其余字段（日志路径、时间戳等）直接跳过
+        proxy = self._get_supervisor_proxy(host, projections={'supervisor.getAllProcessInfo': PROCESS_FIELDS})
+        processes = proxy.supervisor.getAllProcessInfo()
+        self.logger.debug(f"Raw process info from supervisor: {processes}")
+        return format_processes(processes)
 
     def control_process(self, host_id: str, process_name: str, action: str) -> bool:
         """控制进程
@@ -597,11 +1099,13 @@ class SupervisorService:
             elif action == 'stop':
                 server.supervisor.stopProcess(process_name)
             elif action == 'restart':
-                try:
-                    server.supervisor.stopProcess(process_name)
-                except:
-                    pass
-                server.supervisor.startProcess(process_name)
+                # 停止和启动合并为一次 multicall，停止失败（如进程未运行）忽略
+                _, started = self._multicall(server, [
+                    ('supervisor.stopProcess', [process_name]),
+                    ('supervisor.startProcess', [process_name])
+                ])
+                if isinstance(started, xmlrpc.client.Fault):
+                    raise started
             else:
                 raise ValueError(f"Invalid action: {action}")
                 
@@ -622,11 +1126,9 @@ class SupervisorService:
             bool: 是否更新成功
         """
         try:
-            # 获取当前配置
-            hosts = self.config_manager.get_all_hosts()
-            
             # 检查主机是否存在
-            if host_id not in hosts:
+            current_host = self.config_manager.get_host(host_id)
+            if not current_host:
                 raise ValueError(f"Host {host_id} not found")
             
             # 验证必要字段
@@ -645,7 +1147,6 @@ class SupervisorService:
                 raise ValueError(f"Invalid port value: {host_data['port']}")
             
             # 更新主机信息，保留原有密码（如果没有提供新密码）
-            current_host = hosts[host_id]
             if not host_data.get('password'):
                 host_data['password'] = current_host['password']
             
@@ -654,11 +1155,8 @@ class SupervisorService:
                 if field in current_host and field not in host_data:
                     host_data[field] = current_host[field]
             
-            # 更新主机信息
-            hosts[host_id] = host_data
-            
-            # 保存配置
-            if not self.config_manager.save_hosts(hosts):
+            # 更新主机信息，只写入这一条变更
+            if not self.config_manager.update_host(host_id, host_data):
                 raise Exception("Failed to save configuration")
             
             return True
@@ -5,7 +5,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // 加载主机列表
     async function loadHosts() {
         try {
-            const response = await fetch('/api/hosts');
+            const response = await fetch('/api/hosts?fields=id,name,ip,port,username,status');
             const data = await response.json();
             
             if (!data.success) {
@@ -39,7 +39,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 <td>${host.port}</td>
                 <td>${host.username || '-'}</td>
                 <td>
-                    <span class="badge bg-${host.status === 'connected' ? 'success' : 'danger'}">
+                    <span class="badge bg-${getStatusColor(host.status)}">
                         ${host.status}
                     </span>
                 </td>
@@ -61,6 +61,13 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // 获取主机状态对应的徽章颜色（unknown 表示探测未在截止时间内完成）
+    function getStatusColor(status) {
+        if (status === 'connected') return 'success';
+        if (status === 'unknown') return 'secondary';
+        return 'danger';
+    }
+
     // 显示错误消息
     function showError(message) {
         const errorAlert = document.getElementById('error-alert');
@@ -10,8 +10,11 @@ function loadDashboard() {
     fetch('/api/dashboard')
         .then(response => response.json())
         .then(data => {
-            updateStatistics(data.statistics);
-            updateHostList(data.hosts);
+            if (!data.success) {
+                throw new Error(data.error || 'Failed to load dashboard');
+            }
+            updateStatistics(data.data.statistics);
+            updateHostList(data.data.hosts);
         })
         .catch(error => {
             console.error('Error:', error);
@@ -41,7 +44,7 @@ function updateHostList(hosts) {
             <td>${host.running_services}</td>
             <td>${host.error_services}</td>
             <td>
-                <a href="/services/${host.id}" class="btn btn-sm btn-primary">
+                <a href="/services?host_id=${host.id}" class="btn btn-sm btn-primary">
                     <i class="bi bi-list-task"></i> 服务
                 </a>
             </td>
@@ -9,7 +9,12 @@ document.addEventListener('DOMContentLoaded', function() {
     const successAlert = document.getElementById('success-alert');
     
     let currentLogData = '';
+    let logOffset = 0;
     let autoRefreshInterval;
+    let logStream = null;
+
+    // 浏览器端最多保留的日志字节数，超出后丢弃最早的内容
+    const MAX_LOG_SIZE = 1024 * 1024;
 
     // 检查必要的DOM元素
     if (!hostSelect || !processSelect || !logTypeSelect || !logContent || 
@@ -21,6 +26,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // 主机选择变更时加载进程列表
     hostSelect.addEventListener('change', function() {
         if (this.value) {
+            stopFollowing();
             loadProcesses(this.value);
             processSelect.disabled = false;
         } else {
@@ -29,6 +35,7 @@ document.addEventListener('DOMContentLoaded', function() {
             logTypeSelect.disabled = true;
             refreshBtn.disabled = true;
             tailCheckbox.disabled = true;
+            stopFollowing();
             clearLog();
         }
     });
@@ -40,16 +47,21 @@ document.addEventListener('DOMContentLoaded', function() {
             refreshBtn.disabled = false;
             tailCheckbox.disabled = false;
             fetchLogs();
+            restartFollowing();
         } else {
             logTypeSelect.disabled = true;
             refreshBtn.disabled = true;
             tailCheckbox.disabled = true;
+            stopFollowing();
             clearLog();
         }
     });
 
     // 日志类型变更时重新加载日志
-    logTypeSelect.addEventListener('change', fetchLogs);
+    logTypeSelect.addEventListener('change', function() {
+        fetchLogs();
+        restartFollowing();
+    });
 
     // 刷新按钮点击事件
     refreshBtn.addEventListener('click', fetchLogs);
@@ -57,12 +69,82 @@ document.addEventListener('DOMContentLoaded', function() {
     // 自动刷新切换
     tailCheckbox.addEventListener('change', function() {
         if (this.checked) {
-            autoRefreshInterval = setInterval(fetchLogs, 5000);
+            startFollowing();
         } else {
-            clearInterval(autoRefreshInterval);
+            stopFollowing();
         }
     });
 
+    // 开始实时跟踪日志：优先使用 SSE 推送，不支持时退回增量轮询
+    function startFollowing() {
+        const hostId = hostSelect.value;
+        const processName = processSelect.value;
+        const logType = logTypeSelect.value;
+
+        if (!hostId || !processName) {
+            return;
+        }
+
+        if (!window.EventSource) {
+            autoRefreshInterval = setInterval(fetchNewLogs, 5000);
+            return;
+        }
+
+        const params = new URLSearchParams({ host_id: hostId, type: logType });
+        logStream = new EventSource(`/api/logs/${encodeURIComponent(processName)}/stream?${params}`);
+
+        logStream.addEventListener('snapshot', function(e) {
+            currentLogData = JSON.parse(e.data).content;
+            renderLog();
+        });
+        logStream.addEventListener('log', function(e) {
+            appendLog(JSON.parse(e.data).content);
+        });
+        logStream.addEventListener('overflow', function(e) {
+            appendLog(`\n... ${JSON.parse(e.data).dropped} updates skipped ...\n`);
+        });
+        logStream.addEventListener('error', function(e) {
+            if (e.data) {
+                showError(`Failed to fetch logs: ${JSON.parse(e.data).error}`);
+            }
+        });
+    }
+
+    // 停止实时跟踪日志
+    function stopFollowing() {
+        clearInterval(autoRefreshInterval);
+        if (logStream) {
+            logStream.close();
+            logStream = null;
+        }
+    }
+
+    // 切换主机/进程/日志类型后重新订阅
+    function restartFollowing() {
+        stopFollowing();
+        if (tailCheckbox.checked) {
+            startFollowing();
+        }
+    }
+
+    // 追加日志内容，超出上限时丢弃最早的内容
+    function appendLog(content) {
+        if (!content) {
+            return;
+        }
+        currentLogData += content;
+        if (currentLogData.length > MAX_LOG_SIZE) {
+            currentLogData = currentLogData.slice(-MAX_LOG_SIZE);
+        }
+        renderLog();
+    }
+
+    // 渲染日志并滚动到底部
+    function renderLog() {
+        logContent.textContent = currentLogData || 'No logs available';
+        logContent.scrollTop = logContent.scrollHeight;
+    }
+
     // 加载进程列表
     async function loadProcesses(hostId) {
         if (!hostId) {
@@ -110,31 +192,66 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
         try {
-            const response = await fetch(`/api/logs/${processName}?host_id=${hostId}&type=${logType}`);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            
-            const data = await response.json();
-            console.log('Log response:', data);  // 添加调试日志
+            // offset 为 0 时服务端返回日志末尾，并告知下次增量读取的偏移量
+            const data = await requestTail(hostId, processName, logType, 0);
+            currentLogData = data.content;
+            logOffset = data.offset;
+            logContent.textContent = currentLogData || 'No logs available';
+            logContent.scrollTop = logContent.scrollHeight;
+        } catch (error) {
+            console.error('Error fetching logs:', error);
+            showError(`Failed to fetch logs: ${error.message}`);
+            logContent.textContent = 'Failed to load logs';
+        }
+    }
 
-            if (data.success) {
-                currentLogData = data.data.content;
-                logContent.textContent = currentLogData || 'No logs available';
-                logContent.scrollTop = logContent.scrollHeight;
+    // 只获取上次读取之后新增的日志
+    async function fetchNewLogs() {
+        const hostId = hostSelect.value;
+        const processName = processSelect.value;
+        const logType = logTypeSelect.value;
+
+        if (!hostId || !processName) {
+            return;
+        }
+
+        try {
+            const data = await requestTail(hostId, processName, logType, logOffset);
+            const previousOffset = logOffset;
+            logOffset = data.offset;
+
+            if (data.overflow || data.offset < previousOffset) {
+                // 新增内容超过单次读取长度或日志已轮转，直接替换
+                currentLogData = data.content;
+                renderLog();
             } else {
-                throw new Error(data.error || 'Failed to fetch logs');
+                appendLog(data.content);
             }
         } catch (error) {
-            console.error('Error fetching logs:', error);
+            console.error('Error fetching new logs:', error);
             showError(`Failed to fetch logs: ${error.message}`);
-            logContent.textContent = 'Failed to load logs';
         }
     }
 
+    // 请求日志增量接口
+    async function requestTail(hostId, processName, logType, offset) {
+        const params = new URLSearchParams({ host_id: hostId, type: logType, offset: offset });
+        const response = await fetch(`/api/logs/${encodeURIComponent(processName)}/tail?${params}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const data = await response.json();
+        if (!data.success) {
+            throw new Error(data.error || 'Failed to fetch logs');
+        }
+        return data.data;
+    }
+
     // 清空日志显示
     function clearLog() {
         currentLogData = '';
+        logOffset = 0;
         logContent.textContent = '';
     }
 
@@ -19,6 +19,10 @@ document.addEventListener('DOMContentLoaded', function() {
         return;
     }
 
+    // 当前显示的进程（进程名 -> 进程信息）以及进程状态推送连接
+    let currentProcesses = new Map();
+    let processStream = null;
+
     // 主机选择变更事件
     hostSelect.addEventListener('change', function() {
         console.log('Host selected:', this.value);
@@ -26,6 +30,7 @@ document.addEventListener('DOMContentLoaded', function() {
             loadProcessList(this.value);
             refreshBtn.disabled = false;
         } else {
+            stopWatching();
             clearProcessTable();
             refreshBtn.disabled = true;
         }
@@ -38,7 +43,7 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log('Selected host ID:', selectedHostId);
         
         if (selectedHostId) {
-            loadProcessList(selectedHostId);
+            loadProcessList(selectedHostId, true);
             showSuccess('正在刷新服务列表...');
         } else {
             console.warn('No host selected when refresh clicked');
@@ -46,13 +51,14 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    // 加载进程列表
-    async function loadProcessList(hostId) {
+    // 加载进程列表；fresh 为 true 时跳过服务端的进程快照，实时获取
+    async function loadProcessList(hostId, fresh = false) {
         try {
             console.log('Loading process list for host:', hostId);
             processTableBody.innerHTML = '<tr><td colspan="6" class="text-center"><div class="spinner-border text-primary" role="status"><span class="visually-hidden">Loading...</span></div></td></tr>';
             
-            const url = `/api/processes?host_id=${hostId}`;
+            const url = `/api/processes?host_id=${encodeURIComponent(hostId)}&fields=name,statename,description,pid` +
+                (fresh ? '&fresh=1' : '');
             console.log('Fetching from URL:', url);
             
             const response = await fetch(url);
@@ -80,6 +86,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
             console.log('Found processes:', processes);
             updateProcessTable(processes);
+            watchProcessStates(hostId);
             
         } catch (error) {
             console.error('Error loading processes:', error);
@@ -109,10 +116,12 @@ document.addEventListener('DOMContentLoaded', function() {
 
             showSuccess(`Successfully ${action}ed ${processName}`);
             
-            // 延迟刷新列表，让进程有时间改变状态
-            setTimeout(() => {
-                loadProcessList(hostId);
-            }, 1000);
+            // 已订阅状态推送时由推送更新表格，否则延迟刷新列表，让进程有时间改变状态
+            if (!processStream) {
+                setTimeout(() => {
+                    loadProcessList(hostId, true);
+                }, 1000);
+            }
 
         } catch (error) {
             console.error(`Error ${action}ing process:`, error);
@@ -124,6 +133,7 @@ document.addEventListener('DOMContentLoaded', function() {
     function updateProcessTable(processes) {
         console.log('Updating process table with processes:', processes);
         processTableBody.innerHTML = '';
+        currentProcesses = new Map((processes || []).map(process => [process.name, process]));
         
         if (!processes || processes.length === 0) {
             processTableBody.innerHTML = '<tr><td colspan="6" class="text-center">No processes found</td></tr>';
@@ -141,49 +151,8 @@ document.addEventListener('DOMContentLoaded', function() {
         processes.forEach(process => {
             const row = document.createElement('tr');
             row.style.cursor = 'pointer'; // 添加手型光标
-            
-            // 状态样式
-            let statusBadge = '';
-            switch (process.statename) {
-                case 'RUNNING':
-                    statusBadge = 'bg-success';
-                    break;
-                case 'STOPPED':
-                    statusBadge = 'bg-danger';
-                    break;
-                default:
-                    statusBadge = 'bg-secondary';
-            }
-
-            row.innerHTML = `
-                <td onclick="event.stopPropagation()">
-                    <div class="form-check">
-                        <input type="checkbox" class="form-check-input service-checkbox" value="${process.name}">
-                    </div>
-                </td>
-                <td>${process.name}</td>
-                <td><span class="badge ${statusBadge}">${process.statename}</span></td>
-                <td>${process.description || '-'}</td>
-                <td>${process.pid || '-'}</td>
-                <td class="text-end">
-                    <div class="btn-group" role="group">
-                        <button type="button" class="btn btn-sm btn-success" 
-                                onclick="event.stopPropagation(); controlProcess('${hostSelect.value}', '${process.name}', 'start')" 
-                                ${process.statename === 'RUNNING' ? 'disabled' : ''}>
-                            <i class="bi bi-play-fill"></i> 启动
-                        </button>
-                        <button type="button" class="btn btn-sm btn-danger" 
-                                onclick="event.stopPropagation(); controlProcess('${hostSelect.value}', '${process.name}', 'stop')" 
-                                ${process.statename === 'STOPPED' ? 'disabled' : ''}>
-                            <i class="bi bi-stop-fill"></i> 停止
-                        </button>
-                        <button type="button" class="btn btn-sm btn-warning" 
-                                onclick="event.stopPropagation(); controlProcess('${hostSelect.value}', '${process.name}', 'restart')">
-                            <i class="bi bi-arrow-clockwise"></i> 重启
-                        </button>
-                    </div>
-                </td>
-            `;
+            row.dataset.process = process.name;
+            row.innerHTML = renderProcessRow(process);
 
             // 添加行点击事件
             row.addEventListener('click', function(e) {
@@ -219,6 +188,110 @@ document.addEventListener('DOMContentLoaded', function() {
         updateBatchButtons();
     }
 
+    // 生成进程行的内容
+    function renderProcessRow(process, checked = false) {
+        // 状态样式
+        let statusBadge = '';
+        switch (process.statename) {
+            case 'RUNNING':
+                statusBadge = 'bg-success';
+                break;
+            case 'STOPPED':
+                statusBadge = 'bg-danger';
+                break;
+            default:
+                statusBadge = 'bg-secondary';
+        }
+
+        return `
+            <td onclick="event.stopPropagation()">
+                <div class="form-check">
+                    <input type="checkbox" class="form-check-input service-checkbox" value="${process.name}" ${checked ? 'checked' : ''}>
+                </div>
+            </td>
+            <td>${process.name}</td>
+            <td><span class="badge ${statusBadge}">${process.statename}</span></td>
+            <td>${process.description || '-'}</td>
+            <td>${process.pid || '-'}</td>
+            <td class="text-end">
+                <div class="btn-group" role="group">
+                    <button type="button" class="btn btn-sm btn-success" 
+                            onclick="event.stopPropagation(); controlProcess('${hostSelect.value}', '${process.name}', 'start')" 
+                            ${process.statename === 'RUNNING' ? 'disabled' : ''}>
+                        <i class="bi bi-play-fill"></i> 启动
+                    </button>
+                    <button type="button" class="btn btn-sm btn-danger" 
+                            onclick="event.stopPropagation(); controlProcess('${hostSelect.value}', '${process.name}', 'stop')" 
+                            ${process.statename === 'STOPPED' ? 'disabled' : ''}>
+                        <i class="bi bi-stop-fill"></i> 停止
+                    </button>
+                    <button type="button" class="btn btn-sm btn-warning" 
+                            onclick="event.stopPropagation(); controlProcess('${hostSelect.value}', '${process.name}', 'restart')">
+                        <i class="bi bi-arrow-clockwise"></i> 重启
+                    </button>
+                </div>
+            </td>
+        `;
+    }
+
+    // 用推送的进程状态更新对应的行，保留复选框状态
+    function updateProcessRow(process) {
+        const row = processTableBody.querySelector(`tr[data-process="${CSS.escape(process.name)}"]`);
+        if (!row) {
+            return false;
+        }
+        const checkbox = row.querySelector('.service-checkbox');
+        row.innerHTML = renderProcessRow(process, checkbox && checkbox.checked);
+        return true;
+    }
+
+    // 订阅主机的进程状态变化，只更新状态发生变化的行
+    function watchProcessStates(hostId) {
+        stopWatching();
+        if (!window.EventSource) {
+            return;
+        }
+
+        processStream = new EventSource(`/api/processes/stream?host_id=${encodeURIComponent(hostId)}`);
+        processStream.addEventListener('snapshot', function(e) {
+            applyProcessChanges(JSON.parse(e.data).processes, [], true);
+        });
+        processStream.addEventListener('changed', function(e) {
+            const data = JSON.parse(e.data);
+            applyProcessChanges(data.processes, data.removed || [], false);
+        });
+        processStream.addEventListener('error', function(e) {
+            if (e.data) {
+                console.error('Process stream error:', JSON.parse(e.data).error);
+            }
+        });
+    }
+
+    // 停止进程状态推送
+    function stopWatching() {
+        if (processStream) {
+            processStream.close();
+            processStream = null;
+        }
+    }
+
+    // 应用推送的进程变化；进程增减时重绘表格，否则只更新对应的行
+    function applyProcessChanges(processes, removed, isSnapshot) {
+        const next = isSnapshot ? new Map() : new Map(currentProcesses);
+        removed.forEach(name => next.delete(name));
+        processes.forEach(process => next.set(process.name, process));
+
+        const membershipChanged = next.size !== currentProcesses.size ||
+            Array.from(next.keys()).some(name => !currentProcesses.has(name));
+        if (membershipChanged) {
+            updateProcessTable(Array.from(next.values()));
+            return;
+        }
+
+        currentProcesses = next;
+        processes.forEach(updateProcessRow);
+    }
+
     // 清空进程表格
     function clearProcessTable() {
         console.log('Clearing process table');
@@ -266,12 +339,38 @@ document.addEventListener('DOMContentLoaded', function() {
             if (!hostId || checkedBoxes.length === 0) return;
 
             const processNames = Array.from(checkedBoxes).map(cb => cb.value);
-            
+
             try {
-                for (const processName of processNames) {
-                    await controlProcess(hostId, processName, action);
+                // 所有选中的进程通过一次批量请求提交，服务端合并为一次 multicall
+                const response = await fetch('/api/processes/bulk', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({
+                        items: processNames.map(name => ({ host_id: hostId, process: name, action: action }))
+                    })
+                });
+
+                const data = await response.json();
+                if (!data.success) {
+                    throw new Error(data.error || `Failed to ${action} processes`);
+                }
+
+                if (data.data.failed > 0) {
+                    const failedNames = data.data.results
+                        .filter(result => !result.success)
+                        .map(result => `${result.process}: ${result.error}`);
+                    showError(`Failed to ${action} ${data.data.failed} processes: ${failedNames.join(', ')}`);
+                } else {
+                    showSuccess(`Successfully ${action}ed selected processes`);
+                }
+
+                if (!processStream) {
+                    setTimeout(() => {
+                        loadProcessList(hostId, true);
+                    }, 1000);
                 }
-                showSuccess(`Successfully ${action}ed selected processes`);
             } catch (error) {
                 console.error(`Error in batch ${action}:`, error);
                 showError(`Failed to ${action} some processes`);
@@ -0,0 +1,91 @@
+from typing import Any, Coroutine, Optional
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+
+class AsyncLoopRunner:
+    """在后台线程中运行的常驻事件循环
+
+    异步 supervisor 客户端的连接池绑定在这个事件循环上，
+    同步代码（Flask 请求、监控线程）通过 run 把协程提交进来并等待结果。
+    """
+
+    def __init__(self, name: str = 'async-rpc') -> None:
+        self.logger = logging.getLogger(__name__)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+        """提交协程，返回可在其他线程等待的 Future
+
+        协程在调用方上下文的副本中执行，使 RPC 计数等上下文变量在事件循环中可见。
+
+        Args:
+            coro: 要执行的协程
+
+        Returns:
+            concurrent.futures.Future: 协程结果
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        context = contextvars.copy_context()
+
+        def start() -> None:
+            if not future.set_running_or_notify_cancel():
+                coro.close()
+                return
+            task = self.loop.create_task(coro, context=context)
+
+            def done(task: asyncio.Task) -> None:
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result())
+
+            task.add_done_callback(done)
+
+        self.loop.call_soon_threadsafe(start)
+        return future
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """在事件循环中执行协程并阻塞等待结果
+
+        Args:
+            coro: 要执行的协程
+            timeout: 等待超时时间（秒），为 None 时一直等待
+
+        Returns:
+            Any: 协程的返回值
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError('AsyncLoopRunner.run cannot be called from its own event loop')
+        return self.submit(coro).result(timeout)
+
+    def stop(self) -> None:
+        """停止事件循环"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+_runner: Optional[AsyncLoopRunner] = None
+_runner_lock = threading.Lock()
+
+def get_async_runner() -> AsyncLoopRunner:
+    """获取进程级共享事件循环
+
+    Returns:
+        AsyncLoopRunner: 共享事件循环
+    """
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = AsyncLoopRunner()
+    return _runner
@@ -1,51 +1,212 @@
 import yaml
 import os
 import logging
-from typing import Dict, List, Optional, Any
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+def load_app_config() -> Dict[str, Any]:
+    """读取应用配置 config/app.yaml
+
+    Returns:
+        Dict[str, Any]: 应用配置，文件不存在或解析失败时返回空字典
+    """
+    config_path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        'config',
+        'app.yaml'
+    )
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+            return config if isinstance(config, dict) else {}
+    except Exception as e:
+        logging.warning(f"Failed to load app config: {str(e)}")
+        return {}
+
+# 优先使用 libyaml 的 C 实现，没有时退回纯 Python 实现
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# 主机配置的必填字段
+REQUIRED_HOST_FIELDS = ['ip', 'port', 'username', 'password']
+
+# 建立二级索引的字段
+INDEXED_FIELDS = ('tag', 'name', 'ip')
 
 class ConfigManager:
-    def __init__(self):
+    """hosts.yaml 的内存主机注册表
+
+    主机配置常驻内存并维护按标签、名称、IP 的二级索引；增删改直接修改内存中的条目，
+    再通过写临时文件 + rename 原子地持久化。文件的外部修改（手工编辑、从备份恢复）
+    通过比较 stat 签名发现，检查频率受 check_interval 限制。
+    """
+
+    def __init__(self, check_interval: Optional[float] = None):
         self.config_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config')
         self.hosts_file = os.path.join(self.config_dir, 'hosts.yaml')
-        self._hosts_cache = None
-        self._last_read_time = 0
+        if check_interval is None:
+            options = load_app_config().get('hosts_config') or {}
+            check_interval = float(options.get('check_interval', 2))
+        self.check_interval = check_interval
+        self._hosts: Optional[Dict[str, Dict[str, Any]]] = None
+        self._indexes: Dict[str, Dict[str, Set[str]]] = {field: {} for field in INDEXED_FIELDS}
+        self._file_signature: Optional[Tuple[int, int, int]] = None
+        self._last_check = 0.0
+        self._lock = threading.RLock()
         
         # 确保配置目录存在
         if not os.path.exists(self.config_dir):
             os.makedirs(self.config_dir)
-            
-        # 确保hosts配置文件存在
-        if not os.path.exists(self.hosts_file):
-            self.save_hosts({})
 
-    def _should_reload_config(self) -> bool:
-        """检查是否需要重新加载配置
+    def _get_file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """获取配置文件的 (inode, 大小, 修改时间)，文件不存在时返回 None
         
-        Returns:
-            bool: 是否需要重新加载
+        从备份恢复时 copy2 会保留旧的修改时间，因此不能只比较修改时间是否变大。
         """
-        if not os.path.exists(self.hosts_file):
-            return True
-            
-        current_mtime = os.path.getmtime(self.hosts_file)
-        return current_mtime > self._last_read_time
+        try:
+            stat = os.stat(self.hosts_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _ensure_loaded(self) -> Dict[str, Dict[str, Any]]:
+        """返回内存中的主机表，必要时从文件重新加载"""
+        now = time.monotonic()
+        if self._hosts is not None and now - self._last_check < self.check_interval:
+            return self._hosts
+
+        with self._lock:
+            if self._hosts is not None and now - self._last_check < self.check_interval:
+                return self._hosts
+            self._last_check = now
+            signature = self._get_file_signature()
+            if self._hosts is not None and signature == self._file_signature:
+                return self._hosts
+
+            if signature is None:
+                # 确保hosts配置文件存在
+                self._set_hosts({})
+                try:
+                    self._persist()
+                except Exception as e:
+                    logging.error(f"创建主机配置文件失败: {str(e)}")
+                return self._hosts
+
+            try:
+                with open(self.hosts_file, 'r', encoding='utf-8') as f:
+                    config = yaml.load(f, Loader=_YamlLoader) or {}
+                hosts = config.get('hosts', {}) if isinstance(config, dict) else {}
+                if not isinstance(hosts, dict):
+                    hosts = {}
+                self._set_hosts(hosts)
+                self._file_signature = signature
+                logging.info(f"Reloaded hosts configuration, found {len(hosts)} hosts")
+            except Exception as e:
+                logging.error(f"加载主机配置失败: {str(e)}")
+                if self._hosts is None:
+                    self._set_hosts({})
+            return self._hosts
+
+    def _set_hosts(self, hosts: Dict[str, Dict[str, Any]]) -> None:
+        """替换整个主机表并重建索引"""
+        self._hosts = hosts
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        for host_id, host in hosts.items():
+            self._index(host_id, host)
+
+    @staticmethod
+    def _index_keys(host: Dict[str, Any]) -> Dict[str, List[str]]:
+        """提取主机在各个索引中的键"""
+        tags = host.get('tags') or []
+        if isinstance(tags, str):
+            tags = [tags]
+        return {
+            'tag': [str(tag) for tag in tags],
+            'name': [str(host['name'])] if host.get('name') else [],
+            'ip': [str(host['ip'])] if host.get('ip') else []
+        }
+
+    def _index(self, host_id: str, host: Dict[str, Any]) -> None:
+        if not isinstance(host, dict):
+            return
+        for field, keys in self._index_keys(host).items():
+            index = self._indexes[field]
+            for key in keys:
+                index.setdefault(key, set()).add(host_id)
+
+    def _unindex(self, host_id: str, host: Dict[str, Any]) -> None:
+        if not isinstance(host, dict):
+            return
+        for field, keys in self._index_keys(host).items():
+            index = self._indexes[field]
+            for key in keys:
+                host_ids = index.get(key)
+                if host_ids is not None:
+                    host_ids.discard(host_id)
+                    if not host_ids:
+                        del index[key]
+
+    def _replace(self, host_id: str, old: Optional[Dict[str, Any]],
+                 new: Optional[Dict[str, Any]]) -> None:
+        """原地替换单个主机并更新索引，更新时保留主机在表中的顺序"""
+        if old is not None:
+            self._unindex(host_id, old)
+        if new is None:
+            self._hosts.pop(host_id, None)
+        else:
+            self._hosts[host_id] = new
+            self._index(host_id, new)
+
+    def _persist(self) -> None:
+        """将内存中的主机表原子地写入文件
+
+        Raises:
+            OSError: 写入失败，原文件保持不变
+        """
+        fd, tmp_path = tempfile.mkstemp(prefix='.hosts.', suffix='.yaml.tmp', dir=self.config_dir)
+        try:
+            # 保留原文件的权限，mkstemp 创建的文件默认只有属主可读写
+            if os.path.exists(self.hosts_file):
+                os.chmod(tmp_path, os.stat(self.hosts_file).st_mode & 0o777)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                yaml.dump({'hosts': self._hosts}, f, Dumper=_YamlDumper, allow_unicode=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.hosts_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # 记录自己写出的文件，避免下次检查时重新加载
+        self._file_signature = self._get_file_signature()
+        self._last_check = time.monotonic()
+
+    @staticmethod
+    def _validate_host(host_id: str, host: Dict[str, Any]) -> None:
+        """检查主机配置的必填字段
+
+        Raises:
+            ValueError: 缺少必填字段
+        """
+        if not isinstance(host, dict):
+            raise ValueError(f"Host {host_id} configuration must be a mapping")
+        missing = [field for field in REQUIRED_HOST_FIELDS if field not in host]
+        if missing:
+            raise ValueError(f"Host {host_id} missing required fields: {', '.join(missing)}")
 
     def get_all_hosts(self) -> Dict[str, Dict[str, Any]]:
         """获取所有主机配置
         
         Returns:
-            Dict[str, Dict[str, Any]]: 主机ID到主机配置的映射
+            Dict[str, Dict[str, Any]]: 主机ID到主机配置的映射。映射本身是浅拷贝，增删键不影响注册表；
+                但值是注册表中的主机字典本身，必须只读，修改主机请使用 update_host 或先用 get_host 取得副本
         """
         try:
-            if self._should_reload_config():
-                with open(self.hosts_file, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f) or {}
-                    self._hosts_cache = config.get('hosts', {})
-                    if not isinstance(self._hosts_cache, dict):
-                        self._hosts_cache = {}
-                    self._last_read_time = os.path.getmtime(self.hosts_file)
-                    logging.info(f"Reloaded hosts configuration, found {len(self._hosts_cache)} hosts")
-            return self._hosts_cache or {}
+            hosts = self._ensure_loaded()
+            with self._lock:
+                return dict(hosts)
         except Exception as e:
             logging.error(f"加载主机配置失败: {str(e)}")
             return {}
@@ -59,14 +220,91 @@ class ConfigManager:
         Returns:
             Optional[Dict[str, Any]]: 主机配置，如果不存在则返回 None
         """
-        hosts = self.get_all_hosts()
-        host = hosts.get(host_id)
+        host = self._ensure_loaded().get(host_id)
         if host:
             return {**host, 'id': host_id}
         return None
 
+    def find_hosts(self, tag: Optional[str] = None, name: Optional[str] = None,
+                   ip: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """通过二级索引查找主机，多个条件同时满足
+        
+        Args:
+            tag: 标签
+            name: 主机名称（精确匹配）
+            ip: 主机IP
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: 匹配的主机ID到主机配置的映射，没有条件时返回全部主机
+        """
+        hosts = self._ensure_loaded()
+        with self._lock:
+            matched: Optional[Set[str]] = None
+            for field, value in (('tag', tag), ('name', name), ('ip', ip)):
+                if value is None:
+                    continue
+                host_ids = self._indexes[field].get(str(value), set())
+                matched = set(host_ids) if matched is None else matched & host_ids
+                if not matched:
+                    return {}
+            if matched is None:
+                return dict(hosts)
+            return {host_id: hosts[host_id] for host_id in matched if host_id in hosts}
+
+    def list_hosts(self, limit: Optional[int] = None, after: Optional[str] = None,
+                   tag: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """按配置文件中的顺序分页列出主机
+        
+        Args:
+            limit: 最多返回的主机数，为 None 时不限制
+            after: 游标，返回该主机之后的主机
+            tag: 只返回带有该标签的主机
+            
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: (主机ID, 主机配置) 列表
+        """
+        hosts = self._ensure_loaded()
+        with self._lock:
+            host_ids = list(hosts)
+            if after is not None:
+                try:
+                    host_ids = host_ids[host_ids.index(after) + 1:]
+                except ValueError:
+                    host_ids = []
+            if tag is not None:
+                tagged = self._indexes['tag'].get(str(tag), set())
+                host_ids = [host_id for host_id in host_ids if host_id in tagged]
+            if limit is not None:
+                host_ids = host_ids[:limit]
+            return [(host_id, hosts[host_id]) for host_id in host_ids]
+
+    def count_hosts(self, tag: Optional[str] = None) -> int:
+        """获取主机数
+        
+        Args:
+            tag: 只统计带有该标签的主机
+            
+        Returns:
+            int: 主机数
+        """
+        hosts = self._ensure_loaded()
+        if tag is None:
+            return len(hosts)
+        with self._lock:
+            return len(self._indexes['tag'].get(str(tag), ()))
+
+    def get_tags(self) -> Dict[str, int]:
+        """获取所有标签及其主机数
+        
+        Returns:
+            Dict[str, int]: 标签到主机数的映射
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return {tag: len(host_ids) for tag, host_ids in sorted(self._indexes['tag'].items())}
+
     def save_hosts(self, hosts: Dict[str, Dict[str, Any]]) -> bool:
-        """保存主机配置
+        """用新的主机表整体替换当前配置
         
         Args:
             hosts: 主机配置字典，键为主机ID
@@ -77,17 +315,16 @@ class ConfigManager:
         try:
             # 验证主机配置
             for host_id, host in hosts.items():
-                required_fields = ['ip', 'port', 'username', 'password']
-                if not all(field in host for field in required_fields):
-                    missing = [field for field in required_fields if field not in host]
-                    raise ValueError(f"Host {host_id} missing required fields: {', '.join(missing)}")
+                self._validate_host(host_id, host)
 
-            with open(self.hosts_file, 'w', encoding='utf-8') as f:
-                yaml.dump({'hosts': hosts}, f, allow_unicode=True)
-            
-            # 强制下次重新加载配置
-            self._hosts_cache = None
-            self._last_read_time = 0
+            with self._lock:
+                previous = self._hosts
+                self._set_hosts(dict(hosts))
+                try:
+                    self._persist()
+                except Exception:
+                    self._set_hosts(previous or {})
+                    raise
             return True
         except Exception as e:
             logging.error(f"保存主机配置失败: {str(e)}")
@@ -103,15 +340,14 @@ class ConfigManager:
         Returns:
             bool: 是否添加成功
         """
-        hosts = self.get_all_hosts()
-        if host_id in hosts:
-            return False
-            
-        hosts[host_id] = host
-        return self.save_hosts(hosts)
+        self._ensure_loaded()
+        with self._lock:
+            if host_id in self._hosts:
+                return False
+            return self._apply(host_id, None, dict(host))
 
     def update_host(self, host_id: str, host: Dict[str, Any]) -> bool:
-        """更新主机
+        """更新主机，新配置与原配置合并
         
         Args:
             host_id: 主机ID
@@ -120,12 +356,12 @@ class ConfigManager:
         Returns:
             bool: 是否更新成功
         """
-        hosts = self.get_all_hosts()
-        if host_id not in hosts:
-            return False
-            
-        hosts[host_id].update(host)
-        return self.save_hosts(hosts)
+        self._ensure_loaded()
+        with self._lock:
+            current = self._hosts.get(host_id)
+            if current is None:
+                return False
+            return self._apply(host_id, current, {**current, **host})
 
     def delete_host(self, host_id: str) -> bool:
         """删除主机
@@ -136,9 +372,47 @@ class ConfigManager:
         Returns:
             bool: 是否删除成功
         """
-        hosts = self.get_all_hosts()
-        if host_id not in hosts:
+        self._ensure_loaded()
+        with self._lock:
+            current = self._hosts.get(host_id)
+            if current is None:
+                return False
+            return self._apply(host_id, current, None)
+
+    def _apply(self, host_id: str, current: Optional[Dict[str, Any]],
+               new: Optional[Dict[str, Any]]) -> bool:
+        """在内存中替换单个主机并持久化，持久化失败时回滚；调用方需持有锁"""
+        try:
+            if new is not None:
+                self._validate_host(host_id, new)
+            # 删除后重新插入会把主机放到表尾，回滚时需要按原顺序恢复
+            previous = dict(self._hosts) if new is None and current is not None else None
+            self._replace(host_id, current, new)
+            try:
+                self._persist()
+            except Exception:
+                if previous is not None:
+                    self._hosts.clear()
+                    self._hosts.update(previous)
+                    self._index(host_id, current)
+                else:
+                    self._replace(host_id, new, current)
+                raise
+            return True
+        except Exception as e:
+            logging.error(f"保存主机配置失败: {str(e)}")
             return False
-            
-        del hosts[host_id]
-        return self.save_hosts(hosts)
+
+def create_config_manager() -> ConfigManager:
+    """按 config/app.yaml 中 hosts_config.backend 创建主机注册表
+
+    Returns:
+        ConfigManager: yaml（默认）返回 ConfigManager，sqlite 返回 SQLiteConfigManager
+    """
+    backend = (load_app_config().get('hosts_config') or {}).get('backend', 'yaml')
+    if backend == 'sqlite':
+        from .sqlite_config import SQLiteConfigManager
+        return SQLiteConfigManager()
+    if backend != 'yaml':
+        logging.warning(f"Unknown hosts_config backend '{backend}', falling back to yaml")
+    return ConfigManager()
@@ -0,0 +1,99 @@
+from typing import Any, Callable, Dict, Hashable, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+import contextvars
+import logging
+import threading
+import time
+
+from .config import load_app_config
+
+class FanOutExecutor:
+    """有界并发扇出执行器
+
+    所有请求共享同一个线程池，线程数有上限；每次扇出有一个全局截止时间，
+    截止时间内没有完成的任务直接返回默认值，不会阻塞调用方。
+    """
+
+    def __init__(self, max_workers: int = 32, deadline: float = 5.0) -> None:
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='fanout'
+        )
+
+    def map(
+        self,
+        fn: Callable[[Any], Any],
+        items: Dict[Hashable, Any],
+        deadline: Optional[float] = None,
+        default: Any = None
+    ) -> Dict[Hashable, Any]:
+        """对每个元素并发执行 fn
+
+        Args:
+            fn: 对单个元素执行的函数
+            items: 键到参数的映射
+            deadline: 整个扇出的截止时间（秒），为 None 时使用默认值
+            default: 超时或出错的元素对应的结果
+
+        Returns:
+            Dict[Hashable, Any]: 键到结果的映射，包含 items 中的所有键
+        """
+        if not items:
+            return {}
+
+        deadline = self.deadline if deadline is None else deadline
+        started = time.monotonic()
+
+        # 每个任务复制一份上下文，使 RPC 计数等上下文变量在工作线程中可见
+        futures = {
+            self._executor.submit(contextvars.copy_context().run, fn, arg): key
+            for key, arg in items.items()
+        }
+        done, not_done = wait(futures, timeout=deadline)
+
+        results = {}
+        for future, key in futures.items():
+            if future in done:
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Fan-out task for {key} failed: {str(e)}")
+                    results[key] = default
+            else:
+                # 尚未开始的任务直接取消，已在运行的任务由 socket 超时兜底
+                future.cancel()
+                results[key] = default
+
+        if not_done:
+            self.logger.warning(
+                f"{len(not_done)}/{len(futures)} fan-out tasks missed the "
+                f"{deadline}s deadline ({time.monotonic() - started:.2f}s elapsed)"
+            )
+        return results
+
+    def shutdown(self) -> None:
+        """关闭线程池"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_executor: Optional[FanOutExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_fanout_executor() -> FanOutExecutor:
+    """获取进程级共享扇出执行器，首次调用时按 config/app.yaml 创建
+
+    Returns:
+        FanOutExecutor: 共享扇出执行器
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                options = load_app_config().get('status_check') or {}
+                _executor = FanOutExecutor(
+                    max_workers=int(options.get('max_workers', 32)),
+                    deadline=float(options.get('deadline', 5))
+                )
+    return _executor
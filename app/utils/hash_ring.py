@@ -0,0 +1,35 @@
+from typing import Dict, Iterable, List, Optional
+from bisect import bisect
+import hashlib
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class HashRing:
+    """一致性哈希环
+
+    每个节点在环上放置 virtual_nodes 个虚拟节点，键归属于顺时针方向的第一个虚拟节点。
+    节点增减时只有约 1/N 的键改变归属。环创建后不可修改，成员变化时创建新的环；
+    owner 的结果按键缓存。
+    """
+
+    def __init__(self, nodes: Iterable[str], virtual_nodes: int = 64) -> None:
+        self.nodes = tuple(sorted(set(nodes)))
+        points = sorted(
+            (_hash(f"{node}#{index}"), node)
+            for node in self.nodes
+            for index in range(virtual_nodes)
+        )
+        self._points: List[int] = [point for point, _ in points]
+        self._owners: List[str] = [node for _, node in points]
+        self._cache: Dict[str, str] = {}
+
+    def owner(self, key: str) -> Optional[str]:
+        """获取键所属的节点，环为空时返回 None"""
+        owner = self._cache.get(key)
+        if owner is None:
+            if not self._points:
+                return None
+            index = bisect(self._points, _hash(key)) % len(self._points)
+            owner = self._cache[key] = self._owners[index]
+        return owner
@@ -0,0 +1,299 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+import threading
+import time
+from flask import Flask, g, request
+
+# 默认的耗时直方图分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (指标名, 标签值) -> 计数器值，或直方图的 [各桶计数..., +Inf 计数, 总和]
+_Shard = Dict[Tuple[str, Tuple[str, ...]], Any]
+# 采集回调返回 (指标名, 类型, 说明, [(标签字典, 值)])
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+class MetricsRegistry:
+    """进程内指标注册表，以 Prometheus 文本格式导出
+
+    每个线程写自己的分片（threading.local），热路径上的计数和直方图观测不加锁；
+    只有线程第一次写入和导出时才获取锁。新线程注册分片和导出时，已退出线程的分片合并进
+    retired 分片后丢弃，即使没有抓取 /metrics，分片数量也不会随请求线程增长。
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, 'Metric'] = {}
+        self._collectors: List[Collector] = []
+        self._shards: List[Tuple[threading.Thread, _Shard]] = []
+        self._retired: _Shard = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def register(self, metric: 'Metric') -> 'Metric':
+        """注册指标，同名指标只保留第一个"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def add_collector(self, collector: Collector) -> None:
+        """注册导出时调用的采集回调，用于导出已有组件自己维护的统计（如连接池）"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def shard(self) -> _Shard:
+        """获取当前线程的分片"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._prune()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _prune(self) -> None:
+        """把已退出线程的分片合并进 retired 分片；调用方需持有锁"""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                _add_into(self._retired, shard)
+        self._shards = alive
+
+    def _merge(self) -> _Shard:
+        """合并所有分片；调用方需持有锁"""
+        self._prune()
+        merged: _Shard = {}
+        _add_into(merged, self._retired)
+        for _, shard in self._shards:
+            _add_into(merged, shard)
+        return merged
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式的指标
+
+        Returns:
+            str: text/plain; version=0.0.4 格式的指标
+        """
+        with self._lock:
+            merged = self._merge()
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        by_metric: Dict[str, List[Tuple[Tuple[str, ...], Any]]] = {}
+        for (name, labels), value in merged.items():
+            by_metric.setdefault(name, []).append((labels, value))
+
+        lines: List[str] = []
+        for metric in sorted(metrics, key=lambda metric: metric.name):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for labels, value in sorted(by_metric.get(metric.name, ())):
+                lines.extend(metric.render_samples(labels, value))
+
+        for collector in collectors:
+            for name, metric_type, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+class Metric:
+    """指标基类"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 registry: Optional[MetricsRegistry] = None) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.registry = registry or get_metrics()
+        self.registry.register(self)
+
+    def render_samples(self, labels: Tuple[str, ...], value: Any) -> List[str]:
+        return [f"{self.name}{self._labels(labels)} {_format_value(value)}"]
+
+    def _labels(self, labels: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = dict(zip(self.label_names, labels))
+        if extra:
+            pairs.update(extra)
+        return _format_labels(pairs)
+
+class Counter(Metric):
+    """单调递增的计数器"""
+
+    type = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """计数器加 amount
+
+        Args:
+            *labels: 与 label_names 一一对应的标签值
+            amount: 增量
+        """
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+class Histogram(Metric):
+    """分桶直方图"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 registry: Optional[MetricsRegistry] = None) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, label_names, registry)
+
+    def observe(self, value: float, *labels: str) -> None:
+        """记录一次观测值
+
+        Args:
+            value: 观测值，例如耗时（秒）
+            *labels: 与 label_names 一一对应的标签值
+        """
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        counts = shard.get(key)
+        if counts is None:
+            # 每个桶的计数（非累计）、+Inf 桶计数、总和
+            counts = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def time(self, *labels: str) -> '_Timer':
+        """返回记录代码块耗时的上下文管理器"""
+        return _Timer(self, labels)
+
+    def render_samples(self, labels: Tuple[str, ...], value: Any) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), value[:-1]):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _format_value(bound)
+            lines.append(f"{self.name}_bucket{self._labels(labels, {'le': le})} {cumulative}")
+        lines.append(f"{self.name}_sum{self._labels(labels)} {_format_value(value[-1])}")
+        lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]) -> None:
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> '_Timer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+def _add_into(target: _Shard, source: _Shard) -> None:
+    """把 source 分片的值加到 target 上"""
+    # dict.copy 在 GIL 下是原子的，写入线程可以同时继续增加新的键
+    for key, value in source.copy().items():
+        if isinstance(value, list):
+            existing = target.get(key)
+            if existing is None:
+                target[key] = list(value)
+            else:
+                for index, item in enumerate(value):
+                    existing[index] += item
+        else:
+            target[key] = target.get(key, 0) + value
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+def _escape(value: Any) -> str:
+    """转义标签值中的反斜杠、双引号和换行"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_metrics() -> MetricsRegistry:
+    """获取进程级指标注册表
+
+    Returns:
+        MetricsRegistry: 指标注册表
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
+
+# XML-RPC 调用；直方图只按方法分标签，避免主机数 × 分桶数的序列膨胀
+RPC_CALLS = Counter('supernova_rpc_calls_total', 'XML-RPC calls to supervisor', ('method', 'host'))
+RPC_ERRORS = Counter('supernova_rpc_errors_total', 'Failed XML-RPC calls (transport errors and faults)', ('method', 'host'))
+RPC_DURATION = Histogram('supernova_rpc_duration_seconds', 'XML-RPC call latency', ('method',))
+
+# 同步客户端创建连接时的重试
+CONNECT_RETRIES = Counter('supernova_connect_retries_total', 'Retries in SupervisorService._get_supervisor', ('host',))
+
+# 后台采集
+COLLECTOR_BATCH_DURATION = Histogram(
+    'supernova_collector_batch_duration_seconds', 'Duration of one background collection batch',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+COLLECTOR_HOSTS = Counter('supernova_collector_hosts_total', 'Background host collections by result', ('result',))
+
+# HTTP 请求
+HTTP_REQUESTS = Counter('supernova_http_requests_total', 'API requests', ('route', 'method', 'status'))
+HTTP_DURATION = Histogram('supernova_http_request_duration_seconds', 'API request latency', ('route', 'method'))
+
+def pool_collector(pools: Dict[str, Callable[[], Dict[str, Any]]]) -> Collector:
+    """把连接池的 get_stats 导出为指标
+
+    Args:
+        pools: 连接池名称到 get_stats 函数的映射
+
+    Returns:
+        Collector: 采集回调
+    """
+    def collect():
+        stats = {pool: get_stats() for pool, get_stats in pools.items()}
+        for stat, metric_type, help_text in (
+            ('hits', 'counter', 'Connections reused from the pool'),
+            ('misses', 'counter', 'New connections opened because no idle connection was usable'),
+            ('evictions', 'counter', 'Idle connections closed as stale'),
+            ('discards', 'counter', 'Connections discarded after an error'),
+            ('idle', 'gauge', 'Idle connections currently pooled')
+        ):
+            name = f"supernova_pool_{stat}" + ('_total' if metric_type == 'counter' else '_connections')
+            yield name, metric_type, help_text, [
+                ({'pool': pool}, values.get(stat, 0)) for pool, values in stats.items()
+            ]
+    return collect
+
+def setup_metrics(app: Flask) -> None:
+    """统计 API 蓝图中每个路由的请求数和耗时
+
+    Args:
+        app: Flask 应用
+    """
+    @app.before_request
+    def _start_timer():
+        if request.blueprint == 'api':
+            g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            HTTP_DURATION.observe(time.perf_counter() - start, route, request.method)
+            HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+        return response
@@ -1,26 +1,78 @@
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 import asyncio
+import concurrent.futures
+import heapq
+import random
 import threading
 import time
 from datetime import datetime
 from flask import Flask
 from ..services.supervisor_service import SupervisorService
+from ..services.async_supervisor_service import AsyncSupervisorService
+from ..services.snapshots import ProcessSnapshotStore
+from .config import load_app_config
+from .metrics import COLLECTOR_BATCH_DURATION, COLLECTOR_HOSTS
+
+# 尚未采集过的主机的结果摘要
+_UNSEEN = object()
 
 class HostMonitor:
-    def __init__(self, app: Flask, supervisor_service: SupervisorService) -> None:
+    def __init__(self, app: Flask, supervisor_service: SupervisorService,
+                 async_service: Optional[AsyncSupervisorService] = None) -> None:
         self.app: Flask = app
         self.supervisor_service: SupervisorService = supervisor_service
+        # 所有主机的检查在同一个事件循环中并发执行，不再为每个主机占用线程
+        self.async_service: AsyncSupervisorService = async_service or AsyncSupervisorService(
+            supervisor_service.config_manager
+        )
         self.monitoring: bool = False
+        # 多 worker 部署时由 WorkerCoordinator 设置：本进程不采集，但共享状态仍在更新
+        self.replicating: bool = False
+        # 分片模式下只采集 host_filter(host_id) 为 True 的主机
+        self.host_filter: Optional[Callable[[str], bool]] = None
         self.monitor_thread: Optional[threading.Thread] = None
         self.host_status: Dict[str, Dict[str, Any]] = {}
+        self.process_snapshots: ProcessSnapshotStore = ProcessSnapshotStore()
+        self._status_listeners: List[Callable[[str, bool], None]] = []
+        self._sweep_listeners: List[Callable[[], None]] = []
         self._lock = threading.Lock()
 
+        # 后台采集：每个主机按自己的自适应间隔（加随机抖动）调度，同时采集的主机数有上限
+        options = load_app_config().get('collector') or {}
+        self.interval = float(options.get('interval', 60))
+        self.min_interval = float(options.get('min_interval', 15))
+        self.max_interval = max(float(options.get('max_interval', 300)), self.min_interval)
+        self.backoff = max(float(options.get('backoff', 1.5)), 1.0)
+        self.jitter = float(options.get('jitter', 0.2))
+        self.max_workers = int(options.get('max_workers', 64))
+        # 到期时间堆 (monotonic 时间, host_id)；主机重新调度时旧条目留在堆中，
+        # 与 _next_due 不一致的条目在出堆时丢弃
+        self._queue: List[Tuple[float, str]] = []
+        self._next_due: Dict[str, float] = {}
+        self._intervals: Dict[str, float] = {}
+        # 上次采集结果的摘要，用于判断主机是否发生变化；None 表示上次采集失败
+        self._signatures: Dict[str, Optional[int]] = {}
+        self._in_flight: Set[str] = set()
+        self._batches: List[concurrent.futures.Future] = []
+        self._schedule_lock = threading.Lock()
+        self._workers = asyncio.Semaphore(self.max_workers)
+        self._stop_event = threading.Event()
+
+    def add_status_listener(self, listener: Callable[[str, bool], None]) -> None:
+        """注册主机状态回调 listener(host_id, status)，每次检查后调用"""
+        self._status_listeners.append(listener)
+
+    def add_sweep_listener(self, listener: Callable[[], None]) -> None:
+        """注册每轮检查结束后的回调"""
+        self._sweep_listeners.append(listener)
+
     def start_monitoring(self) -> None:
         """启动监控"""
         if self.monitoring:
             return
         
         self.monitoring = True
+        self._stop_event.clear()
         self.monitor_thread = threading.Thread(target=self._monitor_loop)
         self.monitor_thread.daemon = True
         self.monitor_thread.start()
@@ -28,61 +80,217 @@ class HostMonitor:
     def stop_monitoring(self) -> None:
         """停止监控"""
         self.monitoring = False
+        self._stop_event.set()
         if self.monitor_thread:
             self.monitor_thread.join()
 
+    def has_live_snapshots(self) -> bool:
+        """进程快照是否由后台采集持续更新（本进程采集，或从采集进程同步）"""
+        return self.monitoring or self.replicating
+
+    def notify_sweep(self) -> None:
+        """通知每轮检查结束的监听者"""
+        for listener in self._sweep_listeners:
+            try:
+                listener()
+            except Exception as e:
+                self.app.logger.error(f"Sweep listener failed: {e}")
+
+    def collect_metrics(self):
+        """导出采集调度状态，作为 MetricsRegistry 的采集回调"""
+        with self._schedule_lock:
+            in_flight = len(self._in_flight)
+            scheduled = len(self._next_due) + in_flight
+            intervals = list(self._intervals.values())
+        yield 'supernova_collector_scheduled_hosts', 'gauge', 'Hosts on the collection schedule', [({}, scheduled)]
+        yield 'supernova_collector_in_flight_hosts', 'gauge', 'Hosts currently being collected', [({}, in_flight)]
+        yield 'supernova_collector_mean_interval_seconds', 'gauge', 'Mean adaptive collection interval', [
+            ({}, round(sum(intervals) / len(intervals), 3) if intervals else 0)
+        ]
+
+    def get_bounds(self, host_config: Dict[str, Any]) -> Tuple[float, float]:
+        """获取主机采集间隔的下限和上限（秒）
+        
+        主机配置中的 collect_interval 表示固定间隔；collect_min_interval、collect_max_interval
+        分别覆盖全局的下限和上限。
+        """
+        try:
+            fixed = host_config.get('collect_interval')
+            if fixed:
+                fixed = max(float(fixed), 1.0)
+                return fixed, fixed
+            floor = max(float(host_config.get('collect_min_interval') or self.min_interval), 1.0)
+            ceiling = max(float(host_config.get('collect_max_interval') or self.max_interval), floor)
+            return floor, ceiling
+        except (TypeError, ValueError):
+            return self.min_interval, self.max_interval
+
+    def _next_interval(self, host_id: str, host_config: Dict[str, Any], changed: bool) -> float:
+        """根据本次采集是否发现变化调整主机的采集间隔；调用方需持有 _schedule_lock
+        
+        发生变化（上下线、进程状态或 pid 变化）或采集失败时回到下限，否则乘以 backoff，
+        长期稳定的主机逐步放宽到上限。
+        """
+        floor, ceiling = self.get_bounds(host_config)
+        interval = floor if changed else self._intervals.get(host_id, self.interval) * self.backoff
+        interval = min(max(interval, floor), ceiling)
+        self._intervals[host_id] = interval
+        return interval
+
+    def _push(self, host_id: str, due: float) -> None:
+        """安排主机的下次采集；调用方需持有 _schedule_lock"""
+        self._next_due[host_id] = due
+        heapq.heappush(self._queue, (due, host_id))
+
+    def _detect_change(self, host_id: str, processes: Optional[List[Dict[str, Any]]]) -> bool:
+        """记录本次采集结果的摘要，返回与上次相比是否有变化；首次采集不算变化
+        
+        采集失败总是视为变化，持续失败的主机保持在间隔下限重试，不会逐步放宽到上限。
+        
+        Args:
+            host_id: 主机ID
+            processes: 进程列表，为 None 表示采集失败
+        """
+        signature = None if processes is None else hash(tuple(
+            (process.get('name'), process.get('statename'), process.get('pid')) for process in processes
+        ))
+        with self._schedule_lock:
+            previous = self._signatures.get(host_id, _UNSEEN)
+            self._signatures[host_id] = signature
+        return signature is None or (previous is not _UNSEEN and previous != signature)
+
+    def _expedite(self, host_id: str) -> None:
+        """把主机的下次采集提前到现在，用于其他途径（如实时探测）发现状态变化时"""
+        if not self.monitoring:
+            return
+        with self._schedule_lock:
+            if host_id in self._next_due and host_id not in self._in_flight:
+                self._push(host_id, time.monotonic())
+
     async def _check_host_async(self, host_id: str, host_config: Dict[str, Any]) -> None:
-        """异步检查单个主机状态
+        """采集单个主机的连通性和进程快照
+        
+        只调用一次 getAllProcessInfo：调用成功即视为主机在线，同时得到进程列表。
         
         Args:
             host_id: 主机ID
             host_config: 主机配置信息
         """
+        changed = False
         try:
-            status = await asyncio.to_thread(
-                self.supervisor_service.check_connection,
-                host_config
-            )
-            self._update_host_status(host_id, status)
+            async with self._workers:
+                processes = await self.async_service.fetch_processes(host_id)
         except Exception as e:
-            self.app.logger.error(f"Error checking host {host_id}: {e}")
-            self._update_host_status(host_id, False)
+            self.app.logger.debug(f"Error collecting host {host_id}: {e}")
+            COLLECTOR_HOSTS.inc('failed')
+            changed = self._detect_change(host_id, None)
+            self.update_host_status(host_id, False)
+            self.process_snapshots.mark_unavailable(host_id, str(e) or 'Host is offline')
+        else:
+            COLLECTOR_HOSTS.inc('ok')
+            changed = self._detect_change(host_id, processes)
+            self.update_host_status(host_id, True)
+            self.process_snapshots.update(host_id, processes)
+        finally:
+            with self._schedule_lock:
+                self._in_flight.discard(host_id)
+                interval = self._next_interval(host_id, host_config, changed)
+                self._push(host_id, time.monotonic() + interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    async def _collect(self, hosts: Dict[str, Dict[str, Any]]) -> None:
+        """并发采集一批到期的主机"""
+        with COLLECTOR_BATCH_DURATION.time():
+            await asyncio.gather(*(
+                self._check_host_async(host_id, host_config)
+                for host_id, host_config in hosts.items()
+            ))
+
+    def _schedule_due_hosts(self, hosts: Dict[str, Dict[str, Any]], now: float) -> Dict[str, Dict[str, Any]]:
+        """同步调度表与主机配置，并从到期时间堆中取出到期的主机
+        
+        新出现的主机以 interval 为初始间隔，在一个抖动窗口内随机安排首次采集，避免启动时所有主机
+        同时被访问。取出的主机在采集完成后才按新的间隔重新入堆，因此同一主机同时只有一次采集。
+        
+        Args:
+            hosts: 当前配置中的所有主机
+            now: 当前的 time.monotonic()
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: 本轮需要采集的主机
+        """
+        due = {}
+        with self._schedule_lock:
+            for host_id in self._next_due.keys() - hosts.keys():
+                del self._next_due[host_id]
+                self._intervals.pop(host_id, None)
+                self._signatures.pop(host_id, None)
+            for host_id in hosts.keys() - self._next_due.keys() - self._in_flight:
+                floor, ceiling = self.get_bounds(hosts[host_id])
+                interval = self._intervals[host_id] = min(max(self.interval, floor), ceiling)
+                self._push(host_id, now + random.uniform(0, interval * self.jitter))
+            while self._queue and self._queue[0][0] <= now:
+                next_due, host_id = heapq.heappop(self._queue)
+                if self._next_due.get(host_id) != next_due:
+                    # 主机已删除或已重新调度
+                    continue
+                del self._next_due[host_id]
+                self._in_flight.add(host_id)
+                due[host_id] = hosts[host_id]
+        return due
+
+    def _finish_batches(self) -> None:
+        """处理已完成的采集批次，有批次完成时通知监听者"""
+        finished = [batch for batch in self._batches if batch.done()]
+        if not finished:
+            return
+        self._batches = [batch for batch in self._batches if not batch.done()]
+        for batch in finished:
+            if batch.exception() is not None:
+                self.app.logger.error(f"Collector batch failed: {batch.exception()}")
+        self.notify_sweep()
 
     def _monitor_loop(self) -> None:
-        """监控循环"""
-        while self.monitoring:
+        """采集循环
+        
+        等待到堆顶主机到期（最长 1 秒，以便及时发现配置变化），把到期的主机作为一批提交到共享事件循环，
+        不等待其完成，因此慢主机不会推迟其他主机的采集；同一主机同时只有一次采集在进行。
+        """
+        while not self._stop_event.is_set():
             with self.app.app_context():
+                now = time.monotonic()
                 hosts = self.supervisor_service.config_manager.get_all_hosts()
-                
-                # 创建异步任务列表
-                async def check_all_hosts():
-                    tasks = [
-                        self._check_host_async(host_id, host_config)
-                        for host_id, host_config in hosts.items()
-                    ]
-                    await asyncio.gather(*tasks)
-
-                # 运行异步任务
-                asyncio.run(check_all_hosts())
-            
-            time.sleep(60)  # 每分钟检查一次
+                host_filter = self.host_filter
+                if host_filter is not None:
+                    hosts = {host_id: host for host_id, host in hosts.items() if host_filter(host_id)}
+                due = self._schedule_due_hosts(hosts, now)
+                if due:
+                    # 在共享事件循环中运行，连接池在各轮采集之间复用
+                    self._batches.append(self.async_service.submit(self._collect(due)))
+                self._finish_batches()
+
+            with self._schedule_lock:
+                next_due = self._queue[0][0] if self._queue else now + 1
+            self._stop_event.wait(min(max(next_due - time.monotonic(), 0.05), 1.0))
 
-    def _update_host_status(self, host_id: str, status: bool) -> None:
+    def update_host_status(self, host_id: str, status: bool, checked_at: Optional[datetime] = None,
+                           changed_at: Optional[datetime] = None) -> None:
         """更新主机状态
         
         Args:
             host_id: 主机ID
             status: 主机状态
+            checked_at: 检查时间，默认为当前时间
+            changed_at: 状态变化时间，默认根据与上次状态的比较得出；从共享状态同步时由采集进程提供
         """
         with self._lock:
-            now = datetime.now()
+            now = checked_at or datetime.now()
             prev_status = self.host_status.get(host_id, {}).get('status')
             
             self.host_status[host_id] = {
                 'status': status,
                 'last_check': now,
-                'last_change': now if status != prev_status else 
-                              self.host_status.get(host_id, {}).get('last_change', now)
+                'last_change': changed_at or (now if status != prev_status else
+                                              self.host_status.get(host_id, {}).get('last_change', now))
             }
 
             # 如果状态发生变化，记录日志
@@ -91,6 +299,16 @@ class HostMonitor:
                     f"Host {host_id} status changed to: {'online' if status else 'offline'}"
                 )
 
+        # 实时探测等其他途径发现的状态变化让后台采集尽快确认（采集中的主机不受影响）
+        if prev_status is not None and status != prev_status:
+            self._expedite(host_id)
+
+        for listener in self._status_listeners:
+            try:
+                listener(host_id, status)
+            except Exception as e:
+                self.app.logger.error(f"Status listener failed for host {host_id}: {e}")
+
     def get_host_status(self, host_id: str) -> Dict[str, Any]:
         """获取主机状态
         
@@ -107,6 +325,24 @@ class HostMonitor:
                 'last_change': None
             })
 
+    def get_cached_status(self, host_id: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """获取缓存的主机状态
+        
+        Args:
+            host_id: 主机ID
+            max_age: 可接受的最大缓存时间（秒），为 None 时不限制
+            
+        Returns:
+            Optional[Dict[str, Any]]: 缓存的状态信息；没有缓存或缓存过期时返回 None
+        """
+        with self._lock:
+            entry = self.host_status.get(host_id)
+            if entry is None:
+                return None
+            if max_age is not None and (datetime.now() - entry['last_check']).total_seconds() > max_age:
+                return None
+            return dict(entry)
+
     def get_all_status(self) -> Dict[str, Dict[str, Any]]:
         """获取所有主机状态
         
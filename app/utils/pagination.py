@@ -0,0 +1,79 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 单页最多返回的条目数
+MAX_PAGE_SIZE = 1000
+
+def parse_limit(value: Optional[str]) -> Optional[int]:
+    """解析 limit 查询参数
+
+    Args:
+        value: 原始参数值，为 None 或空时表示不分页
+
+    Returns:
+        Optional[int]: 每页条目数
+
+    Raises:
+        ValueError: 不是 1 到 MAX_PAGE_SIZE 之间的整数
+    """
+    if value in (None, ''):
+        return None
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"limit must be an integer, got {value!r}")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+def parse_list(value: Optional[str]) -> Optional[List[str]]:
+    """解析逗号分隔的查询参数，例如 fields=name,status 或 statename=RUNNING,FATAL"""
+    if not value:
+        return None
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    return items or None
+
+def paginate(items: Sequence[Any], key: Callable[[Any], str], limit: Optional[int],
+             cursor: Optional[str]) -> Tuple[List[Any], Optional[str]]:
+    """按游标对已过滤的列表分页
+
+    游标为上一页最后一个条目的键，返回该条目之后的 limit 个条目。
+
+    Args:
+        items: 已排序、已过滤的条目
+        key: 获取条目键的函数
+        limit: 每页条目数，为 None 时返回全部
+        cursor: 上一页返回的 next_cursor
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: (本页条目, 下一页游标)；没有下一页时游标为 None
+
+    Raises:
+        ValueError: 游标对应的条目已不存在
+    """
+    start = 0
+    if cursor is not None:
+        for position, item in enumerate(items):
+            if key(item) == cursor:
+                start = position + 1
+                break
+        else:
+            raise ValueError(f"Invalid cursor: {cursor}")
+    if limit is None:
+        return list(items[start:]), None
+    page = list(items[start:start + limit])
+    next_cursor = key(page[-1]) if page and start + limit < len(items) else None
+    return page, next_cursor
+
+def project(items: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]]) -> List[Dict[str, Any]]:
+    """只保留指定字段
+
+    Args:
+        items: 条目列表
+        fields: 需要的字段，为 None 时原样返回
+
+    Returns:
+        List[Dict[str, Any]]: 投影后的条目
+    """
+    if not fields:
+        return list(items)
+    return [{field: item[field] for field in fields if field in item} for item in items]
@@ -0,0 +1,63 @@
+from typing import Dict, Optional
+from contextvars import ContextVar
+import threading
+from flask import Flask
+
+class RpcCounter:
+    """统计单个 API 请求内发出的 XML-RPC 调用次数"""
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.methods: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str) -> None:
+        """记录一次 RPC 调用
+
+        Args:
+            method: XML-RPC 方法名
+        """
+        with self._lock:
+            self.count += 1
+            self.methods[method] = self.methods.get(method, 0) + 1
+
+_current_counter: ContextVar[Optional[RpcCounter]] = ContextVar('rpc_counter', default=None)
+
+def start_rpc_counter() -> RpcCounter:
+    """为当前上下文创建新的 RPC 计数器
+
+    Returns:
+        RpcCounter: 新的计数器
+    """
+    counter = RpcCounter()
+    _current_counter.set(counter)
+    return counter
+
+def get_rpc_counter() -> Optional[RpcCounter]:
+    """获取当前上下文的 RPC 计数器，不在请求中时返回 None"""
+    return _current_counter.get()
+
+def record_rpc(method: str) -> None:
+    """在当前上下文的计数器上记录一次 RPC 调用
+
+    Args:
+        method: XML-RPC 方法名
+    """
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.record(method)
+
+def setup_rpc_counter(app: Flask) -> None:
+    """为每个请求启用 RPC 计数，并通过 X-RPC-Count 响应头返回"""
+    @app.before_request
+    def _start_counter():
+        start_rpc_counter()
+
+    @app.after_request
+    def _report_counter(response):
+        counter = get_rpc_counter()
+        if counter is not None:
+            response.headers['X-RPC-Count'] = str(counter.count)
+            if counter.count:
+                app.logger.debug(f"RPC calls for this request: {counter.methods}")
+        return response
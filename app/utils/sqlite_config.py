@@ -0,0 +1,383 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from .config import ConfigManager, _YamlLoader, load_app_config
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS hosts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    host_id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    ip TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_hosts_name ON hosts (name);
+CREATE INDEX IF NOT EXISTS idx_hosts_ip ON hosts (ip);
+CREATE TABLE IF NOT EXISTS host_tags (
+    tag TEXT NOT NULL,
+    host_id TEXT NOT NULL REFERENCES hosts (host_id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, host_id)
+);
+CREATE INDEX IF NOT EXISTS idx_host_tags_host ON host_tags (host_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+'''
+
+class SQLiteConfigManager(ConfigManager):
+    """基于 SQLite 的主机注册表，接口与 ConfigManager 相同
+
+    每台主机一行，增删改都是单行事务，不再重写整个文件；标签、名称、IP 查找走索引，
+    list_hosts 按插入顺序分页。get_all_hosts 的结果在内存中缓存，每次写入递增 meta 表中的
+    generation，其他进程的修改通过比较 generation 发现，检查频率受 check_interval 限制。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, check_interval: Optional[float] = None):
+        options = load_app_config().get('hosts_config') or {}
+        super().__init__(check_interval=check_interval)
+        self.db_path = db_path or os.path.join(self.config_dir, options.get('sqlite_path', 'hosts.db'))
+        self._local = threading.local()
+        self._generation: Optional[int] = None
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # 自动提交模式，事务由 _Transaction 显式开启
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def _read_generation(self) -> int:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row['value'] if row else 0
+
+    def _ensure_loaded(self) -> Dict[str, Dict[str, Any]]:
+        """返回缓存的主机表，数据库被修改过时重新加载"""
+        now = time.monotonic()
+        if self._hosts is not None and now - self._last_check < self.check_interval:
+            return self._hosts
+
+        with self._lock:
+            if self._hosts is not None and now - self._last_check < self.check_interval:
+                return self._hosts
+            self._last_check = now
+            generation = self._read_generation()
+            if self._hosts is not None and generation == self._generation:
+                return self._hosts
+
+            rows = self._connect().execute('SELECT host_id, data FROM hosts ORDER BY seq').fetchall()
+            self._hosts = {row['host_id']: json.loads(row['data']) for row in rows}
+            self._generation = generation
+            logging.info(f"Reloaded hosts from {self.db_path}, found {len(self._hosts)} hosts")
+            return self._hosts
+
+    def _invalidate(self) -> None:
+        """本进程写入后让缓存在下次访问时重新加载"""
+        with self._lock:
+            self._hosts = None
+            self._generation = None
+
+    def get_host(self, host_id: str) -> Optional[Dict[str, Any]]:
+        """获取指定主机配置
+
+        Args:
+            host_id: 主机ID
+
+        Returns:
+            Optional[Dict[str, Any]]: 主机配置，如果不存在则返回 None
+        """
+        try:
+            row = self._connect().execute(
+                'SELECT data FROM hosts WHERE host_id = ?', (host_id,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"加载主机配置失败: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return {**json.loads(row['data']), 'id': host_id}
+
+    def find_hosts(self, tag: Optional[str] = None, name: Optional[str] = None,
+                   ip: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """通过索引查找主机，多个条件同时满足
+
+        Args:
+            tag: 标签
+            name: 主机名称（精确匹配）
+            ip: 主机IP
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 匹配的主机ID到主机配置的映射，没有条件时返回全部主机
+        """
+        if tag is None and name is None and ip is None:
+            return self.get_all_hosts()
+        sql, params = self._build_filter(tag, name, ip)
+        rows = self._connect().execute(
+            f'SELECT host_id, data FROM hosts {sql} ORDER BY seq', params
+        ).fetchall()
+        return {row['host_id']: json.loads(row['data']) for row in rows}
+
+    def list_hosts(self, limit: Optional[int] = None, after: Optional[str] = None,
+                   tag: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """按插入顺序分页列出主机
+
+        Args:
+            limit: 最多返回的主机数，为 None 时不限制
+            after: 游标，返回该主机之后的主机
+            tag: 只返回带有该标签的主机
+
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: (主机ID, 主机配置) 列表
+        """
+        sql, params = self._build_filter(tag, None, None)
+        if after is not None:
+            sql += (' AND ' if sql else 'WHERE ') + 'seq > (SELECT seq FROM hosts WHERE host_id = ?)'
+            params.append(after)
+        sql += ' ORDER BY seq'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        rows = self._connect().execute(f'SELECT host_id, data FROM hosts {sql}', params).fetchall()
+        return [(row['host_id'], json.loads(row['data'])) for row in rows]
+
+    def count_hosts(self, tag: Optional[str] = None) -> int:
+        """获取主机数
+
+        Args:
+            tag: 只统计带有该标签的主机
+
+        Returns:
+            int: 主机数
+        """
+        sql, params = self._build_filter(tag, None, None)
+        return self._connect().execute(f'SELECT COUNT(*) FROM hosts {sql}', params).fetchone()[0]
+
+    def get_tags(self) -> Dict[str, int]:
+        """获取所有标签及其主机数
+
+        Returns:
+            Dict[str, int]: 标签到主机数的映射
+        """
+        rows = self._connect().execute(
+            'SELECT tag, COUNT(*) AS hosts FROM host_tags GROUP BY tag ORDER BY tag'
+        ).fetchall()
+        return {row['tag']: row['hosts'] for row in rows}
+
+    @staticmethod
+    def _build_filter(tag: Optional[str], name: Optional[str], ip: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if tag is not None:
+            clauses.append('host_id IN (SELECT host_id FROM host_tags WHERE tag = ?)')
+            params.append(str(tag))
+        if name is not None:
+            clauses.append('name = ?')
+            params.append(str(name))
+        if ip is not None:
+            clauses.append('ip = ?')
+            params.append(str(ip))
+        return ('WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def save_hosts(self, hosts: Dict[str, Dict[str, Any]]) -> bool:
+        """用新的主机表整体替换当前配置（单个事务）
+
+        Args:
+            hosts: 主机配置字典，键为主机ID
+
+        Returns:
+            bool: 是否保存成功
+        """
+        try:
+            for host_id, host in hosts.items():
+                self._validate_host(host_id, host)
+            with self._transaction() as conn:
+                conn.execute('DELETE FROM host_tags')
+                conn.execute('DELETE FROM hosts')
+                for host_id, host in hosts.items():
+                    self._insert(conn, host_id, host)
+            return True
+        except Exception as e:
+            logging.error(f"保存主机配置失败: {str(e)}")
+            return False
+
+    def add_host(self, host_id: str, host: Dict[str, Any]) -> bool:
+        """添加主机
+
+        Args:
+            host_id: 主机ID
+            host: 主机配置信息
+
+        Returns:
+            bool: 是否添加成功，主机已存在时返回 False
+        """
+        try:
+            self._validate_host(host_id, host)
+            with self._transaction() as conn:
+                self._insert(conn, host_id, host)
+            return True
+        except sqlite3.IntegrityError:
+            return False
+        except Exception as e:
+            logging.error(f"保存主机配置失败: {str(e)}")
+            return False
+
+    def update_host(self, host_id: str, host: Dict[str, Any]) -> bool:
+        """更新主机，新配置与原配置合并
+
+        Args:
+            host_id: 主机ID
+            host: 新的主机配置信息
+
+        Returns:
+            bool: 是否更新成功，主机不存在时返回 False
+        """
+        try:
+            with self._transaction() as conn:
+                row = conn.execute('SELECT data FROM hosts WHERE host_id = ?', (host_id,)).fetchone()
+                if row is None:
+                    return False
+                merged = {**json.loads(row['data']), **host}
+                self._validate_host(host_id, merged)
+                updated = conn.execute(
+                    'UPDATE hosts SET name = ?, ip = ?, data = ? WHERE host_id = ?',
+                    (merged.get('name'), merged.get('ip'), self._dumps(merged), host_id)
+                ).rowcount
+                if not updated:
+                    return False
+                conn.execute('DELETE FROM host_tags WHERE host_id = ?', (host_id,))
+                self._insert_tags(conn, host_id, merged)
+            return True
+        except Exception as e:
+            logging.error(f"保存主机配置失败: {str(e)}")
+            return False
+
+    def delete_host(self, host_id: str) -> bool:
+        """删除主机
+
+        Args:
+            host_id: 主机ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        try:
+            with self._transaction() as conn:
+                deleted = conn.execute('DELETE FROM hosts WHERE host_id = ?', (host_id,)).rowcount
+            return deleted > 0
+        except Exception as e:
+            logging.error(f"保存主机配置失败: {str(e)}")
+            return False
+
+    def import_yaml(self, path: Optional[str] = None, replace: bool = False) -> int:
+        """从 hosts.yaml 导入主机
+
+        Args:
+            path: YAML 文件路径，默认为 config/hosts.yaml
+            replace: 为 True 时清空现有主机；否则跳过已存在的主机
+
+        Returns:
+            int: 导入的主机数
+
+        Raises:
+            ValueError: 文件格式或主机配置无效
+        """
+        path = path or os.path.join(self.config_dir, 'hosts.yaml')
+        with open(path, 'r', encoding='utf-8') as f:
+            config = yaml.load(f, Loader=_YamlLoader) or {}
+        hosts = config.get('hosts', {}) if isinstance(config, dict) else None
+        if not isinstance(hosts, dict):
+            raise ValueError(f"{path} does not contain a hosts mapping")
+        for host_id, host in hosts.items():
+            self._validate_host(host_id, host)
+
+        with self._transaction() as conn:
+            if replace:
+                conn.execute('DELETE FROM host_tags')
+                conn.execute('DELETE FROM hosts')
+            imported = 0
+            for host_id, host in hosts.items():
+                if not replace and conn.execute(
+                    'SELECT 1 FROM hosts WHERE host_id = ?', (host_id,)
+                ).fetchone():
+                    continue
+                self._insert(conn, host_id, host)
+                imported += 1
+        logging.info(f"Imported {imported} hosts from {path} into {self.db_path}")
+        return imported
+
+    def _transaction(self) -> '_Transaction':
+        return _Transaction(self)
+
+    @classmethod
+    def _insert(cls, conn: sqlite3.Connection, host_id: str, host: Dict[str, Any]) -> None:
+        conn.execute(
+            'INSERT INTO hosts (host_id, name, ip, data) VALUES (?, ?, ?, ?)',
+            (host_id, host.get('name'), host.get('ip'), cls._dumps(host))
+        )
+        cls._insert_tags(conn, host_id, host)
+
+    @classmethod
+    def _insert_tags(cls, conn: sqlite3.Connection, host_id: str, host: Dict[str, Any]) -> None:
+        tags = cls._index_keys(host)['tag']
+        conn.executemany(
+            'INSERT OR IGNORE INTO host_tags (tag, host_id) VALUES (?, ?)',
+            [(tag, host_id) for tag in tags]
+        )
+
+    @staticmethod
+    def _dumps(host: Dict[str, Any]) -> str:
+        return json.dumps(host, ensure_ascii=False, default=str)
+
+class _Transaction:
+    """写事务：有修改时提交、递增 generation 并让本进程的缓存失效；没有修改或出错时回滚"""
+
+    def __init__(self, manager: SQLiteConfigManager) -> None:
+        self.manager = manager
+        self.conn = manager._connect()
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.changes = self.conn.total_changes
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None and self.conn.total_changes != self.changes:
+            self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+            self.conn.commit()
+            self.manager._invalidate()
+        else:
+            # 没有修改时不递增 generation，其他进程的缓存不会无谓失效
+            self.conn.rollback()
+
+def _main(argv: Optional[Iterable[str]] = None) -> None:
+    """命令行：将 hosts.yaml 导入 SQLite
+
+    python -m app.utils.sqlite_config --yaml config/hosts.yaml --db config/hosts.db
+    """
+    parser = argparse.ArgumentParser(description='Import hosts.yaml into the SQLite host inventory')
+    parser.add_argument('--yaml', dest='yaml_path', help='hosts.yaml 路径，默认为 config/hosts.yaml')
+    parser.add_argument('--db', dest='db_path', help='SQLite 数据库路径，默认取 config/app.yaml 中的 sqlite_path')
+    parser.add_argument('--replace', action='store_true', help='导入前清空数据库中已有的主机')
+    args = parser.parse_args(argv)
+
+    manager = SQLiteConfigManager(db_path=args.db_path)
+    imported = manager.import_yaml(args.yaml_path, replace=args.replace)
+    print(f"Imported {imported} hosts into {manager.db_path} ({manager.count_hosts()} total)")
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,82 @@
+from typing import Any, Iterator, Optional, Tuple, Callable
+from collections import deque
+import json
+import threading
+
+class Subscriber:
+    """Server-Sent Events 订阅者
+
+    每个订阅者持有一个有界缓冲区：消费过慢时丢弃最旧的事件，
+    并在下一次读取时先返回一个 overflow 事件告知丢弃数量，内存占用不会无限增长。
+    """
+
+    def __init__(self, max_events: int = 256, key: Any = None) -> None:
+        self.key = key
+        self._events = deque(maxlen=max_events)
+        self._condition = threading.Condition()
+        self._dropped = 0
+        self.closed = False
+
+    def put(self, event: str, data: Any) -> None:
+        """推送事件
+
+        Args:
+            event: 事件名
+            data: 可 JSON 序列化的事件数据
+        """
+        with self._condition:
+            if self.closed:
+                return
+            if len(self._events) == self._events.maxlen:
+                self._dropped += 1
+            self._events.append((event, data))
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[str, Any]]:
+        """读取下一个事件
+
+        Args:
+            timeout: 等待时间（秒）
+
+        Returns:
+            Optional[Tuple[str, Any]]: (事件名, 数据)，超时或已关闭时返回 None
+        """
+        with self._condition:
+            if not self._events and not self.closed:
+                self._condition.wait(timeout)
+            if self._dropped:
+                dropped, self._dropped = self._dropped, 0
+                return 'overflow', {'dropped': dropped}
+            if self._events:
+                return self._events.popleft()
+            return None
+
+    def close(self) -> None:
+        """关闭订阅，唤醒等待中的读取方"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+def format_sse(event: str, data: Any) -> str:
+    """格式化为 SSE 文本帧"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_events(subscriber: Subscriber, on_close: Callable[[], None],
+                  keepalive: float = 15.0) -> Iterator[str]:
+    """将订阅者的事件转换为 SSE 文本流，客户端断开时调用 on_close
+
+    Args:
+        subscriber: 订阅者
+        on_close: 流结束时的清理回调
+        keepalive: 无事件时发送心跳注释的间隔（秒），用于及时发现断开的客户端
+    """
+    try:
+        yield 'retry: 3000\n\n'
+        while not subscriber.closed:
+            item = subscriber.get(timeout=keepalive)
+            if item is None:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_sse(*item)
+    finally:
+        on_close()
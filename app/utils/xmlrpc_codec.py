@@ -0,0 +1,92 @@
+from typing import Any, Collection, Optional
+import xml.etree.ElementTree as ElementTree
+import xmlrpc.client
+
+def loads_response(body: bytes, fields: Optional[Collection[str]] = None) -> Any:
+    """解析 XML-RPC 响应体
+
+    标准库的 xmlrpc.client 通过 expat 为每个元素回调 Python 代码；这里改用 C 实现的
+    ElementTree 一次性建树，再只对需要的节点解码。传入 fields 时所有 struct 只保留这些成员，
+    其余成员的值完全不解码，适合 getAllProcessInfo 这类大响应。
+    文档无法被 ElementTree 解析时退回标准库实现。
+
+    Args:
+        body: 完整的响应体
+        fields: 需要保留的 struct 成员名，为 None 时保留全部
+
+    Returns:
+        Any: 方法返回值，类型与 xmlrpc.client.loads(use_builtin_types=False) 一致
+
+    Raises:
+        xmlrpc.client.Fault: 响应为 fault
+        xmlrpc.client.ResponseError: 响应格式错误
+    """
+    try:
+        root = ElementTree.fromstring(body)
+    except ElementTree.ParseError:
+        return xmlrpc.client.loads(body, use_builtin_types=False)[0][0]
+
+    if root.tag != 'methodResponse' or not len(root):
+        raise xmlrpc.client.ResponseError()
+
+    child = root[0]
+    if child.tag == 'fault':
+        fault = _decode_value(child.find('value'), None)
+        raise xmlrpc.client.Fault(fault.get('faultCode'), fault.get('faultString'))
+
+    value = child.find('param/value')
+    if value is None:
+        raise xmlrpc.client.ResponseError()
+    return _decode_value(value, frozenset(fields) if fields is not None else None)
+
+def _decode_value(value: Optional[ElementTree.Element], fields: Optional[frozenset]) -> Any:
+    """解码 <value> 元素"""
+    if value is None:
+        raise xmlrpc.client.ResponseError()
+    if not len(value):
+        # 没有类型标签的值按字符串处理
+        return value.text or ''
+
+    node = value[0]
+    tag = node.tag
+    if tag[0] == '{' or ':' in tag:
+        # ex:nil、ex:i8 等扩展类型，去掉命名空间
+        tag = tag.rsplit('}', 1)[-1].rsplit(':', 1)[-1]
+
+    if tag == 'string':
+        return node.text or ''
+    if tag in ('int', 'i4', 'i8', 'i1', 'i2', 'biginteger'):
+        return int(node.text)
+    if tag == 'boolean':
+        text = node.text
+        if text == '0':
+            return False
+        if text == '1':
+            return True
+        raise TypeError('bad boolean value')
+    if tag == 'struct':
+        result = {}
+        for member in node:
+            # 成员固定为 <name> 和 <value> 两个子元素，按位置访问比 find 快
+            if len(member) != 2:
+                raise xmlrpc.client.ResponseError()
+            name_node, value_node = member
+            if name_node.tag != 'name':
+                name_node, value_node = value_node, name_node
+            name = name_node.text or ''
+            if fields is None or name in fields:
+                result[name] = _decode_value(value_node, fields)
+        return result
+    if tag == 'array':
+        return [_decode_value(item, fields) for item in node.iterfind('data/value')]
+    if tag in ('double', 'float', 'bigdecimal'):
+        return float(node.text)
+    if tag == 'nil':
+        return None
+    if tag == 'dateTime.iso8601':
+        return xmlrpc.client.DateTime(node.text or '')
+    if tag == 'base64':
+        binary = xmlrpc.client.Binary()
+        binary.decode((node.text or '').encode('ascii'))
+        return binary
+    raise xmlrpc.client.ResponseError(f"Unsupported XML-RPC type: {tag}")
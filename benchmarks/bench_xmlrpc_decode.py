@@ -0,0 +1,67 @@
+"""getAllProcessInfo 响应解析基准
+
+比较标准库 xmlrpc.client.loads 与 app.utils.xmlrpc_codec.loads_response
+（完整解码 / 只解码进程列表字段）解析大响应的耗时。
+
+用法:
+    python benchmarks/bench_xmlrpc_decode.py --processes 500 --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+import xmlrpc.client
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.services.supervisor_service import PROCESS_FIELDS, format_processes  # noqa: E402
+from app.utils.xmlrpc_codec import loads_response  # noqa: E402
+
+def make_payload(count: int) -> bytes:
+    """生成与 supervisor getAllProcessInfo 结构相同的响应体"""
+    now = int(time.time())
+    processes = [{
+        'name': f'worker-{index:04d}',
+        'group': f'group-{index // 10:03d}',
+        'description': f'pid {10000 + index}, uptime 3 days, 4:05:06',
+        'start': now - 3600,
+        'stop': 0,
+        'now': now,
+        'state': 20,
+        'statename': 'RUNNING',
+        'spawnerr': '',
+        'exitstatus': 0,
+        'logfile': f'/var/log/supervisor/worker-{index:04d}.log',
+        'stdout_logfile': f'/var/log/supervisor/worker-{index:04d}.log',
+        'stderr_logfile': f'/var/log/supervisor/worker-{index:04d}.err',
+        'pid': 10000 + index
+    } for index in range(count)]
+    return xmlrpc.client.dumps((processes,), methodresponse=True, encoding='utf-8').encode('utf-8')
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=500, help='每个响应中的进程数')
+    parser.add_argument('--repeat', type=int, default=50, help='每种解析方式的执行次数')
+    args = parser.parse_args()
+
+    body = make_payload(args.processes)
+    cases = {
+        'stdlib xmlrpc.client.loads': lambda: format_processes(xmlrpc.client.loads(body)[0][0]),
+        'loads_response (all fields)': lambda: format_processes(loads_response(body)),
+        'loads_response (PROCESS_FIELDS)': lambda: format_processes(loads_response(body, PROCESS_FIELDS))
+    }
+
+    expected = cases['stdlib xmlrpc.client.loads']()
+    for name, case in cases.items():
+        assert case() == expected, f"{name} returned a different result"
+
+    print(f"payload: {args.processes} processes, {len(body) / 1024:.0f} KiB, {args.repeat} runs each")
+    baseline = None
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"{name:34s} {best * 1000:8.2f} ms  {baseline / best:5.2f}x")
+
+if __name__ == '__main__':
+    main()
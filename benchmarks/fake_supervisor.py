@@ -0,0 +1,414 @@
+"""本地模拟 supervisor 集群
+
+在一个或多个进程中启动大量轻量的 supervisor XML-RPC 服务，实现 SupervisorService
+用到的接口子集（getState、getAllProcessInfo、getProcessInfo、start/stop 进程和进程组、
+tailProcessStdoutLog/tailProcessStderrLog、system.multicall），可配置每台主机的进程数、
+响应延迟、出错率和不可达主机数，供负载测试和开发调试使用，无需联网。
+
+每个工作进程用一个 asyncio 事件循环承载多台主机，支持 HTTP/1.1 keep-alive；
+出错的请求直接断开连接（模拟 supervisor 崩溃或过载），不可达主机的端口不监听。
+
+用法:
+    python benchmarks/fake_supervisor.py --hosts 200 --processes 50 --latency 0.005 \\
+        --error-rate 0.01 --dead 5 --workers 2 --write-hosts /tmp/hosts.bench.yaml
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import signal
+import socket
+import threading
+import time
+import xmlrpc.client
+from typing import Any, Dict, List, Optional, Sequence
+
+import yaml
+
+# supervisor 的进程状态码
+STATES = {'STOPPED': 0, 'STARTING': 10, 'RUNNING': 20, 'BACKOFF': 30, 'STOPPING': 40,
+          'EXITED': 100, 'FATAL': 200, 'UNKNOWN': 1000}
+
+# supervisor.xmlrpc.Faults 中用到的错误码
+BAD_NAME = 10
+ALREADY_STARTED = 60
+NOT_RUNNING = 70
+SUCCESS = 80
+
+class FakeSupervisor:
+    """一台模拟主机的 supervisor 状态和 RPC 接口"""
+
+    def __init__(self, processes: int = 20, log_size: int = 64 * 1024, fatal_rate: float = 0.0,
+                 seed: Optional[int] = None) -> None:
+        self.random = random.Random(seed)
+        now = int(time.time())
+        self.processes: Dict[str, Dict[str, Any]] = {}
+        for index in range(processes):
+            name = f'worker-{index:03d}'
+            statename = 'FATAL' if self.random.random() < fatal_rate else 'RUNNING'
+            self.processes[name] = {
+                'name': name,
+                'group': name,
+                'description': f'pid {20000 + index}, uptime 1 day, 2:03:04' if statename == 'RUNNING' else 'Exited too quickly',
+                'start': now - 86400,
+                'stop': 0,
+                'now': now,
+                'state': STATES[statename],
+                'statename': statename,
+                'spawnerr': '',
+                'exitstatus': 0,
+                'logfile': f'/var/log/supervisor/{name}.log',
+                'stdout_logfile': f'/var/log/supervisor/{name}.log',
+                'stderr_logfile': f'/var/log/supervisor/{name}.err',
+                'pid': 20000 + index if statename == 'RUNNING' else 0
+            }
+        line = 'INFO processed request id=0123456789abcdef status=200 duration=12ms\n'
+        self.log = (line * (log_size // len(line) + 1))[:log_size]
+        self._next_pid = 30000
+
+    def dispatch(self, method: str, params: Sequence[Any]) -> Any:
+        """执行 XML-RPC 方法
+
+        Raises:
+            xmlrpc.client.Fault: 方法不存在或 supervisor 会返回的错误
+        """
+        if method == 'system.multicall':
+            results = []
+            for call in params[0]:
+                try:
+                    results.append([self.dispatch(call['methodName'], call.get('params', []))])
+                except xmlrpc.client.Fault as fault:
+                    results.append({'faultCode': fault.faultCode, 'faultString': fault.faultString})
+            return results
+        handler = getattr(self, 'rpc_' + method.replace('.', '_'), None)
+        if handler is None:
+            raise xmlrpc.client.Fault(1, f'UNKNOWN_METHOD: {method}')
+        return handler(*params)
+
+    def _get(self, name: str) -> Dict[str, Any]:
+        process = self.processes.get(name.split(':')[-1])
+        if process is None:
+            raise xmlrpc.client.Fault(BAD_NAME, f'BAD_NAME: {name}')
+        return process
+
+    def _set_state(self, process: Dict[str, Any], statename: str) -> None:
+        process['statename'] = statename
+        process['state'] = STATES[statename]
+        process['now'] = int(time.time())
+        if statename == 'RUNNING':
+            self._next_pid += 1
+            process['pid'] = self._next_pid
+            process['start'] = process['now']
+            process['description'] = f"pid {process['pid']}, uptime 0:00:00"
+        else:
+            process['pid'] = 0
+            process['stop'] = process['now']
+            process['description'] = time.strftime('%b %d %I:%M %p')
+
+    def rpc_supervisor_getState(self) -> Dict[str, Any]:
+        return {'statecode': 1, 'statename': 'RUNNING'}
+
+    def rpc_supervisor_getAllProcessInfo(self) -> List[Dict[str, Any]]:
+        now = int(time.time())
+        for process in self.processes.values():
+            process['now'] = now
+        return list(self.processes.values())
+
+    def rpc_supervisor_getProcessInfo(self, name: str) -> Dict[str, Any]:
+        return self._get(name)
+
+    def rpc_supervisor_startProcess(self, name: str, wait: bool = True) -> bool:
+        process = self._get(name)
+        if process['statename'] == 'RUNNING':
+            raise xmlrpc.client.Fault(ALREADY_STARTED, f'ALREADY_STARTED: {name}')
+        self._set_state(process, 'RUNNING')
+        return True
+
+    def rpc_supervisor_stopProcess(self, name: str, wait: bool = True) -> bool:
+        process = self._get(name)
+        if process['statename'] != 'RUNNING':
+            raise xmlrpc.client.Fault(NOT_RUNNING, f'NOT_RUNNING: {name}')
+        self._set_state(process, 'STOPPED')
+        return True
+
+    def _group_action(self, names: Sequence[str], statename: str) -> List[Dict[str, Any]]:
+        results = []
+        for name in names:
+            process = self.processes[name]
+            if (process['statename'] == 'RUNNING') != (statename == 'RUNNING'):
+                self._set_state(process, statename)
+            results.append({'name': name, 'group': process['group'], 'status': SUCCESS, 'description': 'OK'})
+        return results
+
+    def rpc_supervisor_startProcessGroup(self, group: str, wait: bool = True) -> List[Dict[str, Any]]:
+        names = [name for name, process in self.processes.items() if process['group'] == group]
+        if not names:
+            raise xmlrpc.client.Fault(BAD_NAME, f'BAD_NAME: {group}')
+        return self._group_action(names, 'RUNNING')
+
+    def rpc_supervisor_stopProcessGroup(self, group: str, wait: bool = True) -> List[Dict[str, Any]]:
+        names = [name for name, process in self.processes.items() if process['group'] == group]
+        if not names:
+            raise xmlrpc.client.Fault(BAD_NAME, f'BAD_NAME: {group}')
+        return self._group_action(names, 'STOPPED')
+
+    def rpc_supervisor_startAllProcesses(self, wait: bool = True) -> List[Dict[str, Any]]:
+        return self._group_action(list(self.processes), 'RUNNING')
+
+    def rpc_supervisor_stopAllProcesses(self, wait: bool = True) -> List[Dict[str, Any]]:
+        return self._group_action(list(self.processes), 'STOPPED')
+
+    def rpc_supervisor_tailProcessStdoutLog(self, name: str, offset: int, length: int) -> List[Any]:
+        self._get(name)
+        size = len(self.log)
+        overflow = False
+        if size > offset + length:
+            overflow = True
+            offset = size - length
+        return [self.log[offset:], size, overflow]
+
+    rpc_supervisor_tailProcessStderrLog = rpc_supervisor_tailProcessStdoutLog
+
+class FarmOptions:
+    """模拟主机的行为参数"""
+
+    def __init__(self, processes: int = 20, latency: float = 0.0, error_rate: float = 0.0,
+                 fatal_rate: float = 0.0, log_size: int = 64 * 1024) -> None:
+        self.processes = processes
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fatal_rate = fatal_rate
+        self.log_size = log_size
+
+async def _handle_connection(supervisor: FakeSupervisor, options: FarmOptions,
+                             reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """处理一条 keep-alive 连接上的 XML-RPC 请求"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+            if options.latency:
+                # 延迟在 0.5~1.5 倍之间波动
+                await asyncio.sleep(options.latency * supervisor.random.uniform(0.5, 1.5))
+            if options.error_rate and supervisor.random.random() < options.error_rate:
+                writer.transport.abort()
+                return
+
+            try:
+                params, method = xmlrpc.client.loads(body)
+                payload = xmlrpc.client.dumps((supervisor.dispatch(method, params),), methodresponse=True,
+                                              allow_none=True, encoding='utf-8')
+            except xmlrpc.client.Fault as fault:
+                payload = xmlrpc.client.dumps(fault, methodresponse=True, encoding='utf-8')
+            except Exception as e:
+                payload = xmlrpc.client.dumps(xmlrpc.client.Fault(1, f'{type(e).__name__}: {e}'),
+                                              methodresponse=True, encoding='utf-8')
+            data = payload.encode('utf-8')
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nContent-Type: text/xml\r\n'
+                b'Content-Length: ' + str(len(data)).encode() + b'\r\n\r\n' + data
+            )
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except asyncio.CancelledError:
+        # 集群停止时取消进行中的连接，不需要向上传播
+        pass
+    finally:
+        writer.close()
+
+async def _serve(ports: Sequence[int], options: FarmOptions, seed: int) -> List[asyncio.AbstractServer]:
+    servers = []
+    for index, port in enumerate(ports):
+        supervisor = FakeSupervisor(options.processes, options.log_size, options.fatal_rate, seed + index)
+
+        async def handler(reader, writer, supervisor=supervisor):
+            await _handle_connection(supervisor, options, reader, writer)
+
+        servers.append(await asyncio.start_server(handler, '127.0.0.1', port, backlog=256))
+    return servers
+
+async def _close_servers(servers: Sequence[asyncio.AbstractServer]) -> None:
+    """关闭监听，取消进行中的连接并等待其结束"""
+    for server in servers:
+        server.close()
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for server in servers:
+        await server.wait_closed()
+
+def _worker(ports: Sequence[int], options: FarmOptions, seed: int, ready: Any) -> None:
+    """工作进程入口：监听给定端口直到收到 SIGTERM，然后关闭所有连接"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    servers = loop.run_until_complete(_serve(ports, options, seed))
+    loop.add_signal_handler(signal.SIGTERM, loop.stop)
+    ready.send(True)
+    ready.close()
+    loop.run_forever()
+    loop.run_until_complete(_close_servers(servers))
+    loop.close()
+
+def _free_ports(count: int) -> List[int]:
+    """向系统申请 count 个空闲端口"""
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket()
+            sock.bind(('127.0.0.1', 0))
+            sockets.append(sock)
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+class FakeSupervisorFarm:
+    """一组模拟 supervisor 主机
+
+    workers 为 0 时在当前进程的后台线程中运行（适合少量主机和调试），
+    否则把主机平均分到 workers 个子进程，避免与被测应用争用 GIL。
+    """
+
+    def __init__(self, hosts: int, options: Optional[FarmOptions] = None, dead: int = 0,
+                 workers: int = 1, seed: int = 0) -> None:
+        self.options = options or FarmOptions()
+        self.workers = workers
+        self.seed = seed
+        ports = _free_ports(hosts + dead)
+        self.live_ports = ports[:hosts]
+        # 不可达主机的端口不监听，连接会被拒绝
+        self.dead_ports = ports[hosts:]
+        self._processes: List[multiprocessing.Process] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._servers: List[asyncio.AbstractServer] = []
+
+    def start(self) -> 'FakeSupervisorFarm':
+        """启动所有主机，返回后即可接受连接"""
+        if self.workers <= 0:
+            self._loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(self._loop)
+                self._servers = self._loop.run_until_complete(_serve(self.live_ports, self.options, self.seed))
+                started.set()
+                self._loop.run_forever()
+                self._loop.close()
+
+            self._thread = threading.Thread(target=run, name='fake-supervisor-farm', daemon=True)
+            self._thread.start()
+            started.wait()
+            return self
+
+        chunks = [self.live_ports[index::self.workers] for index in range(self.workers)]
+        for index, ports in enumerate(chunk for chunk in chunks if chunk):
+            parent, child = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_worker, args=(ports, self.options, self.seed + index * 100000, child), daemon=True
+            )
+            process.start()
+            child.close()
+            if not parent.poll(30) or not parent.recv():
+                raise RuntimeError('Fake supervisor worker failed to start')
+            self._processes.append(process)
+        return self
+
+    def stop(self) -> None:
+        """停止所有主机"""
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join(5)
+        self._processes = []
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(_close_servers(self._servers), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+            self._loop = None
+
+    def hosts_config(self) -> Dict[str, Dict[str, Any]]:
+        """生成 config/hosts.yaml 格式的主机配置，不可达主机带 dead 标签"""
+        hosts = {}
+        for index, port in enumerate(self.live_ports + self.dead_ports):
+            dead = index >= len(self.live_ports)
+            hosts[f'bench-{index:04d}'] = {
+                'name': f'Bench {index:04d}',
+                'ip': '127.0.0.1',
+                'port': port,
+                'username': 'bench',
+                'password': 'bench',
+                'description': 'fake supervisor',
+                'tags': ['bench', 'dead' if dead else 'live']
+            }
+        return hosts
+
+    def write_hosts(self, path: str) -> None:
+        """把主机配置写入 yaml 文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump({'hosts': self.hosts_config()}, f, allow_unicode=True, sort_keys=False)
+
+    def __enter__(self) -> 'FakeSupervisorFarm':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+def add_farm_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加模拟集群的命令行参数，供其他基准脚本复用"""
+    parser.add_argument('--hosts', type=int, default=50, help='可达主机数')
+    parser.add_argument('--dead', type=int, default=0, help='不可达主机数（端口不监听）')
+    parser.add_argument('--processes', type=int, default=20, help='每台主机的进程数')
+    parser.add_argument('--latency', type=float, default=0.0, help='每次 RPC 的平均延迟（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='直接断开连接的请求比例')
+    parser.add_argument('--fatal-rate', type=float, default=0.05, help='初始为 FATAL 的进程比例')
+    parser.add_argument('--log-size', type=int, default=64 * 1024, help='每个进程的日志大小（字节）')
+    parser.add_argument('--workers', type=int, default=1, help='承载主机的子进程数，0 表示在当前进程的线程中运行')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+
+def farm_from_args(args: argparse.Namespace) -> FakeSupervisorFarm:
+    """按命令行参数创建模拟集群"""
+    options = FarmOptions(
+        processes=args.processes,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        fatal_rate=args.fatal_rate,
+        log_size=args.log_size
+    )
+    return FakeSupervisorFarm(args.hosts, options, dead=args.dead, workers=args.workers, seed=args.seed)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_farm_arguments(parser)
+    parser.add_argument('--write-hosts', metavar='PATH', help='把主机配置写入该 yaml 文件')
+    args = parser.parse_args()
+
+    farm = farm_from_args(args).start()
+    if args.write_hosts:
+        farm.write_hosts(args.write_hosts)
+        print(f"hosts written to {args.write_hosts}")
+    print(f"{len(farm.live_ports)} fake supervisors on 127.0.0.1 ports "
+          f"{min(farm.live_ports, default=0)}-{max(farm.live_ports, default=0)}, "
+          f"{len(farm.dead_ports)} dead; Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        farm.stop()
+
+if __name__ == '__main__':
+    main()
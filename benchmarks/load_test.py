@@ -0,0 +1,317 @@
+"""SuperNova 端到端负载测试
+
+启动模拟 supervisor 集群（fake_supervisor.py）和进程内的 SuperNova 应用，以固定并发
+依次压测主机列表、进程列表、日志、进程控制等 API，报告每个场景的 p50/p90/p99 延迟、
+吞吐量、错误数和每个请求平均发出的 XML-RPC 调用数（X-RPC-Count 响应头）。
+结果可以保存为 JSON，并与之前保存的基线比较，出现退化时以非零状态码退出。
+
+也可以用 --url 压测已部署的实例（此时不启动模拟集群，目标主机从 /api/hosts 发现）。
+
+用法:
+    python benchmarks/load_test.py --hosts 200 --dead 5 --latency 0.005 --concurrency 16 --duration 10
+    python benchmarks/load_test.py --scenarios processes,search --save baseline.json
+    python benchmarks/load_test.py --baseline baseline.json --threshold 0.25
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fake_supervisor import add_farm_arguments, farm_from_args  # noqa: E402
+
+# 场景函数根据目标信息生成一个请求 (方法, 路径, JSON 请求体)
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+Scenario = Callable[[random.Random, Dict[str, Any]], Request]
+
+def _host(rng: random.Random, targets: Dict[str, Any]) -> str:
+    return rng.choice(targets['hosts'])
+
+def _process(rng: random.Random, targets: Dict[str, Any]) -> str:
+    return rng.choice(targets['processes'])
+
+SCENARIOS: Dict[str, Scenario] = {
+    'dashboard': lambda rng, t: ('GET', '/api/dashboard', None),
+    'hosts': lambda rng, t: ('GET', '/api/hosts', None),
+    'hosts_page': lambda rng, t: ('GET', '/api/hosts?limit=50&fields=id,name,status', None),
+    'hosts_probe': lambda rng, t: ('GET', '/api/hosts?max_age=0', None),
+    'processes': lambda rng, t: ('GET', f'/api/processes?host_id={_host(rng, t)}', None),
+    'processes_fresh': lambda rng, t: ('GET', f'/api/processes?host_id={_host(rng, t)}&fresh=1', None),
+    'search': lambda rng, t: ('GET', f'/api/search/processes?q={_process(rng, t)[:8]}&limit=100', None),
+    'log_tail': lambda rng, t: (
+        'GET', f'/api/logs/{_process(rng, t)}/tail?host_id={_host(rng, t)}&length=16384', None
+    ),
+    'control': lambda rng, t: (
+        'POST', f'/api/processes/{_process(rng, t)}/restart', {'host_id': _host(rng, t)}
+    ),
+    'bulk_control': lambda rng, t: ('POST', '/api/processes/bulk', {
+        'items': [{'host_id': host_id, 'process': _process(rng, t), 'action': 'restart'}
+                  for host_id in rng.sample(t['hosts'], min(10, len(t['hosts'])))]
+    }),
+}
+
+DEFAULT_SCENARIOS = 'dashboard,hosts,hosts_page,processes,processes_fresh,search,log_tail,control'
+
+def start_local_app(hosts_file: str) -> Tuple[Any, str]:
+    """在当前进程中启动使用指定主机配置的 SuperNova
+
+    应用固定使用 yaml 主机注册表并读取 hosts_file，不会修改 config/hosts.yaml。
+
+    Returns:
+        Tuple[Any, str]: (Flask 应用, 基础 URL)
+    """
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import app.services.supervisor_service as supervisor_service
+    import app.utils.config as config
+
+    original_init = config.ConfigManager.__init__
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self.hosts_file = hosts_file
+
+    config.ConfigManager.__init__ = init
+    config.create_config_manager = supervisor_service.create_config_manager = config.ConfigManager
+
+    from app import create_app
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args: Any, **kwargs: Any) -> None:
+            pass
+
+    application = create_app()
+    server = make_server('127.0.0.1', 0, application, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, name='supernova-bench', daemon=True).start()
+    return application, f'http://127.0.0.1:{server.server_port}'
+
+def wait_for_snapshots(application: Any, expected: int, timeout: float) -> int:
+    """等待后台采集为 expected 台主机生成进程快照，返回实际数量"""
+    deadline = time.monotonic() + timeout
+    count = 0
+    while time.monotonic() < deadline:
+        snapshots = application.host_monitor.process_snapshots.get_all()
+        count = sum(1 for snapshot in snapshots.values() if snapshot.get('updated_at') and not snapshot.get('error'))
+        if count >= expected:
+            break
+        time.sleep(0.5)
+    return count
+
+class Client:
+    """到被测实例的 keep-alive HTTP 客户端"""
+
+    def __init__(self, base_url: str, timeout: float = 60.0) -> None:
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, int, bytes]:
+        """发送请求，返回 (状态码, X-RPC-Count, 响应体)"""
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if data is not None else {}
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=data, headers=headers)
+                response = self.conn.getresponse()
+                payload = response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # 服务端关闭了 keep-alive 连接，重连一次
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+                continue
+            if response.getheader('Connection', '').lower() == 'close':
+                self.conn.close()
+                self.conn = None
+            return response.status, int(response.getheader('X-RPC-Count') or 0), payload
+        raise ConnectionError('unreachable')
+
+    def get_json(self, path: str) -> Dict[str, Any]:
+        status, _, payload = self.request('GET', path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}: {payload[:200]!r}")
+        return json.loads(payload)['data']
+
+def discover_targets(base_url: str) -> Dict[str, Any]:
+    """从 API 获取在线主机和进程名，作为场景的请求目标"""
+    client = Client(base_url)
+    hosts = client.get_json('/api/hosts?fields=id,status')['hosts']
+    live = [host['id'] for host in hosts if host.get('status') == 'connected']
+    if not live:
+        raise RuntimeError('No connected hosts to benchmark')
+    processes = client.get_json(f'/api/processes?host_id={urllib.parse.quote(live[0])}&fields=name')['processes']
+    return {'hosts': live, 'processes': [process['name'] for process in processes] or ['worker-000']}
+
+def percentile(values: List[float], fraction: float) -> float:
+    """最近秩法计算百分位数，values 需已排序"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+def run_scenario(base_url: str, scenario: Scenario, targets: Dict[str, Any], concurrency: int,
+                 duration: float, seed: int) -> Dict[str, Any]:
+    """以固定并发执行一个场景 duration 秒
+
+    Returns:
+        Dict[str, Any]: requests、errors、rps、p50/p90/p99/max（毫秒）和 rpc_per_request
+    """
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    rpcs = [0] * concurrency
+    start_barrier = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        client = Client(base_url)
+        start_barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            method, path, body = scenario(rng, targets)
+            started = time.perf_counter()
+            try:
+                status, rpc_count, _ = client.request(method, path, body)
+            except Exception:
+                status, rpc_count = 0, 0
+            latencies[index].append(time.perf_counter() - started)
+            rpcs[index] += rpc_count
+            if not 200 <= status < 300:
+                errors[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    deadline[0] = started + duration
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(latency for worker_latencies in latencies for latency in worker_latencies)
+    count = len(samples)
+    return {
+        'requests': count,
+        'errors': sum(errors),
+        'rps': round(count / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 2),
+        'p90_ms': round(percentile(samples, 0.90) * 1000, 2),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 2),
+        'max_ms': round(samples[-1] * 1000, 2) if samples else 0.0,
+        'rpc_per_request': round(sum(rpcs) / count, 2) if count else 0.0
+    }
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """与基线比较，返回退化描述
+
+    p99 延迟升高或吞吐量下降超过 threshold 比例、每请求 RPC 数增加、或出现新的错误时视为退化。
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base['p99_ms'] and result['p99_ms'] > base['p99_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p99 {base['p99_ms']}ms -> {result['p99_ms']}ms")
+        if base['rps'] and result['rps'] < base['rps'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['rps']} -> {result['rps']} req/s")
+        if result['rpc_per_request'] > base['rpc_per_request'] + 0.05:
+            regressions.append(f"{name}: RPCs per request {base['rpc_per_request']} -> {result['rpc_per_request']}")
+        if result['errors'] > base['errors'] and result['errors'] > result['requests'] * 0.001:
+            regressions.append(f"{name}: errors {base['errors']} -> {result['errors']}")
+    return regressions
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    columns = ('requests', 'errors', 'rps', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'rpc_per_request')
+    print(f"{'scenario':<16}" + ''.join(f"{column:>16}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<16}" + ''.join(f"{result[column]:>16}" for column in columns))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_farm_arguments(parser)
+    parser.add_argument('--url', help='压测已运行的实例，不启动模拟集群和本地应用')
+    parser.add_argument('--scenarios', default=DEFAULT_SCENARIOS,
+                        help=f"逗号分隔的场景，可选: {', '.join(SCENARIOS)}")
+    parser.add_argument('--concurrency', type=int, default=8, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=10.0, help='每个场景的持续时间（秒）')
+    parser.add_argument('--warmup-timeout', type=float, default=60.0, help='等待后台采集完成首轮快照的最长时间（秒）')
+    parser.add_argument('--verbose', action='store_true', help='输出本地应用的错误日志')
+    parser.add_argument('--save', metavar='PATH', help='把结果保存为 JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='与之前保存的 JSON 结果比较')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定退化的相对变化比例')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    farm = None
+    workdir = tempfile.TemporaryDirectory(prefix='supernova-bench-')
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            farm = farm_from_args(args).start()
+            hosts_file = os.path.join(workdir.name, 'hosts.yaml')
+            farm.write_hosts(hosts_file)
+            application, base_url = start_local_app(hosts_file)
+            if not args.verbose:
+                # 出错率和不可达主机产生的错误日志已计入报告中的 errors
+                logging.disable(logging.ERROR)
+            ready = wait_for_snapshots(application, args.hosts, args.warmup_timeout)
+            print(f"farm: {args.hosts} hosts ({args.dead} dead), {args.processes} processes each, "
+                  f"latency {args.latency * 1000:.1f}ms, error rate {args.error_rate}; {ready} snapshots ready")
+
+        targets = discover_targets(base_url)
+        print(f"target: {base_url}, {len(targets['hosts'])} connected hosts, "
+              f"concurrency {args.concurrency}, {args.duration:.0f}s per scenario")
+
+        results = {}
+        for name in names:
+            results[name] = run_scenario(base_url, SCENARIOS[name], targets, args.concurrency,
+                                         args.duration, args.seed)
+        print_report(results)
+
+        report = {
+            'config': {key: value for key, value in vars(args).items() if key not in ('save', 'baseline')},
+            'results': results
+        }
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"results saved to {args.save}")
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)['results']
+            regressions = compare(results, baseline, args.threshold)
+            if regressions:
+                print('REGRESSIONS:')
+                for regression in regressions:
+                    print(f"  {regression}")
+                sys.exit(1)
+            print(f"no regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    finally:
+        if farm is not None:
+            farm.stop()
+        workdir.cleanup()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""热点函数微基准
+
+对 ConfigManager（get_all_hosts / get_host / save_hosts，10、1k、10k 台主机）、
+进程列表的解码和格式化（1k 个进程）、AuthTransport 构造请求以及 make_api_response
+序列化做可重复的计时：每个用例先用 timeit.autorange 确定循环次数，再重复 --repeat 轮，
+报告每次调用耗时的最小值和中位数。
+
+结果可以保存为 JSON 基线（默认 benchmarks/baselines/microbench.json），
+之后的运行与基线逐项比较：最小值受调度和其他进程的干扰最小，因此按最小值比较，
+变慢超过 --threshold 时以非零状态码退出。
+基线与机器相关，比较不同机器上的结果时只看相对变化趋势。
+
+用法:
+    python benchmarks/microbench.py                      # 运行并与默认基线比较
+    python benchmarks/microbench.py --filter config      # 只运行名称包含 config 的用例
+    python benchmarks/microbench.py --save               # 把本次结果写为默认基线
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+import xmlrpc.client
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask  # noqa: E402
+
+from app.routes.api import make_api_response  # noqa: E402
+from app.services.supervisor_service import PROCESS_FIELDS, AuthTransport, format_processes  # noqa: E402
+from app.utils.config import ConfigManager  # noqa: E402
+from app.utils.xmlrpc_codec import loads_response  # noqa: E402
+from bench_xmlrpc_decode import make_payload  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'microbench.json')
+
+# 用例名 -> 返回被测函数的 setup；setup 只执行一次，不计入耗时
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+def benchmark(name: str) -> Callable[[Callable[[], Callable[[], Any]]], Callable[[], Callable[[], Any]]]:
+    """注册一个用例"""
+    def register(setup: Callable[[], Callable[[], Any]]) -> Callable[[], Callable[[], Any]]:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+_workdirs: List[tempfile.TemporaryDirectory] = []
+
+def make_config_manager(count: int) -> ConfigManager:
+    """创建读写临时目录、包含 count 台主机的 ConfigManager"""
+    workdir = tempfile.TemporaryDirectory(prefix='supernova-microbench-')
+    _workdirs.append(workdir)
+    manager = ConfigManager(check_interval=2)
+    manager.config_dir = workdir.name
+    manager.hosts_file = os.path.join(workdir.name, 'hosts.yaml')
+    manager.save_hosts(make_hosts(count))
+    manager.get_all_hosts()
+    return manager
+
+def make_hosts(count: int) -> Dict[str, Dict[str, Any]]:
+    return {
+        f'host-{index:05d}': {
+            'name': f'Host {index:05d}',
+            'ip': f'10.{index // 65536}.{index // 256 % 256}.{index % 256}',
+            'port': 9001,
+            'username': 'admin',
+            'password': 'secret',
+            'description': 'benchmark host',
+            'tags': ['bench', f'rack-{index % 20}']
+        }
+        for index in range(count)
+    }
+
+for _count in (10, 1000, 10000):
+    @benchmark(f'config.get_all_hosts[{_count}]')
+    def _get_all_hosts(count: int = _count) -> Callable[[], Any]:
+        return make_config_manager(count).get_all_hosts
+
+    @benchmark(f'config.get_host[{_count}]')
+    def _get_host(count: int = _count) -> Callable[[], Any]:
+        manager = make_config_manager(count)
+        host_id = f'host-{count // 2:05d}'
+        return lambda: manager.get_host(host_id)
+
+    @benchmark(f'config.save_hosts[{_count}]')
+    def _save_hosts(count: int = _count) -> Callable[[], Any]:
+        manager = make_config_manager(count)
+        hosts = make_hosts(count)
+        return lambda: manager.save_hosts(hosts)
+
+@benchmark('processes.format[1000]')
+def _format_processes() -> Callable[[], Any]:
+    processes = loads_response(make_payload(1000))
+    return lambda: format_processes(processes)
+
+@benchmark('processes.decode_and_format[1000]')
+def _decode_and_format() -> Callable[[], Any]:
+    body = make_payload(1000)
+    return lambda: format_processes(loads_response(body, PROCESS_FIELDS))
+
+class _NullConnection:
+    """只接收请求头的连接，用于测量请求构造本身"""
+
+    def putrequest(self, method: str, url: str) -> None:
+        pass
+
+    def putheader(self, header: str, *values: str) -> None:
+        pass
+
+    def endheaders(self, body: Optional[bytes] = None) -> None:
+        pass
+
+class _NullPool:
+    def acquire(self, host_key: str, timeout: float) -> _NullConnection:
+        return _NullConnection()
+
+@benchmark('transport.build_request')
+def _build_request() -> Callable[[], Any]:
+    transport = AuthTransport('admin', 'secret', pool=_NullPool())
+
+    def build() -> None:
+        body = xmlrpc.client.dumps(('worker-001', 0, 16384), 'supervisor.tailProcessStdoutLog',
+                                   encoding='utf-8', allow_none=True).encode('utf-8')
+        transport._get_method_name(body)
+        transport.send_request('127.0.0.1:9001', '/RPC2', body)
+
+    return build
+
+@benchmark('api.make_api_response[1000 processes]')
+def _make_api_response() -> Callable[[], Any]:
+    app = Flask('microbench')
+    app.config['JSON_AS_ASCII'] = False
+    processes = format_processes(loads_response(make_payload(1000), PROCESS_FIELDS))
+    context = app.test_request_context('/api/processes')
+    context.push()
+    return lambda: make_api_response(data={'processes': processes}, message='ok')[0].get_data()
+
+def run(name: str, repeat: int) -> Dict[str, Any]:
+    """执行一个用例
+
+    Returns:
+        Dict[str, Any]: 每次调用耗时（微秒）的 min、median，以及每轮循环次数 number
+    """
+    function = BENCHMARKS[name]()
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    per_call = [total / number * 1e6 for total in timer.repeat(repeat, number)]
+    return {
+        'min_us': round(min(per_call), 3),
+        'median_us': round(statistics.median(per_call), 3),
+        'number': number
+    }
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> Tuple[List[Tuple[str, Optional[float], str]], List[str]]:
+    """按每次调用耗时的最小值与基线比较
+
+    Returns:
+        Tuple: ([(用例名, 相对基线的倍数, 标记)], [退化的用例名])
+    """
+    rows = []
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base.get('min_us'):
+            rows.append((name, None, 'new'))
+            continue
+        ratio = result['min_us'] / base['min_us']
+        if ratio > 1 + threshold:
+            mark = 'SLOWER'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            mark = 'faster'
+        else:
+            mark = ''
+        rows.append((name, ratio, mark))
+    return rows, regressions
+
+def machine_info() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system()
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filter', default='', help='只运行名称包含该字符串的用例')
+    parser.add_argument('--repeat', type=int, default=5, help='每个用例重复的轮数')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, metavar='PATH',
+                        help=f'把结果保存为基线，默认 {os.path.relpath(DEFAULT_BASELINE)}')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, metavar='PATH', help='要比较的基线文件')
+    parser.add_argument('--threshold', type=float, default=0.25, help='判定变快/变慢的相对变化比例')
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    baseline: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(args.baseline) and os.path.abspath(args.baseline) != os.path.abspath(args.save or ''):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        baseline = saved['results']
+        if saved.get('machine') != machine_info():
+            print(f"note: baseline was recorded on {saved.get('machine')}, compare trends only")
+
+    results = {}
+    print(f"{'benchmark':<40}{'min (us)':>14}{'median (us)':>14}{'baseline':>14}{'ratio':>9}")
+    for name in names:
+        results[name] = result = run(name, args.repeat)
+        rows, _ = compare({name: result}, baseline, args.threshold)
+        _, ratio, mark = rows[0]
+        base = baseline.get(name, {}).get('min_us')
+        print(f"{name:<40}{result['min_us']:>14.3f}{result['median_us']:>14.3f}"
+              f"{(f'{base:.3f}' if base else '-'):>14}{(f'{ratio:.2f}x' if ratio else '-'):>9}  {mark}")
+
+    for workdir in _workdirs:
+        workdir.cleanup()
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'machine': machine_info(), 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"baseline saved to {args.save}")
+        return
+
+    _, regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"REGRESSIONS (slower than baseline by more than {args.threshold:.0%}): {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""独立的后台采集进程
+
+多 worker 部署时，把 config/app.yaml 中的 workers.role 设为 reader，让所有请求 worker 只读取共享状态，
+再单独运行本脚本负责采集：
+
+    python collector.py
+    gunicorn -w 4 -b 0.0.0.0:5001 run:app
+
+本进程同样通过采集锁选举，可以同时运行多个实例做热备，只有持有锁的实例在采集。
+"""
+import signal
+import threading
+
+from app import create_app
+
+def main() -> None:
+    app = create_app(worker_role='auto')
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopped.set())
+    app.logger.info('Collector started, waiting for the collector lock')
+    stopped.wait()
+    app.worker_coordinator.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import socket
+import threading
+import xmlrpc.client
+
+import pytest
+
+from app.services.circuit_breaker import CircuitBreakerRegistry
+from app.services.connection_pool import ConnectionPool
+from app.services.supervisor_service import AuthTransport
+
+
+@pytest.fixture
+def closing_server():
+    """声明 keep-alive 但每次响应后立即关闭连接的 XML-RPC 服务端，模拟复用时已失效的连接"""
+    body = xmlrpc.client.dumps(('RUNNING',), methodresponse=True).encode()
+    response = (b'HTTP/1.1 200 OK\r\nContent-Type: text/xml\r\nContent-Length: %d\r\n\r\n' % len(body)) + body
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(8)
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            data = b''
+            while b'</methodCall>' not in data:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+            conn.sendall(response)
+            conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield server.getsockname()[1]
+    server.close()
+
+
+def test_stale_reused_connection_is_retried_without_tripping_breaker(closing_server):
+    pool = ConnectionPool()
+    # 健康检查与对端关闭之间存在竞争，这里让失效的连接总是通过健康检查
+    pool._is_healthy = lambda conn, last_used: conn.sock is not None
+    breakers = CircuitBreakerRegistry(failure_threshold=2)
+    transport = AuthTransport('user', 'pass', pool=pool, breakers=breakers)
+    proxy = xmlrpc.client.ServerProxy(f'http://127.0.0.1:{closing_server}/RPC2', transport=transport)
+    host_key = f'127.0.0.1:{closing_server}'
+    breaker = breakers.get(host_key)
+    failures = []
+    breaker.record_failure = failures.append
+    marked = []
+    pool.mark_bad = marked.append
+
+    for _ in range(4):
+        assert proxy.supervisor.getState() == 'RUNNING'
+
+    assert failures == []
+    assert marked == []
+    assert breaker.state == breaker.CLOSED
+    assert pool.get_stats()['discards'] == 3
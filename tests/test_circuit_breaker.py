@@ -0,0 +1,64 @@
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def expire(breaker):
+    """让 open 状态的退避时间立即到期"""
+    breaker.open_until = 0.0
+
+
+def test_opens_after_threshold_failures():
+    breaker = CircuitBreaker('h:1', failure_threshold=2)
+    breaker.before_call()
+    breaker.record_failure('refused')
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure('refused')
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.before_call()
+    assert info.value.last_error == 'refused'
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker('h:1', failure_threshold=2)
+    breaker.record_failure('refused')
+    breaker.record_success()
+    breaker.record_failure('refused')
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker('h:1', failure_threshold=1)
+    breaker.record_failure('refused')
+    expire(breaker)
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_successful_trial_closes_circuit():
+    breaker = CircuitBreaker('h:1', failure_threshold=1, base_backoff=5.0)
+    breaker.record_failure('refused')
+    expire(breaker)
+    breaker.before_call()
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.backoff == 5.0
+    breaker.before_call()
+
+
+def test_failed_trial_doubles_backoff_up_to_max():
+    breaker = CircuitBreaker('h:1', failure_threshold=1, base_backoff=5.0, max_backoff=15.0)
+    breaker.record_failure('refused')
+    for expected in (10.0, 15.0, 15.0):
+        expire(breaker)
+        breaker.before_call()
+        breaker.record_failure('refused')
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.backoff == expected
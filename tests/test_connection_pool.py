@@ -0,0 +1,105 @@
+import http.client
+import resource
+import socket
+import time
+
+import pytest
+
+from app.services.connection_pool import ConnectionPool
+
+
+def make_conn():
+    """返回一个 sock 为 socketpair 一端的连接，以及对端 socket"""
+    conn = http.client.HTTPConnection('127.0.0.1', 9001)
+    conn.sock, peer = socket.socketpair()
+    return conn, peer
+
+
+def test_released_connection_is_reused():
+    pool = ConnectionPool()
+    conn, peer = make_conn()
+    pool.release('h:1', conn)
+
+    assert pool.acquire('h:1', timeout=5) is conn
+    assert pool.get_stats()['hits'] == 1
+    peer.close()
+
+
+def test_missing_host_creates_new_connection():
+    pool = ConnectionPool()
+    conn = pool.acquire('127.0.0.1:9001', timeout=5)
+
+    assert conn.sock is None
+    assert pool.get_stats()['misses'] == 1
+
+
+def test_release_over_max_size_closes_connection():
+    pool = ConnectionPool(max_size=1)
+    first, first_peer = make_conn()
+    second, second_peer = make_conn()
+    pool.release('h:1', first)
+    pool.release('h:1', second)
+
+    assert second.sock is None
+    assert pool.get_stats()['idle'] == 1
+    first_peer.close()
+    second_peer.close()
+
+
+def test_connection_closed_by_peer_is_evicted():
+    pool = ConnectionPool()
+    conn, peer = make_conn()
+    pool.release('h:1', conn)
+    peer.close()
+
+    assert pool.acquire('h:1', timeout=5) is not conn
+    assert pool.get_stats()['evictions'] == 1
+
+
+def test_idle_timeout_evicts_connection():
+    pool = ConnectionPool(idle_timeout=0.01)
+    conn, peer = make_conn()
+    pool.release('h:1', conn)
+    time.sleep(0.02)
+
+    assert pool.evict_idle() == 1
+    assert pool.get_stats()['idle'] == 0
+    peer.close()
+
+
+def test_health_check_supports_descriptors_above_select_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and hard < 1100:
+        pytest.skip('RLIMIT_NOFILE too low')
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, 1100), hard))
+    padding = []
+    try:
+        while True:
+            padding.append(socket.socket())
+            if padding[-1].fileno() >= 1024:
+                break
+        conn, peer = make_conn()
+        assert conn.sock.fileno() >= 1024
+
+        pool = ConnectionPool()
+        assert pool._is_healthy(conn, time.monotonic())
+        peer.close()
+        assert not pool._is_healthy(conn, time.monotonic())
+        conn.close()
+    finally:
+        for sock in padding:
+            sock.close()
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_mark_bad_closes_idle_connections():
+    pool = ConnectionPool()
+    conn, peer = make_conn()
+    pool.release('h:1', conn)
+    pool.mark_bad('h:1')
+
+    assert pool.is_bad('h:1')
+    assert conn.sock is None
+    pool.mark_good('h:1')
+    assert not pool.is_bad('h:1')
+    peer.close()
@@ -0,0 +1,44 @@
+from app.utils.hash_ring import HashRing
+
+KEYS = [f"host-{index:04d}" for index in range(2000)]
+
+
+def test_empty_ring_has_no_owner():
+    assert HashRing([]).owner('host-0001') is None
+
+
+def test_owner_is_independent_of_node_order():
+    first = HashRing(['a', 'b', 'c'])
+    second = HashRing(['c', 'a', 'b'])
+
+    assert all(first.owner(key) == second.owner(key) for key in KEYS)
+
+
+def test_keys_are_spread_across_nodes():
+    ring = HashRing(['a', 'b', 'c'])
+    counts = {}
+    for key in KEYS:
+        counts[ring.owner(key)] = counts.get(ring.owner(key), 0) + 1
+
+    assert set(counts) == {'a', 'b', 'c'}
+    assert min(counts.values()) > len(KEYS) / 3 * 0.5
+
+
+def test_only_keys_of_leaving_node_move():
+    before = HashRing(['a', 'b', 'c'])
+    after = HashRing(['a', 'c'])
+
+    for key in KEYS:
+        if before.owner(key) == 'b':
+            assert after.owner(key) in ('a', 'c')
+        else:
+            assert after.owner(key) == before.owner(key)
+
+
+def test_joining_node_takes_keys_only_from_others():
+    before = HashRing(['a', 'b'])
+    after = HashRing(['a', 'b', 'c'])
+
+    moved = [key for key in KEYS if after.owner(key) != before.owner(key)]
+    assert moved
+    assert all(after.owner(key) == 'c' for key in moved)
@@ -0,0 +1,75 @@
+from app.services.history import (
+    HistoryStore, PROCESS_STATES, RUNNING, StateRing, _PROCESS_CODES, _RESTART_FLAG, summarize
+)
+
+
+class FakeConfigManager:
+    def get_all_hosts(self):
+        return {'h1': {}}
+
+
+def code(statename):
+    return _PROCESS_CODES[statename]
+
+
+def test_first_entry_is_not_a_change():
+    ring = StateRing(8)
+    ring.append(100, code('RUNNING'))
+
+    result = summarize(ring, PROCESS_STATES, RUNNING, 50, 200)
+    assert result['changes'] == 0
+    assert result['covered_since'] == 100
+    assert result['uptime'] == 1.0
+
+
+def test_changes_restarts_and_durations():
+    ring = StateRing(8)
+    ring.append(100, code('RUNNING'))
+    ring.append(150, code('STOPPED'))
+    ring.append(170, code('RUNNING') | _RESTART_FLAG)
+
+    result = summarize(ring, PROCESS_STATES, RUNNING, 100, 200)
+    assert result['changes'] == 2
+    assert result['restarts'] == 1
+    assert result['durations'] == {'RUNNING': 80, 'STOPPED': 20}
+    assert result['uptime'] == 0.8
+    assert result['current'] == 'RUNNING'
+
+
+def test_state_before_window_carries_into_window():
+    ring = StateRing(8)
+    ring.append(100, code('STOPPED'))
+    ring.append(300, code('RUNNING'))
+
+    result = summarize(ring, PROCESS_STATES, RUNNING, 200, 400)
+    assert result['durations'] == {'STOPPED': 100, 'RUNNING': 100}
+    assert result['changes'] == 1
+
+
+def test_wrapped_ring_counts_oldest_entry_as_change():
+    ring = StateRing(2)
+    ring.append(100, code('RUNNING'))
+    ring.append(110, code('STOPPED'))
+    ring.append(120, code('RUNNING'))
+
+    assert ring.wrapped
+    assert summarize(ring, PROCESS_STATES, RUNNING, 50, 200)['changes'] == 2
+
+
+def test_timeline_buckets():
+    ring = StateRing(8)
+    ring.append(0, code('RUNNING'))
+    ring.append(50, code('STOPPED'))
+
+    timeline = summarize(ring, PROCESS_STATES, RUNNING, 0, 100, buckets=4)['timeline']
+    assert [bucket['uptime'] for bucket in timeline] == [1.0, 1.0, 0.0, 0.0]
+
+
+def test_restart_through_starting_is_detected():
+    store = HistoryStore(FakeConfigManager())
+    for statename, pid in (('RUNNING', 100), ('STOPPED', 0), ('STARTING', 200), ('RUNNING', 200), ('RUNNING', 300)):
+        store.on_processes('h1', [{'name': 'web', 'statename': statename, 'pid': pid}])
+
+    result = store.process_history('h1', 'web', 3600)[0]
+    assert result['restarts'] == 2
+    assert result['changes'] == 4
@@ -0,0 +1,85 @@
+import pytest
+
+from app.services.process_index import ProcessIndex
+
+
+class FakeConfigManager:
+    def __init__(self, hosts):
+        self.hosts = hosts
+
+    def get_all_hosts(self):
+        return dict(self.hosts)
+
+
+def process(name, statename='RUNNING', pid=1, description=''):
+    return {'name': name, 'statename': statename, 'pid': pid, 'description': description}
+
+
+@pytest.fixture
+def index():
+    index = ProcessIndex(FakeConfigManager({'h1': {'name': 'Host 1'}, 'h2': {'name': 'Host 2'}}))
+    index.refresh()
+    index.on_processes('h1', [process('web-1'), process('web-2'), process('db', 'STOPPED', 0)])
+    index.on_processes('h2', [process('web-1'), process('worker', 'FATAL', 0)])
+    return index
+
+
+def test_prefix_search_pages_with_cursor(index):
+    first = index.search('web', limit=2)
+    assert [(item['name'], item['host_id']) for item in first['processes']] == [('web-1', 'h1'), ('web-1', 'h2')]
+    assert first['next_cursor'] == 'web-1@h2'
+    assert first['total'] == 3
+
+    second = index.search('web', limit=2, cursor=first['next_cursor'])
+    assert [(item['name'], item['host_id']) for item in second['processes']] == [('web-2', 'h1')]
+    assert second['next_cursor'] is None
+
+
+def test_cursor_survives_removed_entry(index):
+    cursor = index.search('web', limit=1)['next_cursor']
+    index.on_processes('h1', [process('web-2')])
+
+    page = index.search('web', limit=5, cursor=cursor)
+    assert [(item['name'], item['host_id']) for item in page['processes']] == [('web-1', 'h2'), ('web-2', 'h1')]
+
+
+def test_invalid_cursor_raises(index):
+    with pytest.raises(ValueError):
+        index.search('web', cursor='no-separator')
+
+
+def test_glob_and_state_filters(index):
+    assert [item['name'] for item in index.search('*er')['processes']] == ['worker']
+    assert [item['host_id'] for item in index.search(statenames=['fatal'])['processes']] == ['h2']
+    assert index.search('web', statenames=['STOPPED'])['total'] == 0
+
+
+def test_description_change_updates_entry_in_place(index):
+    names = list(index._names)
+    index.on_processes('h1', [process('web-1', description='uptime 0:01:00'), process('web-2'),
+                              process('db', 'STOPPED', 0)])
+
+    assert index._names == names
+    assert index.search('web-1')['processes'][0]['description'] == 'uptime 0:01:00'
+
+
+def test_state_change_moves_state_membership(index):
+    index.on_processes('h1', [process('web-1', 'FATAL', 0), process('web-2'), process('db', 'STOPPED', 0)])
+
+    assert {item['host_id'] for item in index.search(statenames=['FATAL'])['processes']} == {'h1', 'h2'}
+    assert [item['host_id'] for item in index.search('web-1', statenames=['RUNNING'])['processes']] == ['h2']
+
+
+def test_unavailable_host_keeps_processes(index):
+    index.on_processes('h2', None)
+
+    worker = index.search('worker')['processes'][0]
+    assert worker['host_available'] is False
+
+
+def test_refresh_drops_deleted_hosts(index):
+    index.config_manager.hosts.pop('h2')
+    index.refresh()
+
+    assert index.search('worker')['total'] == 0
+    assert index.get_stats() == {'hosts': 1, 'names': 3, 'processes': 3}
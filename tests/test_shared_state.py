@@ -0,0 +1,175 @@
+from datetime import datetime
+import json
+
+import pytest
+
+from app.services.shared_state import SharedStateStore, WorkerCoordinator
+from app.services.snapshots import ProcessSnapshotStore
+
+
+class FakeMonitor:
+    """WorkerCoordinator 回放时用到的 HostMonitor 接口"""
+
+    def __init__(self):
+        self.replicating = False
+        self.host_status = {}
+        self.process_snapshots = ProcessSnapshotStore()
+        self.sweeps = 0
+
+    def add_status_listener(self, listener):
+        pass
+
+    def update_host_status(self, host_id, status, checked_at=None, changed_at=None):
+        self.host_status[host_id] = status
+
+    def notify_sweep(self):
+        self.sweeps += 1
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'state.db')
+
+
+def status_row(host_id, status=1, at=1000.0):
+    return (host_id, status, at, at)
+
+
+def snapshot_row(host_id, names, at=1000.0):
+    processes = [{'name': name, 'statename': 'RUNNING', 'pid': 1} for name in names]
+    return (host_id, json.dumps(processes), at, None)
+
+
+def coordinator(path, node_id, tmp_path):
+    return WorkerCoordinator(FakeMonitor(), SharedStateStore(path), str(tmp_path / f'{node_id}.lock'),
+                             node_id=node_id, sharding=True)
+
+
+def test_publish_increments_seq_and_reads_changes_since(path):
+    store = SharedStateStore(path)
+    first = store.publish([status_row('h1')], [], node_id='a')
+    second = store.publish([status_row('h2')], [], node_id='a')
+
+    assert (first, second) == (1, 2)
+    seq, statuses, _ = store.read_changes(first)
+    assert seq == 2
+    assert [row[0] for row in statuses] == ['h2']
+
+
+def test_read_changes_excludes_own_node(path):
+    store = SharedStateStore(path)
+    store.publish([status_row('h1')], [snapshot_row('h1', ['web'])], node_id='a')
+    store.publish([status_row('h2')], [snapshot_row('h2', ['db'])], node_id='b')
+
+    _, statuses, snapshots = store.read_changes(0, exclude_node='a')
+    assert [row[0] for row in statuses] == ['h2']
+    assert [row[0] for row in snapshots] == ['h2']
+
+
+def test_unavailable_snapshot_keeps_previous_processes(path):
+    store = SharedStateStore(path)
+    store.publish([], [snapshot_row('h1', ['web'])], node_id='a')
+    store.publish([], [('h1', None, None, 'refused')], node_id='a')
+
+    _, _, snapshots = store.read_changes(0)
+    host_id, processes, updated_at, error = snapshots[0]
+    assert [process['name'] for process in json.loads(processes)] == ['web']
+    assert (updated_at, error) == (1000.0, 'refused')
+
+
+def test_removed_hosts_are_deleted(path):
+    store = SharedStateStore(path)
+    store.publish([status_row('h1')], [snapshot_row('h1', ['web'])], node_id='a')
+    store.publish([], [], removed=['h1'], node_id='a')
+
+    _, statuses, snapshots = store.read_changes(0)
+    assert statuses == [] and snapshots == []
+
+
+def test_terms_are_per_node(path):
+    store = SharedStateStore(path)
+    assert store.begin_term('a', 1) == 1
+    assert store.begin_term('b', 2) == 1
+    assert store.begin_term('a', 3) == 2
+
+    _, node = store.read_state('b')
+    assert (node['pid'], node['term']) == (2, 1)
+    assert store.read_state('c')[1] is None
+
+
+def test_leave_keeps_term_and_drops_membership(path):
+    store = SharedStateStore(path)
+    store.begin_term('a', 1)
+    store.begin_term('b', 2)
+    store.leave('a')
+
+    assert store.live_nodes(60) == ['b']
+    assert store.begin_term('a', 3) == 2
+
+
+def test_sharding_store_uses_rollback_journal(path):
+    store = SharedStateStore(path, journal_mode='DELETE')
+    store.publish([], [], node_id='a')
+
+    assert store._connect().execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+
+
+def test_leader_replicates_peer_rows_after_publishing(path, tmp_path):
+    leader = coordinator(path, 'a', tmp_path)
+    leader.leader = True
+    peer = SharedStateStore(path)
+    # 对端节点先写入（seq 较小），之后本节点发布
+    peer.publish([status_row('h2')], [snapshot_row('h2', ['db'])], node_id='b')
+    leader.published_seq = leader.store.publish([status_row('h1')], [], node_id='a')
+
+    leader._replicate(exclude_node='a')
+    assert leader.monitor.host_status == {'h2': True}
+    assert leader.monitor.process_snapshots.get('h2')['updated_at'] == datetime.fromtimestamp(1000.0)
+    assert leader.read_seq == 2
+
+    peer.publish([status_row('h3', 0)], [], node_id='b')
+    leader._replicate(exclude_node='a')
+    assert leader.monitor.host_status == {'h2': True, 'h3': False}
+
+
+def test_reader_reloads_only_when_own_node_term_changes(path, tmp_path):
+    store = SharedStateStore(path)
+    store.begin_term('a', 1)
+    store.publish([status_row('h1')], [], node_id='a')
+    reader = coordinator(path, 'a', tmp_path)
+    reader._replicate()
+    assert (reader.term, reader.read_seq) == (1, 1)
+    assert reader.monitor.replicating
+
+    # 其他节点开始新任期不影响本节点的读取位置
+    store.begin_term('b', 2)
+    store.publish([status_row('h2')], [], node_id='b')
+    reader._replicate()
+    assert (reader.term, reader.read_seq) == (1, 2)
+
+    # 本节点的采集进程换了一任：从头重新加载
+    store.begin_term('a', 3)
+    reader.monitor.host_status.clear()
+    reader._replicate()
+    assert reader.term == 2
+    assert reader.monitor.host_status == {'h1': True, 'h2': True}
+
+
+def test_reader_reloads_when_state_file_is_recreated(path, tmp_path):
+    store = SharedStateStore(path)
+    for host_id in ('h1', 'h2', 'h3'):
+        store.publish([status_row(host_id)], [], node_id='a')
+    reader = coordinator(path, 'a', tmp_path)
+    reader._replicate()
+    assert reader.read_seq == 3
+
+    store.close()
+    reader.store.close()
+    for suffix in ('', '-wal', '-shm'):
+        (tmp_path / f'state.db{suffix}').unlink(missing_ok=True)
+    store = SharedStateStore(path)
+    store.publish([status_row('h4')], [], node_id='a')
+    reader.monitor.host_status.clear()
+    reader._replicate()
+    assert reader.monitor.host_status == {'h4': True}
+    assert reader.read_seq == 1